@@ -11,8 +11,9 @@ import logging
 from datetime import datetime, date
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response
 from flask_socketio import SocketIO, emit
+import msgspec
 import threading
 import queue
 import time
@@ -33,7 +34,7 @@ from database import get_db_manager, init_database
 
 # Import des systèmes d'automatisation
 from automation_manager import automation_manager, AutomationTask, ScheduleType
-from brokerage_manager import brokerage_manager, BrokerType, OrderSide, OrderType
+from brokerage_manager import brokerage_manager, init_default_brokers, BrokerType, OrderSide, OrderType
 from risk_manager import risk_manager, RiskLevel
 from monitoring_system import monitoring_system, AlertLevel
 from notification_system import notification_system, NotificationChannel, NotificationPriority
@@ -66,6 +67,9 @@ else:
 # Initialiser les systèmes d'automatisation
 print("🤖 Initialisation des systèmes d'automatisation...")
 
+# Enregistrer le courtier de trading simulé par défaut
+init_default_brokers()
+
 # Configurer les callbacks entre les systèmes
 def on_analysis_complete(task, result):
     """Callback quand une analyse automatique est terminée"""
@@ -370,6 +374,10 @@ def start_analysis():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Encodeur C pour les lignes de la base : les datetime sont écrits en ISO 8601
+# sans appel à isoformat() ligne par ligne
+_db_rows_encoder = msgspec.json.Encoder()
+
 @app.route('/api/get_results/<session_id>')
 def get_results(session_id):
     """API pour récupérer les résultats d'une analyse"""
@@ -377,7 +385,7 @@ def get_results(session_id):
     if db_manager:
         result = db_manager.get_analysis_result(session_id)
         if result:
-            return jsonify(result)
+            return Response(_db_rows_encoder.encode(result), mimetype='application/json')
 
     # Fallback vers la mémoire
     if session_id in trading_app.analysis_results:
@@ -392,7 +400,7 @@ def list_results():
     if db_manager:
         results = db_manager.list_analysis_results()
         if results:
-            return jsonify(results)
+            return Response(_db_rows_encoder.encode(results), mimetype='application/json')
 
     # Fallback vers les fichiers
     results = []
@@ -887,39 +895,83 @@ def get_backtest_status(backtest_id):
     else:
         return jsonify({'error': 'Backtest non trouvé'}), 404
 
+class BacktestConfigOut(msgspec.Struct):
+    """Configuration exposée dans les résultats de backtest"""
+    name: str
+    description: str
+    symbols: List[str]
+    start_date: str
+    end_date: str
+    initial_capital: float
+
+class BacktestMetricsOut(msgspec.Struct):
+    """Métriques exposées dans les résultats de backtest"""
+    total_return: float
+    annual_return: float
+    volatility: float
+    sharpe_ratio: float
+    max_drawdown: float
+    win_rate: float
+    profit_factor: float
+    total_trades: int
+    winning_trades: int
+    losing_trades: int
+
+class BacktestResultOut(msgspec.Struct):
+    """Schéma de la réponse de /api/backtesting/<id>/results"""
+    id: str
+    config: BacktestConfigOut
+    status: str
+    metrics: Optional[BacktestMetricsOut]
+    trades_count: int
+    equity_curve: List[Dict[str, Any]]
+    created_at: str
+    completed_at: Optional[str]
+
+def _encode_numpy_scalar(obj):
+    """Convertir les scalaires NumPy restants en types Python"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise NotImplementedError(f"Type non sérialisable: {type(obj)}")
+
+# Encodeur compilé une seule fois pour toutes les réponses de backtest
+_backtest_encoder = msgspec.json.Encoder(enc_hook=_encode_numpy_scalar)
+
 @app.route('/api/backtesting/<backtest_id>/results', methods=['GET'])
 def get_backtest_results(backtest_id):
     """API pour obtenir les résultats d'un backtest"""
     result = backtest_engine.get_backtest_results(backtest_id)
     if result:
-        return jsonify({
-            'id': result.id,
-            'config': {
-                'name': result.config.name,
-                'description': result.config.description,
-                'symbols': result.config.symbols,
-                'start_date': result.config.start_date,
-                'end_date': result.config.end_date,
-                'initial_capital': result.config.initial_capital
-            },
-            'status': result.status.value,
-            'metrics': {
-                'total_return': result.metrics.total_return,
-                'annual_return': result.metrics.annual_return,
-                'volatility': result.metrics.volatility,
-                'sharpe_ratio': result.metrics.sharpe_ratio,
-                'max_drawdown': result.metrics.max_drawdown,
-                'win_rate': result.metrics.win_rate,
-                'profit_factor': result.metrics.profit_factor,
-                'total_trades': result.metrics.total_trades,
-                'winning_trades': result.metrics.winning_trades,
-                'losing_trades': result.metrics.losing_trades
-            } if result.metrics else None,
-            'trades_count': len(result.trades),
-            'equity_curve': result.equity_curve,
-            'created_at': result.created_at.isoformat(),
-            'completed_at': result.completed_at.isoformat() if result.completed_at else None
-        })
+        metrics = result.metrics
+        body = _backtest_encoder.encode(BacktestResultOut(
+            id=result.id,
+            config=BacktestConfigOut(
+                name=result.config.name,
+                description=result.config.description,
+                symbols=result.config.symbols,
+                start_date=result.config.start_date,
+                end_date=result.config.end_date,
+                initial_capital=result.config.initial_capital
+            ),
+            status=result.status.value,
+            metrics=BacktestMetricsOut(
+                total_return=metrics.total_return,
+                annual_return=metrics.annual_return,
+                volatility=metrics.volatility,
+                sharpe_ratio=metrics.sharpe_ratio,
+                max_drawdown=metrics.max_drawdown,
+                win_rate=metrics.win_rate,
+                profit_factor=metrics.profit_factor,
+                total_trades=metrics.total_trades,
+                winning_trades=metrics.winning_trades,
+                losing_trades=metrics.losing_trades
+            ) if metrics else None,
+            trades_count=result.n_trades,
+            equity_curve=result.equity_curve,
+            created_at=result.created_at.isoformat(),
+            completed_at=result.completed_at.isoformat() if result.completed_at else None
+        ))
+        return Response(body, mimetype='application/json')
     else:
         return jsonify({'error': 'Résultats non trouvés'}), 404
 
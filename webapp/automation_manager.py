@@ -301,7 +301,8 @@ class AutomationManager:
         """Vérifier et exécuter les tâches dues"""
         now = datetime.now()
         
-        for task in self.tasks.values():
+        # Instantané des tâches: create_task/delete_task peuvent modifier le dict en parallèle
+        for task in tuple(self.tasks.values()):
             if not task.enabled or not task.next_run:
                 continue
             
@@ -5,16 +5,39 @@ Test des stratégies sur données historiques avant déploiement live
 
 import os
 import json
+import multiprocessing as mp
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
+from functools import reduce
+import requests
+from requests.adapters import HTTPAdapter
 import yfinance as yf
 import asyncio
+import itertools
 import threading
+import time
+import uuid
+from pathlib import Path
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+try:
+    from curl_cffi import requests as curl_requests
+except ImportError:
+    curl_requests = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba absent: les noyaux s'exécutent en Python pur
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -78,6 +101,27 @@ class BacktestMetrics:
     alpha: float
     beta: float
 
+# Enregistrement typé d'un point de la courbe d'équité
+EQUITY_DTYPE = np.dtype([
+    ('date', 'datetime64[ns]'),
+    ('equity', 'f4'),
+    ('cash', 'f4'),
+    ('positions_value', 'f4')
+])
+
+# Enregistrement typé d'un trade (symbole stocké par index dans BacktestResult.symbols)
+TRADE_DTYPE = np.dtype([
+    ('sym_idx', 'i4'),
+    ('entry_date', 'datetime64[ns]'),
+    ('exit_date', 'datetime64[ns]'),
+    ('entry_px', 'f4'),
+    ('exit_px', 'f4'),
+    ('qty', 'i4'),
+    ('side', 'i1'),  # 1 = BUY, -1 = SELL
+    ('pnl', 'f4'),
+    ('commission', 'f4')
+])
+
 @dataclass
 class BacktestResult:
     """Résultat complet de backtest"""
@@ -85,57 +129,195 @@ class BacktestResult:
     config: BacktestConfig
     status: BacktestStatus
     metrics: Optional[BacktestMetrics]
-    trades: List[Trade]
-    equity_curve: List[Dict[str, Any]]
+    trades_arr: np.ndarray
+    equity_arr: np.ndarray
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    n_trades: int = 0
+    symbols: List[str] = field(default_factory=list)
+    
+    @property
+    def trades(self) -> List[Trade]:
+        """Trades matérialisés en objets Trade (pour les consommateurs externes)"""
+        trades = []
+        for record in self.trades_arr[:self.n_trades]:
+            is_buy = record['side'] > 0
+            entry_date = pd.Timestamp(record['entry_date'])
+            trades.append(Trade(
+                symbol=self.symbols[record['sym_idx']],
+                entry_date=entry_date,
+                exit_date=None if is_buy else pd.Timestamp(record['exit_date']),
+                entry_price=float(record['entry_px']),
+                exit_price=None if is_buy else float(record['exit_px']),
+                quantity=int(record['qty']),
+                side='BUY' if is_buy else 'SELL',
+                pnl=None if np.isnan(record['pnl']) else float(record['pnl']),
+                commission=float(record['commission']),
+                reason='Momentum positif' if is_buy else 'Momentum négatif'
+            ))
+        return trades
+    
+    @property
+    def equity_curve(self) -> List[Dict[str, Any]]:
+        """Courbe d'équité sérialisable (dates ISO formatées à la demande)"""
+        dates = np.datetime_as_string(self.equity_arr['date'], unit='s')
+        return [
+            {'date': date, 'equity': equity, 'cash': cash, 'positions_value': positions_value}
+            for date, equity, cash, positions_value in zip(
+                dates.tolist(),
+                self.equity_arr['equity'].tolist(),
+                self.equity_arr['cash'].tolist(),
+                self.equity_arr['positions_value'].tolist()
+            )
+        ]
+
+def _optimize_frame_memory(data: pd.DataFrame) -> pd.DataFrame:
+    """Réduire l'empreinte mémoire d'un DataFrame (float64 -> float32, entiers au plus petit type sûr)"""
+    for column in data.columns:
+        if data[column].dtype == np.float64:
+            data[column] = data[column].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(data[column].dtype):
+            data[column] = pd.to_numeric(data[column], downcast='integer')
+    return data
+
+# Répertoire par défaut du cache disque, à côté du module (indépendant du
+# répertoire courant)
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "backtest_cache"
 
 class DataProvider:
     """Fournisseur de données historiques"""
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, cache_ttl: int = 24 * 3600):
         self.cache = {}
+        
+        # Cache disque (Parquet) partagé entre processus et redémarrages ;
+        # le répertoire n'est créé qu'à la première écriture
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.cache_ttl = cache_ttl
+        
+        # Session HTTP partagée (keep-alive) pour tous les téléchargements yfinance
+        self._session = self._create_session()
     
-    def get_historical_data(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
-        """Obtenir les données historiques d'un symbole"""
+    @staticmethod
+    def _create_session():
+        """Créer une session HTTP réutilisant les connexions TCP/TLS"""
+        if curl_requests is not None:
+            # Les versions récentes de yfinance exigent une session curl_cffi
+            return curl_requests.Session(impersonate="chrome")
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=3)
+        session.mount('https://', adapter)
+        return session
+    
+    def _cache_path(self, symbol: str, start_date: str, end_date: str) -> Path:
+        """Chemin du fichier Parquet d'un symbole"""
+        return self.cache_dir / f"{symbol}_{start_date}_{end_date}.parquet"
+    
+    def _load_from_disk(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """Charger un symbole depuis le cache disque s'il n'a pas expiré"""
+        path = self._cache_path(symbol, start_date, end_date)
         try:
-            cache_key = f"{symbol}_{start_date}_{end_date}"
-            
-            if cache_key in self.cache:
-                return self.cache[cache_key]
-            
-            # Télécharger les données avec yfinance
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(start=start_date, end=end_date)
-            
-            if data.empty:
-                logger.warning(f"⚠️ Aucune donnée pour {symbol}")
+            if not path.exists() or time.time() - os.path.getmtime(path) > self.cache_ttl:
                 return None
-            
-            # Nettoyer les données
-            data = data.dropna()
-            data.index = pd.to_datetime(data.index)
-            
-            # Ajouter à la cache
-            self.cache[cache_key] = data
-            
-            logger.info(f"📊 Données chargées pour {symbol}: {len(data)} jours")
-            return data
-            
+            return pd.read_parquet(path)
         except Exception as e:
-            logger.error(f"❌ Erreur chargement données {symbol}: {e}")
+            logger.warning(f"⚠️ Cache disque illisible pour {symbol}: {e}")
             return None
     
+    def _save_to_disk(self, symbol: str, start_date: str, end_date: str, data: pd.DataFrame):
+        """Écrire un symbole dans le cache disque"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            data.to_parquet(self._cache_path(symbol, start_date, end_date), compression='zstd')
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible d'écrire le cache disque pour {symbol}: {e}")
+    
+    def clear_cache(self):
+        """Vider les caches mémoire et disque"""
+        self.cache.clear()
+        for path in self.cache_dir.glob("*.parquet"):
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"⚠️ Impossible de supprimer {path}: {e}")
+    
+    def get_historical_data(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """Obtenir les données historiques d'un symbole"""
+        cache_key = f"{symbol}_{start_date}_{end_date}"
+        
+        if cache_key in self.cache:
+            return self.cache[cache_key]
+        
+        return self.get_multiple_symbols([symbol], start_date, end_date).get(symbol)
+    
     def get_multiple_symbols(self, symbols: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
-        """Obtenir les données pour plusieurs symboles"""
+        """Obtenir les données pour plusieurs symboles (un seul téléchargement groupé)"""
+        missing = []
+        for symbol in symbols:
+            cache_key = f"{symbol}_{start_date}_{end_date}"
+            if cache_key in self.cache:
+                continue
+            
+            symbol_data = self._load_from_disk(symbol, start_date, end_date)
+            if symbol_data is not None:
+                self.cache[cache_key] = symbol_data
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            self._download_symbols(missing, start_date, end_date)
+        
         data = {}
         for symbol in symbols:
-            symbol_data = self.get_historical_data(symbol, start_date, end_date)
+            symbol_data = self.cache.get(f"{symbol}_{start_date}_{end_date}")
             if symbol_data is not None:
                 data[symbol] = symbol_data
         return data
+    
+    def _download_symbols(self, symbols: List[str], start_date: str, end_date: str):
+        """Télécharger les symboles manquants en un seul appel yfinance et remplir le cache"""
+        try:
+            raw = yf.download(
+                symbols, start=start_date, end=end_date, group_by='ticker',
+                auto_adjust=True, threads=True, progress=False, session=self._session
+            )
+        except Exception as e:
+            logger.error(f"❌ Erreur chargement données {', '.join(symbols)}: {e}")
+            return
+        
+        for symbol in symbols:
+            try:
+                if raw is None or raw.empty:
+                    data = None
+                elif isinstance(raw.columns, pd.MultiIndex):
+                    if symbol not in raw.columns.get_level_values(0):
+                        data = None
+                    else:
+                        data = raw.xs(symbol, axis=1, level=0)
+                else:
+                    # Anciennes versions de yfinance: colonnes à plat pour un seul symbole
+                    data = raw if len(symbols) == 1 else None
+                
+                if data is None or data.dropna(how='all').empty:
+                    logger.warning(f"⚠️ Aucune donnée pour {symbol}")
+                    continue
+                
+                # Nettoyer les données
+                data = _optimize_frame_memory(data.dropna().copy())
+                data.index = pd.to_datetime(data.index)
+                
+                # Ajouter aux caches mémoire et disque
+                self.cache[f"{symbol}_{start_date}_{end_date}"] = data
+                self._save_to_disk(symbol, start_date, end_date, data)
+                
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"📊 Données chargées pour {symbol}: {len(data)} jours")
+                
+            except Exception as e:
+                logger.error(f"❌ Erreur chargement données {symbol}: {e}")
 
 class BacktestEngine:
     """Moteur principal de backtesting"""
@@ -145,40 +327,59 @@ class BacktestEngine:
         self.active_backtests: Dict[str, BacktestResult] = {}
         self.completed_backtests: Dict[str, BacktestResult] = {}
         
-        # Thread pool pour les backtests
+        # Verrou des dictionnaires de backtests (modifiés depuis les threads et callbacks du pool)
+        self._lock = threading.Lock()
+        self._id_counter = itertools.count()
+        
+        # Threads pour le chargement des données (I/O), processus pour la simulation (CPU)
         self.executor_threads: Dict[str, threading.Thread] = {}
+        self.futures: Dict[str, Future] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
         
         logger.info("🔬 BacktestEngine initialisé")
     
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Créer à la demande le pool de processus de simulation"""
+        with self._pool_lock:
+            if self._pool is None:
+                # Pas de fork : le serveur est multithreadé (boucle de surveillance, WebSocket,
+                # pools HTTP) et un enfant forké peut hériter d'un verrou tenu. Les arguments
+                # des workers sont des descripteurs de mémoire partagée, peu coûteux à sérialiser.
+                start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+                self._pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                                 mp_context=mp.get_context(start_method))
+            return self._pool
+    
     def create_backtest(self, config: BacktestConfig) -> str:
         """Créer un nouveau backtest"""
-        backtest_id = f"backtest_{int(datetime.now().timestamp())}"
+        # Compteur + suffixe aléatoire: pas de collision entre créations simultanées
+        backtest_id = f"bt_{next(self._id_counter):08x}_{uuid.uuid4().hex[:8]}"
         
         result = BacktestResult(
             id=backtest_id,
             config=config,
             status=BacktestStatus.PENDING,
             metrics=None,
-            trades=[],
-            equity_curve=[],
+            trades_arr=np.empty(0, dtype=TRADE_DTYPE),
+            equity_arr=np.empty(0, dtype=EQUITY_DTYPE),
             created_at=datetime.now()
         )
         
-        self.active_backtests[backtest_id] = result
+        with self._lock:
+            self.active_backtests[backtest_id] = result
         
         logger.info(f"📋 Backtest créé: {config.name} ({backtest_id})")
         return backtest_id
     
     def start_backtest(self, backtest_id: str) -> bool:
         """Démarrer un backtest"""
-        if backtest_id not in self.active_backtests:
-            return False
-        
-        result = self.active_backtests[backtest_id]
-        if result.status != BacktestStatus.PENDING:
+        with self._lock:
+            result = self.active_backtests.get(backtest_id)
+        if result is None or result.status != BacktestStatus.PENDING:
             return False
         
-        # Démarrer le backtest dans un thread séparé
+        # Charger les données dans un thread séparé, la simulation part ensuite dans le pool
         thread = threading.Thread(
             target=self._run_backtest,
             args=(backtest_id,),
@@ -191,10 +392,26 @@ class BacktestEngine:
         logger.info(f"🚀 Backtest démarré: {backtest_id}")
         return True
     
-    def _run_backtest(self, backtest_id: str):
-        """Exécuter un backtest"""
-        result = self.active_backtests[backtest_id]
+    def run_batch(self, configs: List[BacktestConfig], max_workers: Optional[int] = None) -> List[str]:
+        """Exécuter plusieurs backtests en parallèle et attendre leur fin"""
+        backtest_ids = [self.create_backtest(config) for config in configs]
+        
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as io_pool:
+            done_futures = list(io_pool.map(self._run_backtest, backtest_ids))
+        
+        wait(done_futures)
+        return backtest_ids
+    
+    def _run_backtest(self, backtest_id: str) -> Future:
+        """Préparer un backtest et soumettre sa simulation au pool de processus
+        
+        Retourne un Future résolu une fois le résultat finalisé.
+        """
+        with self._lock:
+            result = self.active_backtests[backtest_id]
         config = result.config
+        done = Future()
+        shared_blocks: List[shared_memory.SharedMemory] = []
         
         try:
             result.status = BacktestStatus.RUNNING
@@ -211,179 +428,194 @@ class BacktestEngine:
             if not data:
                 raise Exception("Aucune donnée historique disponible")
             
-            # 2. Initialiser le portefeuille
-            portfolio = BacktestPortfolio(config.initial_capital, config.commission, config.slippage)
+            # 2. Obtenir les dates de trading (union des index en C, côté pandas)
+            trading_dates = reduce(pd.Index.union, (df.index for df in data.values())).sort_values()
+            
+            # 3. Aligner les prix de clôture dans une matrice (T, N)
+            symbols = list(data)
+            prices = self._align_close_prices(data, symbols, trading_dates)
+            
+            # 4. Pré-calculer les signaux de momentum sur toute la période
+            buy_mask, sell_mask = self._compute_signal_masks(data, symbols, trading_dates)
+            
+            # 5. Simuler le trading dans un processus du pool
+            dates = trading_dates
+            if dates.tz is not None:
+                dates = dates.tz_localize(None)
+            # Les matrices (T, N) passent par mémoire partagée plutôt que par pickle
+            shared = {}
+            for key, array in (('prices', prices), ('buy_mask', buy_mask), ('sell_mask', sell_mask)):
+                shm, shared[key] = _to_shared(array)
+                shared_blocks.append(shm)
+            
+            future = self._get_pool().submit(
+                _run_backtest_shared, symbols, dates.to_numpy(dtype='datetime64[ns]'), shared,
+                config.initial_capital, config.commission, config.slippage
+            )
+            self.futures[backtest_id] = future
             
-            # 3. Obtenir les dates de trading
-            all_dates = set()
-            for symbol_data in data.values():
-                all_dates.update(symbol_data.index)
+            def on_done(f: Future):
+                _release_shared(shared_blocks)
+                self._finalize_backtest(backtest_id, f, data, symbols, trading_dates, done)
             
-            trading_dates = sorted(list(all_dates))
+            future.add_done_callback(on_done)
             
-            # 4. Simuler le trading jour par jour
-            logger.info(f"📈 Simulation sur {len(trading_dates)} jours...")
+        except Exception as e:
+            _release_shared(shared_blocks)
+            self._fail_backtest(result, e)
+            done.set_result(None)
+        
+        finally:
+            # Nettoyer le thread
+            if backtest_id in self.executor_threads:
+                del self.executor_threads[backtest_id]
+        
+        return done
+    
+    def _finalize_backtest(self, backtest_id: str, future: Future, data: Dict[str, pd.DataFrame],
+                           symbols: List[str], trading_dates: pd.DatetimeIndex, done: Future):
+        """Récupérer la simulation du pool, calculer les métriques et archiver le résultat"""
+        with self._lock:
+            result = self.active_backtests.get(backtest_id)
+        if result is None:
+            self.futures.pop(backtest_id, None)
+            done.set_result(None)
+            return
+        config = result.config
+        
+        try:
+            simulation = future.result()
             
-            for i, current_date in enumerate(trading_dates):
-                # Mettre à jour les prix du portefeuille
-                current_prices = {}
-                for symbol, symbol_data in data.items():
-                    if current_date in symbol_data.index:
-                        current_prices[symbol] = symbol_data.loc[current_date, 'Close']
-                
-                portfolio.update_prices(current_date, current_prices)
-                
-                # Simuler les signaux de trading (ici on simule)
-                # En réalité, on appellerait TradingAgents pour chaque symbole
-                signals = self._simulate_trading_signals(config, current_date, data, i)
-                
-                # Exécuter les trades
-                for signal in signals:
-                    trade = portfolio.execute_trade(
-                        symbol=signal['symbol'],
-                        side=signal['side'],
-                        quantity=signal['quantity'],
-                        price=signal['price'],
-                        date=current_date,
-                        reason=signal.get('reason', 'Signal')
-                    )
-                    
-                    if trade:
-                        result.trades.append(trade)
-                
-                # Enregistrer l'équité
-                equity_point = {
-                    'date': current_date.isoformat(),
-                    'equity': portfolio.total_value,
-                    'cash': portfolio.cash,
-                    'positions_value': portfolio.positions_value
-                }
-                result.equity_curve.append(equity_point)
-                
-                # Progression
-                if i % 50 == 0:
-                    progress = (i / len(trading_dates)) * 100
-                    logger.info(f"📊 Progression: {progress:.1f}%")
+            result.equity_arr = simulation['equity']
+            result.trades_arr = simulation['trades']
+            result.n_trades = len(simulation['trades'])
+            result.symbols = symbols
             
-            # 5. Calculer les métriques finales
+            # 6. Calculer les métriques finales
             logger.info("📊 Calcul des métriques...")
             result.metrics = self._calculate_metrics(result, config, data)
             
-            # 6. Finaliser
+            # 7. Finaliser
             result.status = BacktestStatus.COMPLETED
             result.completed_at = datetime.now()
             
             # Déplacer vers les backtests terminés
-            self.completed_backtests[backtest_id] = result
-            del self.active_backtests[backtest_id]
+            with self._lock:
+                self.completed_backtests[backtest_id] = result
+                del self.active_backtests[backtest_id]
             
             duration = (result.completed_at - result.started_at).total_seconds()
             logger.info(f"✅ Backtest terminé: {config.name} ({duration:.1f}s)")
             
         except Exception as e:
-            result.status = BacktestStatus.FAILED
-            result.error_message = str(e)
-            result.completed_at = datetime.now()
-            
-            logger.error(f"❌ Backtest échoué: {config.name} - {e}")
+            self._fail_backtest(result, e)
         
         finally:
-            # Nettoyer le thread
-            if backtest_id in self.executor_threads:
-                del self.executor_threads[backtest_id]
+            self.futures.pop(backtest_id, None)
+            done.set_result(None)
     
-    def _simulate_trading_signals(self, config: BacktestConfig, current_date: datetime, 
-                                data: Dict[str, pd.DataFrame], day_index: int) -> List[Dict[str, Any]]:
-        """Simuler des signaux de trading (à remplacer par TradingAgents)"""
-        signals = []
+    def _fail_backtest(self, result: BacktestResult, error: Exception):
+        """Marquer un backtest comme échoué"""
+        result.status = BacktestStatus.FAILED
+        result.error_message = str(error)
+        result.completed_at = datetime.now()
         
-        # Stratégie simple pour la simulation: momentum sur 20 jours
-        if day_index < 20:
-            return signals
+        logger.error(f"❌ Backtest échoué: {result.config.name} - {error}")
+    
+    def _align_close_prices(self, data: Dict[str, pd.DataFrame], symbols: List[str],
+                            trading_dates: pd.DatetimeIndex) -> np.ndarray:
+        """Construire la matrice (T, N) des derniers cours de clôture connus à chaque date"""
+        dates = trading_dates.to_numpy()
+        # Avant la première cotation d'un symbole, le prix vaut 0 (aucune position possible)
+        prices = np.zeros((len(trading_dates), len(symbols)), dtype=np.float64)
         
-        for symbol, symbol_data in data.items():
-            if current_date not in symbol_data.index:
-                continue
-            
-            # Calculer le momentum sur 20 jours
-            end_idx = symbol_data.index.get_loc(current_date)
-            if end_idx < 20:
-                continue
-            
-            recent_data = symbol_data.iloc[end_idx-19:end_idx+1]
-            current_price = recent_data['Close'].iloc[-1]
-            avg_price = recent_data['Close'].mean()
-            
-            # Signal simple basé sur le momentum
-            if current_price > avg_price * 1.02:  # 2% au-dessus de la moyenne
-                signals.append({
-                    'symbol': symbol,
-                    'side': 'BUY',
-                    'quantity': 100,  # Quantité fixe pour la simulation
-                    'price': current_price,
-                    'reason': 'Momentum positif'
-                })
-            elif current_price < avg_price * 0.98:  # 2% en-dessous de la moyenne
-                signals.append({
-                    'symbol': symbol,
-                    'side': 'SELL',
-                    'quantity': 100,
-                    'price': current_price,
-                    'reason': 'Momentum négatif'
-                })
-        
-        return signals
+        for j, symbol in enumerate(symbols):
+            close = data[symbol]['Close']
+            # Dernière cotation <= date (report du dernier cours), par recherche dichotomique vectorisée
+            positions = np.searchsorted(close.index.to_numpy(), dates, side='right') - 1
+            valid = positions >= 0
+            prices[valid, j] = close.to_numpy(dtype=np.float64)[positions[valid]]
+        
+        return prices
+    
+    def _compute_signal_masks(self, data: Dict[str, pd.DataFrame], symbols: List[str],
+                              trading_dates: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculer en une passe les masques d'achat/vente (T, N) du momentum 20 jours"""
+        ratio = np.full((len(trading_dates), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            close = data[symbol]['Close']
+            # Moyenne sur les 20 dernières cotations du symbole
+            ma20 = close.rolling(20, min_periods=20).mean()
+            symbol_ratio = (close / ma20).to_numpy(dtype=np.float64)
+            
+            # Position de chaque date de trading dans l'index du symbole (-1 si absente),
+            # calculée en un seul appel au lieu d'un get_loc par jour
+            positions = close.index.get_indexer(trading_dates)
+            
+            # Signal uniquement les jours cotés, à partir de la 21e cotation du symbole
+            valid = positions >= 20
+            ratio[valid, j] = symbol_ratio[positions[valid]]
+        
+        with np.errstate(invalid='ignore'):
+            buy_mask = ratio > 1.02   # 2% au-dessus de la moyenne
+            sell_mask = ratio < 0.98  # 2% en-dessous de la moyenne
+        
+        # Pas de signal pendant les 20 premiers jours de la simulation
+        buy_mask[:20] = False
+        sell_mask[:20] = False
+        return buy_mask, sell_mask
     
     def _calculate_metrics(self, result: BacktestResult, config: BacktestConfig, 
                           data: Dict[str, pd.DataFrame]) -> BacktestMetrics:
         """Calculer les métriques de performance"""
         try:
-            if not result.equity_curve:
+            if len(result.equity_arr) == 0:
                 raise Exception("Pas de courbe d'équité")
             
-            # Convertir la courbe d'équité en DataFrame
-            equity_df = pd.DataFrame(result.equity_curve)
-            equity_df['date'] = pd.to_datetime(equity_df['date'])
-            equity_df.set_index('date', inplace=True)
+            # Travailler directement sur le tableau d'équité (float64 pour la précision des calculs)
+            equity = result.equity_arr['equity'].astype(np.float64)
             
-            # Calculer les retours
-            equity_df['returns'] = equity_df['equity'].pct_change().fillna(0)
+            # Calculer les retours (premier retour nul), sans tableau intermédiaire
+            returns = np.zeros(len(equity))
+            np.divide(equity[1:], equity[:-1], out=returns[1:])
+            returns[1:] -= 1
             
             # Métriques de base
-            total_return = (equity_df['equity'].iloc[-1] / config.initial_capital) - 1
+            total_return = float(equity[-1] / config.initial_capital) - 1
             
             # Retour annualisé
-            days = len(equity_df)
+            days = len(equity)
             annual_return = (1 + total_return) ** (252 / days) - 1
             
             # Volatilité annualisée
-            volatility = equity_df['returns'].std() * np.sqrt(252)
+            volatility = float(returns.std(ddof=1)) * np.sqrt(252) if days > 1 else 0.0
             
             # Ratio de Sharpe (en supposant un taux sans risque de 2%)
             risk_free_rate = 0.02
             sharpe_ratio = (annual_return - risk_free_rate) / volatility if volatility > 0 else 0
             
-            # Drawdown maximum
-            equity_df['peak'] = equity_df['equity'].cummax()
-            equity_df['drawdown'] = (equity_df['equity'] - equity_df['peak']) / equity_df['peak']
-            max_drawdown = equity_df['drawdown'].min()
+            # Drawdown maximum: un seul tampon (pic courant puis ratio équité / pic)
+            drawdown = np.maximum.accumulate(equity)
+            np.divide(equity, drawdown, out=drawdown)
+            max_drawdown = float(drawdown.min()) - 1
             
-            # Métriques des trades
-            completed_trades = [t for t in result.trades if t.exit_date is not None]
-            winning_trades = [t for t in completed_trades if t.pnl and t.pnl > 0]
-            losing_trades = [t for t in completed_trades if t.pnl and t.pnl < 0]
+            # Métriques des trades (PnL des trades clôturés, NaN si non renseigné)
+            trades = result.trades_arr[:result.n_trades]
+            pnl = trades['pnl'][~np.isnat(trades['exit_date'])].astype(np.float64)
+            wins = pnl[pnl > 0]
+            losses = pnl[pnl < 0]
             
-            win_rate = len(winning_trades) / len(completed_trades) if completed_trades else 0
+            win_rate = len(wins) / len(pnl) if len(pnl) else 0
             
-            avg_win = np.mean([t.pnl for t in winning_trades]) if winning_trades else 0
-            avg_loss = np.mean([t.pnl for t in losing_trades]) if losing_trades else 0
+            avg_win = float(wins.mean()) if len(wins) else 0
+            avg_loss = float(losses.mean()) if len(losses) else 0
             
-            largest_win = max([t.pnl for t in winning_trades]) if winning_trades else 0
-            largest_loss = min([t.pnl for t in losing_trades]) if losing_trades else 0
+            largest_win = float(wins.max()) if len(wins) else 0
+            largest_loss = float(losses.min()) if len(losses) else 0
             
             # Profit factor
-            total_wins = sum([t.pnl for t in winning_trades]) if winning_trades else 0
-            total_losses = abs(sum([t.pnl for t in losing_trades])) if losing_trades else 0
+            total_wins = float(wins.sum())
+            total_losses = abs(float(losses.sum()))
             profit_factor = total_wins / total_losses if total_losses > 0 else float('inf')
             
             # Benchmark (SPY par défaut)
@@ -395,12 +627,26 @@ class BacktestEngine:
                 benchmark_data = data[config.benchmark]
                 benchmark_start = benchmark_data['Close'].iloc[0]
                 benchmark_end = benchmark_data['Close'].iloc[-1]
-                benchmark_return = (benchmark_end / benchmark_start) - 1
+                benchmark_return = float(benchmark_end / benchmark_start) - 1
+                
+                # Retours du benchmark alignés sur les dates de la courbe d'équité
+                benchmark_close = benchmark_data['Close']
+                if benchmark_close.index.tz is not None:
+                    benchmark_close = benchmark_close.tz_localize(None)
+                benchmark_prices = benchmark_close.reindex(
+                    pd.DatetimeIndex(result.equity_arr['date'])
+                ).ffill().to_numpy(dtype=np.float64)
+                benchmark_returns = np.diff(benchmark_prices) / benchmark_prices[:-1]
                 
-                # Alpha et Beta (calcul simplifié)
-                alpha = total_return - benchmark_return
-                # Beta nécessiterait une régression plus complexe
-                beta = 1.0  # Valeur par défaut
+                # Beta = cov(stratégie, benchmark) / var(benchmark) sur les jours communs
+                valid = np.isfinite(benchmark_returns)
+                if valid.sum() > 1:
+                    cov = np.cov(returns[1:][valid], benchmark_returns[valid], ddof=1)
+                    beta = float(cov[0, 1] / cov[1, 1]) if cov[1, 1] > 0 else 0.0
+                
+                # Alpha de Jensen (annualisé)
+                benchmark_annual = (1 + benchmark_return) ** (252 / days) - 1
+                alpha = annual_return - (risk_free_rate + beta * (benchmark_annual - risk_free_rate))
             
             return BacktestMetrics(
                 total_return=total_return,
@@ -410,9 +656,9 @@ class BacktestEngine:
                 max_drawdown=max_drawdown,
                 win_rate=win_rate,
                 profit_factor=profit_factor,
-                total_trades=len(completed_trades),
-                winning_trades=len(winning_trades),
-                losing_trades=len(losing_trades),
+                total_trades=len(pnl),
+                winning_trades=len(wins),
+                losing_trades=len(losses),
                 avg_win=avg_win,
                 avg_loss=avg_loss,
                 largest_win=largest_win,
@@ -429,12 +675,8 @@ class BacktestEngine:
     
     def get_backtest_status(self, backtest_id: str) -> Optional[Dict[str, Any]]:
         """Obtenir le statut d'un backtest"""
-        result = None
-        
-        if backtest_id in self.active_backtests:
-            result = self.active_backtests[backtest_id]
-        elif backtest_id in self.completed_backtests:
-            result = self.completed_backtests[backtest_id]
+        with self._lock:
+            result = self.active_backtests.get(backtest_id) or self.completed_backtests.get(backtest_id)
         
         if result:
             return {
@@ -445,24 +687,27 @@ class BacktestEngine:
                 'started_at': result.started_at.isoformat() if result.started_at else None,
                 'completed_at': result.completed_at.isoformat() if result.completed_at else None,
                 'error_message': result.error_message,
-                'total_trades': len(result.trades),
-                'equity_points': len(result.equity_curve)
+                'total_trades': result.n_trades,
+                'equity_points': len(result.equity_arr)
             }
         
         return None
     
     def get_backtest_results(self, backtest_id: str) -> Optional[BacktestResult]:
         """Obtenir les résultats complets d'un backtest"""
-        if backtest_id in self.completed_backtests:
-            return self.completed_backtests[backtest_id]
-        return None
+        with self._lock:
+            return self.completed_backtests.get(backtest_id)
     
     def list_backtests(self) -> List[Dict[str, Any]]:
         """Lister tous les backtests"""
         all_backtests = []
         
+        with self._lock:
+            active = tuple(self.active_backtests.values())
+            completed = tuple(self.completed_backtests.values())
+        
         # Backtests actifs
-        for result in self.active_backtests.values():
+        for result in active:
             all_backtests.append({
                 'id': result.id,
                 'name': result.config.name,
@@ -472,7 +717,7 @@ class BacktestEngine:
             })
         
         # Backtests terminés
-        for result in self.completed_backtests.values():
+        for result in completed:
             all_backtests.append({
                 'id': result.id,
                 'name': result.config.name,
@@ -484,91 +729,218 @@ class BacktestEngine:
         
         return sorted(all_backtests, key=lambda x: x['created_at'], reverse=True)
 
+@njit(cache=True)
+def _execute_trade_nb(j, is_buy, quantity, price, positions, cash, commission, slippage):
+    """Noyau d'exécution d'un trade: retourne (exécuté, prix d'exécution, commission)"""
+    # Appliquer le slippage
+    if is_buy:
+        execution_price = price * (1 + slippage)
+    else:
+        execution_price = price * (1 - slippage)
+    
+    trade_value = quantity * execution_price
+    commission_cost = trade_value * commission
+    
+    if is_buy:
+        total_cost = trade_value + commission_cost
+        if cash[0] >= total_cost:
+            cash[0] -= total_cost
+            positions[j] += quantity
+            return True, execution_price, commission_cost
+    elif positions[j] >= quantity:
+        cash[0] += trade_value - commission_cost
+        positions[j] -= quantity
+        return True, execution_price, commission_cost
+    
+    return False, execution_price, commission_cost
+
+@njit(cache=True)
+def _step_nb(date_ns, prices_row, buy_row, sell_row, quantity, positions, cash, commission, slippage,
+             trade_sym, trade_date, trade_side, trade_px, trade_comm, n_trades):
+    """Exécuter les signaux d'une journée et écrire les trades dans les champs du tableau pré-alloué"""
+    n = n_trades[0]
+    for j in range(prices_row.shape[0]):
+        if buy_row[j]:
+            is_buy = True
+        elif sell_row[j]:
+            is_buy = False
+        else:
+            continue
+        
+        executed, execution_price, commission_cost = _execute_trade_nb(
+            j, is_buy, quantity, prices_row[j], positions, cash, commission, slippage
+        )
+        if executed:
+            trade_sym[n] = j
+            trade_date[n] = date_ns
+            trade_side[n] = 1 if is_buy else -1
+            trade_px[n] = execution_price
+            trade_comm[n] = commission_cost
+            n += 1
+    n_trades[0] = n
+
+def _to_shared(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, Tuple[str, Tuple[int, ...], str]]:
+    """Copier un tableau en mémoire partagée et retourner son descripteur (nom, forme, dtype)"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = None
+    try:
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        shared[...] = array
+    except BaseException:
+        # Segment pas encore confié à l'appelant (ENOSPC sur /dev/shm...) : le
+        # libérer ici, après la vue NumPy qui empêcherait close()
+        del shared
+        shm.close()
+        shm.unlink()
+        raise
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+def _release_shared(blocks: List[shared_memory.SharedMemory]):
+    """Libérer les segments de mémoire partagée créés pour une simulation"""
+    for shm in blocks:
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    blocks.clear()
+
+def _run_backtest_shared(symbols: List[str], dates: np.ndarray,
+                         shared: Dict[str, Tuple[str, Tuple[int, ...], str]],
+                         initial_capital: float, commission: float, slippage: float) -> Dict[str, Any]:
+    """Point d'entrée du worker: attacher les matrices partagées (sans copie) puis simuler"""
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, (name, _, _) in shared.items()}
+    try:
+        arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=blocks[key].buf)
+            for key, (_, shape, dtype) in shared.items()
+        }
+        simulation = _run_backtest_pure(
+            symbols, dates, arrays['prices'], arrays['buy_mask'], arrays['sell_mask'],
+            initial_capital, commission, slippage
+        )
+        del arrays
+        return simulation
+    finally:
+        for shm in blocks.values():
+            shm.close()
+
+def _run_backtest_pure(symbols: List[str], dates: np.ndarray, prices: np.ndarray,
+                       buy_mask: np.ndarray, sell_mask: np.ndarray, initial_capital: float,
+                       commission: float, slippage: float) -> Dict[str, Any]:
+    """Simulation jour par jour, exécutée dans un processus du pool (sans état partagé)"""
+    n_days = len(prices)
+    
+    # Initialiser le portefeuille et le journal des trades (au plus un trade par symbole et par jour)
+    portfolio = BacktestPortfolio(symbols, initial_capital, commission, slippage)
+    max_trades = n_days * len(symbols)
+    trades_arr = np.empty(max_trades, dtype=TRADE_DTYPE)
+    n_trades = np.zeros(1, dtype=np.int64)
+    dates_ns = dates.view(np.int64)
+    equity_arr = np.empty(n_days, dtype=EQUITY_DTYPE)
+    
+    log_progress = logger.isEnabledFor(logging.INFO)
+    if log_progress:
+        logger.info(f"📈 Simulation sur {n_days} jours...")
+    quantity = 100  # Quantité fixe pour la simulation
+    
+    # Jours portant au moins un signal: les autres se limitent à la valorisation
+    active_days = (buy_mask | sell_mask).any(axis=1)
+    
+    for i in range(n_days):
+        # Mettre à jour les prix du portefeuille
+        portfolio.update_prices(prices[i])
+        
+        # Exécuter les signaux simulés (ici momentum)
+        # En réalité, on appellerait TradingAgents pour chaque symbole
+        if active_days[i]:
+            portfolio.step(dates_ns[i], buy_mask[i], sell_mask[i], quantity, trades_arr, n_trades)
+        
+        # Enregistrer l'équité
+        equity_arr[i] = (dates[i], portfolio.total_value, portfolio.cash, portfolio.positions_value)
+        
+        # Progression (formatage évité quand le niveau INFO est filtré)
+        if log_progress and i % 50 == 0:
+            progress = (i / n_days) * 100
+            logger.info(f"📊 Progression: {progress:.1f}%")
+    
+    # Compléter les champs déduits du sens du trade (les ventes sont clôturées immédiatement)
+    trades_arr = trades_arr[:n_trades[0]].copy()
+    is_sell = trades_arr['side'] < 0
+    trades_arr['qty'] = quantity
+    trades_arr['exit_date'] = np.where(is_sell, trades_arr['entry_date'], np.datetime64('NaT'))
+    trades_arr['exit_px'] = np.where(is_sell, trades_arr['entry_px'], np.nan)
+    trades_arr['pnl'] = np.nan
+    
+    return {
+        'equity': equity_arr,
+        'trades': trades_arr
+    }
+
 class BacktestPortfolio:
     """Portefeuille de simulation pour backtest"""
     
-    def __init__(self, initial_capital: float, commission: float = 0.001, slippage: float = 0.0005):
+    def __init__(self, symbols: List[str], initial_capital: float, 
+                 commission: float = 0.001, slippage: float = 0.0005):
         self.initial_capital = initial_capital
-        self.cash = initial_capital
         self.commission = commission
         self.slippage = slippage
         
-        self.positions: Dict[str, int] = {}  # symbol -> quantity
-        self.current_prices: Dict[str, float] = {}
+        # Positions, prix et liquidités en tableaux NumPy partagés avec les noyaux compilés
+        self.symbols = list(symbols)
+        self._idx = {symbol: j for j, symbol in enumerate(self.symbols)}
+        self.positions = np.zeros(len(self.symbols), dtype=np.int64)
+        self.prices = np.zeros(len(self.symbols), dtype=np.float64)
+        self._cash = np.array([initial_capital], dtype=np.float64)
         self.total_value = initial_capital
         self.positions_value = 0
     
-    def update_prices(self, date: datetime, prices: Dict[str, float]):
-        """Mettre à jour les prix actuels"""
-        self.current_prices.update(prices)
+    @property
+    def cash(self) -> float:
+        """Liquidités disponibles"""
+        return float(self._cash[0])
+    
+    def update_prices(self, prices_row: np.ndarray):
+        """Mettre à jour les prix actuels (une ligne de la matrice des prix)"""
+        np.copyto(self.prices, prices_row)
         
         # Recalculer la valeur du portefeuille
-        self.positions_value = sum(
-            self.positions.get(symbol, 0) * price
-            for symbol, price in self.current_prices.items()
-        )
+        self.positions_value = float(self.positions @ self.prices)
         
         self.total_value = self.cash + self.positions_value
     
+    def step(self, date_ns: int, buy_row: np.ndarray, sell_row: np.ndarray, quantity: int,
+             trades_arr: np.ndarray, n_trades: np.ndarray):
+        """Exécuter tous les signaux de la journée aux prix courants"""
+        _step_nb(
+            date_ns, self.prices, buy_row, sell_row, quantity,
+            self.positions, self._cash, self.commission, self.slippage,
+            trades_arr['sym_idx'], trades_arr['entry_date'].view(np.int64), trades_arr['side'],
+            trades_arr['entry_px'], trades_arr['commission'], n_trades
+        )
+    
     def execute_trade(self, symbol: str, side: str, quantity: int, price: float, 
                      date: datetime, reason: str = "") -> Optional[Trade]:
-        """Exécuter un trade"""
-        try:
-            # Appliquer le slippage
-            if side == 'BUY':
-                execution_price = price * (1 + self.slippage)
-            else:
-                execution_price = price * (1 - self.slippage)
-            
-            trade_value = quantity * execution_price
-            commission_cost = trade_value * self.commission
-            
-            if side == 'BUY':
-                total_cost = trade_value + commission_cost
-                
-                if self.cash >= total_cost:
-                    self.cash -= total_cost
-                    self.positions[symbol] = self.positions.get(symbol, 0) + quantity
-                    
-                    return Trade(
-                        symbol=symbol,
-                        entry_date=date,
-                        exit_date=None,
-                        entry_price=execution_price,
-                        exit_price=None,
-                        quantity=quantity,
-                        side=side,
-                        commission=commission_cost,
-                        reason=reason
-                    )
-            
-            elif side == 'SELL':
-                current_position = self.positions.get(symbol, 0)
-                
-                if current_position >= quantity:
-                    self.cash += trade_value - commission_cost
-                    self.positions[symbol] = current_position - quantity
-                    
-                    if self.positions[symbol] == 0:
-                        del self.positions[symbol]
-                    
-                    return Trade(
-                        symbol=symbol,
-                        entry_date=date,
-                        exit_date=date,
-                        entry_price=execution_price,
-                        exit_price=execution_price,
-                        quantity=quantity,
-                        side=side,
-                        commission=commission_cost,
-                        reason=reason
-                    )
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ Erreur exécution trade: {e}")
+        """Exécuter un trade (une clé de symbole inconnue lève KeyError)"""
+        executed, execution_price, commission_cost = _execute_trade_nb(
+            self._idx[symbol], side == 'BUY', quantity, price,
+            self.positions, self._cash, self.commission, self.slippage
+        )
+        
+        if not executed:
             return None
+        
+        return Trade(
+            symbol=symbol,
+            entry_date=date,
+            exit_date=date if side == 'SELL' else None,
+            entry_price=execution_price,
+            exit_price=execution_price if side == 'SELL' else None,
+            quantity=quantity,
+            side=side,
+            commission=commission_cost,
+            reason=reason
+        )
 
 # Instance globale
 backtest_engine = BacktestEngine()
@@ -5,10 +5,13 @@ Support pour Alpaca, Interactive Brokers, TD Ameritrade, etc.
 
 import os
 import json
+import time
 import logging
+import itertools
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from abc import ABC, abstractmethod
 
@@ -43,7 +46,7 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"
     REJECTED = "rejected"
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """Position de trading"""
     symbol: str
@@ -53,7 +56,7 @@ class Position:
     unrealized_pnl: float
     side: str  # "long" ou "short"
     
-@dataclass
+@dataclass(slots=True)
 class Order:
     """Ordre de trading"""
     id: str
@@ -72,9 +75,67 @@ class Order:
         if self.created_at is None:
             self.created_at = datetime.now()
 
+class OrderChannelState(Enum):
+    """États d'un ordre suivi sur le canal WebSocket"""
+    IDLE = "idle"
+    SENT = "sent"
+    ACKED = "acked"
+    FILLED = "filled"
+    REJECTED = "rejected"
+    CANCELLED = "cancelled"
+
+@dataclass
+class TrackedOrder:
+    """Ordre en attente d'acquittement sur le canal WebSocket"""
+    order: Order
+    state: OrderChannelState = OrderChannelState.IDLE
+    done: threading.Event = field(default_factory=threading.Event)
+
+# Événements trade_updates Alpaca -> (état du canal, statut de l'ordre)
+_CHANNEL_EVENTS = {
+    "new": (OrderChannelState.ACKED, OrderStatus.PENDING),
+    "accepted": (OrderChannelState.ACKED, OrderStatus.PENDING),
+    "partial_fill": (OrderChannelState.ACKED, OrderStatus.PARTIALLY_FILLED),
+    "fill": (OrderChannelState.FILLED, OrderStatus.FILLED),
+    "rejected": (OrderChannelState.REJECTED, OrderStatus.REJECTED),
+    "canceled": (OrderChannelState.CANCELLED, OrderStatus.CANCELLED),
+    "expired": (OrderChannelState.CANCELLED, OrderStatus.CANCELLED),
+}
+
+_TERMINAL_STATES = {
+    OrderChannelState.FILLED,
+    OrderChannelState.REJECTED,
+    OrderChannelState.CANCELLED,
+}
+
 class BrokerageInterface(ABC):
     """Interface abstraite pour les courtiers"""
     
+    # Durée de validité (secondes) des instantanés de compte et de positions ;
+    # 0 désactive le cache
+    acct_ttl: float = 0.0
+    
+    def __init__(self):
+        # clé → (valeur, instant monotone de la lecture)
+        self._ttl_cache: Dict[str, tuple] = {}
+    
+    def _cached(self, key: str, fetch):
+        """Retourner la valeur en cache si elle a moins de acct_ttl secondes"""
+        if self.acct_ttl <= 0:
+            return fetch()
+        cache = self._ttl_cache
+        value, fetched_at = cache.get(key, (None, 0.0))
+        now = time.monotonic()
+        if fetched_at and now - fetched_at < self.acct_ttl:
+            return value
+        value = fetch()
+        cache[key] = (value, now)
+        return value
+    
+    def _invalidate_cache(self):
+        """Invalider les instantanés (après un ordre, le pouvoir d'achat change)"""
+        self._ttl_cache.clear()
+    
     @abstractmethod
     def connect(self) -> bool:
         """Se connecter au courtier"""
@@ -116,34 +177,214 @@ class BrokerageInterface(ABC):
 class AlpacaBroker(BrokerageInterface):
     """Intégration avec Alpaca Markets"""
     
-    def __init__(self, api_key: str, secret_key: str, paper: bool = True):
+    # Nombre maximal d'ordres suivis simultanément sur le canal WebSocket
+    PENDING_CAPACITY = 4096
+    # Attente maximale (secondes) de l'acquittement final d'un ordre
+    ORDER_WAIT_TIMEOUT = 30.0
+    # Chaque lecture du compte est un appel REST : partager les instantanés récents
+    acct_ttl = 0.5
+    
+    def __init__(self, api_key: str, secret_key: str, paper: bool = True,
+                 use_websocket: bool = False):
+        super().__init__()
         self.api_key = api_key
         self.secret_key = secret_key
         self.paper = paper
         self.base_url = "https://paper-api.alpaca.markets" if paper else "https://api.alpaca.markets"
+        self.stream_url = "wss://paper-api.alpaca.markets/stream" if paper else "wss://api.alpaca.markets/stream"
         self.client = None
+        self._order_seq = itertools.count()
+        # Session partagée par tous les appels REST (connexions TCP/TLS réutilisées),
+        # créée à la connexion pour ne pas importer requests au chargement du module
+        self._session = None
+        
+        # Canal WebSocket des mises à jour d'ordres (REST seul si désactivé ou indisponible)
+        self.use_websocket = use_websocket
+        self._ws = None
+        self._ack_thread: Optional[threading.Thread] = None
+        # Ordres en attente par identifiant, dans l'ordre d'envoi (les ordres
+        # terminés en sortent à l'acquittement final)
+        self._pending_by_id: Dict[str, TrackedOrder] = {}
+        self._pending_lock = threading.Lock()
+    
+    def _create_session(self) -> "requests.Session":
+        """Créer une session HTTP authentifiée avec pool de connexions"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
         
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        session.mount("https://", adapter)
+        session.headers.update(self._auth_headers())
+        return session
+    
+    def _auth_headers(self) -> Dict[str, str]:
+        """En-têtes d'authentification de l'API Alpaca"""
+        return {
+            "APCA-API-KEY-ID": self.api_key,
+            "APCA-API-SECRET-KEY": self.secret_key
+        }
+    
     def connect(self) -> bool:
         """Se connecter à Alpaca"""
         try:
             # Ici, nous utiliserions la bibliothèque alpaca-trade-api
             # Pour l'instant, simulons la connexion
-            logger.info(f"🔗 Connexion à Alpaca ({'Paper' if self.paper else 'Live'})...")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🔗 Connexion à Alpaca (%s)...", 'Paper' if self.paper else 'Live')
             
             # Simulation de connexion réussie
             self.client = {"connected": True, "account": "simulated"}
+            if self._session is None:
+                self._session = self._create_session()
             logger.info("✅ Connexion Alpaca réussie")
+            
+            if self.use_websocket:
+                self._connect_websocket()
             return True
             
         except Exception as e:
-            logger.error(f"❌ Erreur de connexion Alpaca: {e}")
+            logger.error("❌ Erreur de connexion Alpaca: %s", e)
             return False
     
+    def _connect_websocket(self):
+        """Ouvrir le flux trade_updates et démarrer le thread d'acquittement"""
+        try:
+            import websocket
+            
+            ws = websocket.create_connection(self.stream_url, timeout=10)
+            ws.send(json.dumps({
+                "action": "auth",
+                "key": self.api_key,
+                "secret": self.secret_key
+            }))
+            ws.send(json.dumps({
+                "action": "listen",
+                "data": {"streams": ["trade_updates"]}
+            }))
+            ws.settimeout(None)
+            self._ws = ws
+            
+            self._ack_thread = threading.Thread(target=self._ack_loop, daemon=True)
+            self._ack_thread.start()
+            logger.info("✅ Canal WebSocket des ordres Alpaca connecté")
+            
+        except Exception as e:
+            # Repli sur le suivi REST
+            self._ws = None
+            logger.warning("⚠️ Canal WebSocket Alpaca indisponible, repli REST: %s", e)
+    
+    def _track_order(self, order: Order) -> TrackedOrder:
+        """Enregistrer un ordre envoyé parmi les ordres en attente"""
+        tracked = TrackedOrder(order=order, state=OrderChannelState.SENT)
+        with self._pending_lock:
+            if len(self._pending_by_id) >= self.PENDING_CAPACITY:
+                # Le plus ancien ordre n'est plus suivi : son attente bascule sur REST
+                oldest = self._pending_by_id.pop(next(iter(self._pending_by_id)))
+                oldest.done.set()
+            self._pending_by_id[order.id] = tracked
+        return tracked
+    
+    def _release_waiters(self):
+        """Réveiller toutes les attentes : le canal ne livrera plus d'acquittement"""
+        with self._pending_lock:
+            pending = list(self._pending_by_id.values())
+            self._pending_by_id.clear()
+        for tracked in pending:
+            tracked.done.set()
+    
+    def _ack_loop(self):
+        """Consommer les acquittements du flux trade_updates"""
+        ws = self._ws
+        while ws is not None and ws is self._ws:
+            try:
+                message = ws.recv()
+            except Exception as e:
+                logger.warning("⚠️ Canal WebSocket Alpaca interrompu, repli REST: %s", e)
+                if ws is self._ws:
+                    # Canal perdu (disconnect() a déjà réveillé les attentes sinon)
+                    self._ws = None
+                    self._release_waiters()
+                return
+            
+            try:
+                self._dispatch_ack(json.loads(message))
+            except Exception as e:
+                logger.error("❌ Acquittement Alpaca invalide: %s", e)
+    
+    def _dispatch_ack(self, message: Dict[str, Any]):
+        """Appliquer un événement trade_updates à l'ordre suivi correspondant"""
+        if message.get("stream") != "trade_updates":
+            return
+        data = message.get("data", {})
+        transition = _CHANNEL_EVENTS.get(data.get("event"))
+        order_data = data.get("order", {})
+        if transition is None:
+            return
+        
+        with self._pending_lock:
+            tracked = self._pending_by_id.get(order_data.get("client_order_id"))
+            if tracked is None:
+                return
+            state, status = transition
+            tracked.state = state
+            tracked.order.status = status
+            
+            try:
+                if order_data.get("filled_avg_price") is not None:
+                    tracked.order.filled_price = float(order_data["filled_avg_price"])
+                if order_data.get("filled_at"):
+                    tracked.order.filled_at = datetime.fromisoformat(
+                        order_data["filled_at"].replace("Z", "+00:00")
+                    )
+            finally:
+                # Un champ d'exécution invalide ne doit pas bloquer l'attente
+                if state in _TERMINAL_STATES:
+                    del self._pending_by_id[tracked.order.id]
+                    tracked.done.set()
+    
+    def wait_for_order(self, order_id: str, timeout: Optional[float] = None) -> Optional[OrderStatus]:
+        """Attendre l'état final d'un ordre suivi sur le canal WebSocket
+        
+        Retourne None si l'ordre n'est pas terminé au bout de timeout secondes
+        (ORDER_WAIT_TIMEOUT par défaut). Si le canal est fermé ou si l'ordre
+        n'est plus suivi, le statut est demandé à l'API REST.
+        """
+        if timeout is None:
+            timeout = self.ORDER_WAIT_TIMEOUT
+        with self._pending_lock:
+            tracked = self._pending_by_id.get(order_id)
+        if tracked is None:
+            return self.get_order_status(order_id)
+        if not tracked.done.wait(timeout):
+            return None
+        if tracked.state not in _TERMINAL_STATES:
+            return self.get_order_status(order_id)
+        return tracked.order.status
+    
+    def disconnect(self):
+        """Fermer le canal WebSocket des ordres"""
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception as e:
+                logger.warning("⚠️ Erreur à la fermeture du canal WebSocket: %s", e)
+        self._release_waiters()
+    
     def get_account_info(self) -> Dict[str, Any]:
         """Obtenir les informations du compte Alpaca"""
         if not self.client:
             raise Exception("Non connecté à Alpaca")
-        
+        return self._cached('account', self._fetch_account)
+    
+    def _fetch_account(self) -> Dict[str, Any]:
+        """Interroger les informations du compte Alpaca"""
         # Simulation des informations de compte
         return {
             "account_number": "ALPACA123456",
@@ -158,7 +399,10 @@ class AlpacaBroker(BrokerageInterface):
         """Obtenir les positions Alpaca"""
         if not self.client:
             raise Exception("Non connecté à Alpaca")
-        
+        return self._cached('positions', self._fetch_positions)
+    
+    def _fetch_positions(self) -> List[Position]:
+        """Interroger les positions Alpaca"""
         # Simulation de positions
         return [
             Position("SPY", 100, 450.0, 45000.0, 500.0, "long"),
@@ -179,7 +423,7 @@ class AlpacaBroker(BrokerageInterface):
             raise Exception("Non connecté à Alpaca")
         
         # Simulation de placement d'ordre
-        order_id = f"alpaca_{int(datetime.now().timestamp())}"
+        order_id = f"alpaca_{time.time_ns()}_{next(self._order_seq)}"
         
         order = Order(
             id=order_id,
@@ -191,12 +435,19 @@ class AlpacaBroker(BrokerageInterface):
             stop_price=stop_price
         )
         
-        logger.info(f"📋 Ordre placé: {side.value} {quantity} {symbol} ({order_type.value})")
+        if self._ws is not None:
+            # L'exécution est acquittée de façon asynchrone par le thread du canal
+            self._track_order(order)
+        self._invalidate_cache()
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📋 Ordre placé: %s %s %s (%s)", side.value, quantity, symbol, order_type.value)
         return order
     
     def cancel_order(self, order_id: str) -> bool:
         """Annuler un ordre Alpaca"""
-        logger.info(f"❌ Ordre annulé: {order_id}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("❌ Ordre annulé: %s", order_id)
         return True
     
     def get_order_status(self, order_id: str) -> OrderStatus:
@@ -204,15 +455,81 @@ class AlpacaBroker(BrokerageInterface):
         # Simulation - en réalité, on interrogerait l'API
         return OrderStatus.FILLED
 
+# Codes échangés avec le noyau d'exécution compilé
+FILL_BUY = 1
+FILL_SELL = -1
+FILL_OK = 0
+FILL_INSUFFICIENT_FUNDS = 1
+FILL_INSUFFICIENT_POSITION = 2
+
+def _apply_fill(side, qty_in, fill_price, cur_qty, cur_avg, cash):
+    """Appliquer une exécution à une position (noyau numérique compilé)
+    
+    Retourne (nouvelle quantité, nouveau prix moyen, nouveau cash,
+    nouvelle valeur de marché, code de statut).
+    """
+    total_cost = qty_in * fill_price
+    
+    if side == FILL_BUY:
+        if cash < total_cost:
+            return cur_qty, cur_avg, cash, cur_qty * fill_price, FILL_INSUFFICIENT_FUNDS
+        new_qty = cur_qty + qty_in
+        if cur_qty == 0.0:
+            new_avg = fill_price
+        else:
+            new_avg = ((cur_qty * cur_avg) + total_cost) / new_qty
+        return new_qty, new_avg, cash - total_cost, new_qty * fill_price, FILL_OK
+    
+    if cur_qty < qty_in:
+        return cur_qty, cur_avg, cash, cur_qty * fill_price, FILL_INSUFFICIENT_POSITION
+    new_qty = cur_qty - qty_in
+    return new_qty, cur_avg, cash + total_cost, new_qty * fill_price, FILL_OK
+
+_fill_kernel = None
+
+def _get_fill_kernel():
+    """Compiler _apply_fill avec Numba au premier ordre exécuté
+    
+    Numba n'est importé qu'à la première exécution ; sans Numba (ou avec
+    NUMBA_DISABLE_JIT=1 en développement) le noyau s'exécute en Python pur.
+    """
+    global _fill_kernel
+    if _fill_kernel is None:
+        try:
+            from numba import njit
+            _fill_kernel = njit(cache=True)(_apply_fill)
+        except ImportError:
+            _fill_kernel = _apply_fill
+    return _fill_kernel
+
 class PaperTradingBroker(BrokerageInterface):
     """Courtier de trading simulé pour les tests"""
     
+    # Nombre de lignes pré-allouées pour le stockage des positions
+    POSITIONS_CAPACITY = 1024
+    
     def __init__(self, initial_cash: float = 100000.0):
+        super().__init__()
         self.initial_cash = initial_cash
         self.cash = initial_cash
-        self.positions: Dict[str, Position] = {}
         self.orders: Dict[str, Order] = {}
         self.connected = False
+        # Séquence garantissant des identifiants uniques dans une même nanoseconde
+        self._order_seq = itertools.count()
+        
+        # Positions stockées en colonnes NumPy (une ligne par symbole) ;
+        # les objets Position ne sont construits qu'à la demande. NumPy n'est
+        # importé qu'à la création du courtier simulé, pas au chargement du module
+        import numpy as np
+        capacity = self.POSITIONS_CAPACITY
+        self._qty = np.zeros(capacity, dtype=np.float64)
+        self._avg_price = np.zeros(capacity, dtype=np.float64)
+        self._mkt_value = np.zeros(capacity, dtype=np.float64)
+        self._pnl = np.zeros(capacity, dtype=np.float64)
+        self._sym_to_row: Dict[str, int] = {}
+        self._free_rows: List[int] = list(range(capacity - 1, -1, -1))
+        # Valeur de marché cumulée des positions, tenue à jour à chaque exécution
+        self._positions_market_value = 0.0
         
     def connect(self) -> bool:
         """Se connecter au trading simulé"""
@@ -222,7 +539,7 @@ class PaperTradingBroker(BrokerageInterface):
     
     def get_account_info(self) -> Dict[str, Any]:
         """Obtenir les informations du compte simulé"""
-        portfolio_value = self.cash + sum(pos.market_value for pos in self.positions.values())
+        portfolio_value = self.cash + self._positions_market_value
         
         return {
             "account_number": "PAPER_TRADING",
@@ -235,7 +552,54 @@ class PaperTradingBroker(BrokerageInterface):
     
     def get_positions(self) -> List[Position]:
         """Obtenir les positions simulées"""
-        return list(self.positions.values())
+        return [self._position_view(symbol, row) for symbol, row in self._sym_to_row.items()]
+    
+    def _position_view(self, symbol: str, row: int) -> Position:
+        """Construire une Position à partir d'une ligne du stockage"""
+        return Position(
+            symbol=symbol,
+            quantity=float(self._qty[row]),
+            avg_price=float(self._avg_price[row]),
+            market_value=float(self._mkt_value[row]),
+            unrealized_pnl=float(self._pnl[row]),
+            side="long"
+        )
+    
+    def _allocate_row(self, symbol: str) -> int:
+        """Réserver une ligne pour un nouveau symbole"""
+        if not self._free_rows:
+            import numpy as np
+            # Doubler la capacité lorsque toutes les lignes sont occupées
+            capacity = len(self._qty)
+            for name in ('_qty', '_avg_price', '_mkt_value', '_pnl'):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(capacity)]))
+            self._free_rows = list(range(2 * capacity - 1, capacity - 1, -1))
+        row = self._free_rows.pop()
+        self._sym_to_row[symbol] = row
+        return row
+    
+    def _release_row(self, symbol: str):
+        """Libérer la ligne d'une position clôturée"""
+        row = self._sym_to_row.pop(symbol)
+        self._qty[row] = 0.0
+        self._avg_price[row] = 0.0
+        self._mkt_value[row] = 0.0
+        self._pnl[row] = 0.0
+        self._free_rows.append(row)
+    
+    def mark_to_market(self, prices: Dict[str, float]):
+        """Revaloriser les positions aux prix fournis en une seule passe vectorisée"""
+        rows = [self._sym_to_row[symbol] for symbol in prices if symbol in self._sym_to_row]
+        if not rows:
+            return
+        import numpy as np
+        rows = np.asarray(rows, dtype=np.intp)
+        px = np.fromiter((prices[symbol] for symbol in prices if symbol in self._sym_to_row),
+                         dtype=np.float64, count=len(rows))
+        qty = self._qty[rows]
+        self._mkt_value[rows] = qty * px
+        self._pnl[rows] = (px - self._avg_price[rows]) * qty
+        self._positions_market_value = float(self._mkt_value.sum())
     
     def get_buying_power(self) -> float:
         """Obtenir le pouvoir d'achat simulé"""
@@ -246,10 +610,12 @@ class PaperTradingBroker(BrokerageInterface):
                    price: Optional[float] = None,
                    stop_price: Optional[float] = None) -> Order:
         """Placer un ordre simulé"""
-        order_id = f"paper_{int(datetime.now().timestamp())}"
+        order_id = f"paper_{time.time_ns()}_{next(self._order_seq)}"
         
         # Simuler un prix de marché (en réalité, on utiliserait des données réelles)
         market_price = price or self._get_simulated_price(symbol)
+        # Ordre exécuté immédiatement : création et exécution partagent l'horodatage
+        now = datetime.now()
         
         order = Order(
             id=order_id,
@@ -260,7 +626,8 @@ class PaperTradingBroker(BrokerageInterface):
             price=price,
             stop_price=stop_price,
             status=OrderStatus.FILLED,
-            filled_at=datetime.now(),
+            created_at=now,
+            filled_at=now,
             filled_price=market_price
         )
         
@@ -268,7 +635,8 @@ class PaperTradingBroker(BrokerageInterface):
         self._execute_order(order)
         self.orders[order_id] = order
         
-        logger.info(f"📋 Ordre simulé exécuté: {side.value} {quantity} {symbol} @ ${market_price:.2f}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📋 Ordre simulé exécuté: %s %s %s @ $%.2f", side.value, quantity, symbol, market_price)
         return order
     
     def _get_simulated_price(self, symbol: str) -> float:
@@ -285,61 +653,62 @@ class PaperTradingBroker(BrokerageInterface):
     
     def _execute_order(self, order: Order):
         """Exécuter un ordre simulé"""
-        total_cost = order.quantity * order.filled_price
+        row = self._sym_to_row.get(order.symbol)
+        if order.side == OrderSide.SELL and row is None:
+            raise Exception("Aucune position à vendre")
         
-        if order.side == OrderSide.BUY:
-            if self.cash >= total_cost:
-                self.cash -= total_cost
-                
-                # Ajouter ou mettre à jour la position
-                if order.symbol in self.positions:
-                    pos = self.positions[order.symbol]
-                    new_quantity = pos.quantity + order.quantity
-                    new_avg_price = ((pos.quantity * pos.avg_price) + total_cost) / new_quantity
-                    pos.quantity = new_quantity
-                    pos.avg_price = new_avg_price
-                    pos.market_value = new_quantity * order.filled_price
-                else:
-                    self.positions[order.symbol] = Position(
-                        symbol=order.symbol,
-                        quantity=order.quantity,
-                        avg_price=order.filled_price,
-                        market_value=total_cost,
-                        unrealized_pnl=0.0,
-                        side="long"
-                    )
-            else:
-                raise Exception("Fonds insuffisants")
-                
-        elif order.side == OrderSide.SELL:
-            if order.symbol in self.positions:
-                pos = self.positions[order.symbol]
-                if pos.quantity >= order.quantity:
-                    self.cash += total_cost
-                    pos.quantity -= order.quantity
-                    
-                    if pos.quantity == 0:
-                        del self.positions[order.symbol]
-                    else:
-                        pos.market_value = pos.quantity * order.filled_price
-                else:
-                    raise Exception("Position insuffisante")
-            else:
-                raise Exception("Aucune position à vendre")
+        if row is None:
+            cur_qty, cur_avg = 0.0, 0.0
+        else:
+            cur_qty, cur_avg = self._qty[row], self._avg_price[row]
+        side = FILL_BUY if order.side == OrderSide.BUY else FILL_SELL
+        
+        new_qty, new_avg, new_cash, new_mv, status = _get_fill_kernel()(
+            side, float(order.quantity), float(order.filled_price),
+            float(cur_qty), float(cur_avg), float(self.cash)
+        )
+        if status == FILL_INSUFFICIENT_FUNDS:
+            raise Exception("Fonds insuffisants")
+        if status == FILL_INSUFFICIENT_POSITION:
+            raise Exception("Position insuffisante")
+        
+        self.cash = new_cash
+        if new_qty == 0 and row is not None:
+            # Position entièrement clôturée
+            self._positions_market_value -= float(self._mkt_value[row])
+            self._release_row(order.symbol)
+            return
+        
+        if row is None:
+            row = self._allocate_row(order.symbol)
+        self._positions_market_value += new_mv - float(self._mkt_value[row])
+        self._qty[row] = new_qty
+        self._avg_price[row] = new_avg
+        self._mkt_value[row] = new_mv
     
     def cancel_order(self, order_id: str) -> bool:
         """Annuler un ordre simulé"""
-        if order_id in self.orders:
-            self.orders[order_id].status = OrderStatus.CANCELLED
+        order = self.orders.get(order_id)
+        if order is not None:
+            order.status = OrderStatus.CANCELLED
             return True
         return False
     
     def get_order_status(self, order_id: str) -> OrderStatus:
         """Obtenir le statut d'un ordre simulé"""
-        if order_id in self.orders:
-            return self.orders[order_id].status
+        order = self.orders.get(order_id)
+        if order is not None:
+            return order.status
         return OrderStatus.REJECTED
 
+# Table de correspondance décision du signal -> côté de l'ordre
+_SIDE_BY_DECISION = {
+    'BUY': OrderSide.BUY,
+    'SELL': OrderSide.SELL,
+    'buy': OrderSide.BUY,
+    'sell': OrderSide.SELL,
+}
+
 class BrokerageManager:
     """Gestionnaire principal des courtiers"""
     
@@ -354,24 +723,26 @@ class BrokerageManager:
                 self.brokers[name] = broker
                 if self.active_broker is None:
                     self.active_broker = name
-                logger.info(f"✅ Courtier ajouté: {name}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("✅ Courtier ajouté: %s", name)
                 return True
         except Exception as e:
-            logger.error(f"❌ Erreur lors de l'ajout du courtier {name}: {e}")
+            logger.error("❌ Erreur lors de l'ajout du courtier %s: %s", name, e)
         return False
     
     def set_active_broker(self, name: str) -> bool:
         """Définir le courtier actif"""
         if name in self.brokers:
             self.active_broker = name
-            logger.info(f"🎯 Courtier actif: {name}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🎯 Courtier actif: %s", name)
             return True
         return False
     
     def get_active_broker(self) -> Optional[BrokerageInterface]:
         """Obtenir le courtier actif"""
-        if self.active_broker and self.active_broker in self.brokers:
-            return self.brokers[self.active_broker]
+        if self.active_broker:
+            return self.brokers.get(self.active_broker)
         return None
     
     def execute_trade_signal(self, signal: Dict[str, Any]) -> Optional[Order]:
@@ -383,21 +754,23 @@ class BrokerageManager:
         
         try:
             symbol = signal['ticker']
-            decision = signal['decision'].upper()
+            decision = signal['decision']
+            side = _SIDE_BY_DECISION.get(decision)
+            if side is None:
+                # Casse inhabituelle (ex. "Buy") : normaliser seulement dans ce cas
+                side = _SIDE_BY_DECISION.get(decision.upper())
+            
+            if side is None:  # HOLD
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("📊 Signal HOLD pour %s - Aucune action", symbol)
+                return None
             
             # Déterminer la quantité basée sur la gestion des risques
             quantity = self._calculate_position_size(broker, symbol, signal)
-            
-            if decision == 'BUY':
-                return broker.place_order(symbol, quantity, OrderSide.BUY)
-            elif decision == 'SELL':
-                return broker.place_order(symbol, quantity, OrderSide.SELL)
-            else:  # HOLD
-                logger.info(f"📊 Signal HOLD pour {symbol} - Aucune action")
-                return None
+            return broker.place_order(symbol, quantity, side)
                 
         except Exception as e:
-            logger.error(f"❌ Erreur lors de l'exécution du signal: {e}")
+            logger.error("❌ Erreur lors de l'exécution du signal: %s", e)
             return None
     
     def _calculate_position_size(self, broker: BrokerageInterface, symbol: str, signal: Dict[str, Any]) -> float:
@@ -418,6 +791,8 @@ class BrokerageManager:
 # Instance globale
 brokerage_manager = BrokerageManager()
 
-# Ajouter le courtier de trading simulé par défaut
-paper_broker = PaperTradingBroker()
-brokerage_manager.add_broker("paper_trading", paper_broker)
+def init_default_brokers() -> PaperTradingBroker:
+    """Enregistrer le courtier de trading simulé par défaut"""
+    paper_broker = PaperTradingBroker()
+    brokerage_manager.add_broker("paper_trading", paper_broker)
+    return paper_broker
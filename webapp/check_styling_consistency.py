@@ -7,8 +7,95 @@ Vérifie que toutes les pages utilisent le design system moderne
 
 import os
 import re
+import json
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
+# Classes du design system moderne
+MODERN_CLASSES = [
+    'container', 'card', 'btn', 'form-control', 
+    'metric-card', 'chart-container', 'grid'
+]
+
+# Classes Bootstrap obsolètes (exclure les classes de notre design system)
+BOOTSTRAP_CLASSES = ['col-md-', 'col-lg-', 'me-2', 'mb-3', 'form-check', 'd-flex', 'text-muted']
+
+# Motifs compilés une fois : chaque famille de classes est détectée en une
+# seule passe. Les classes modernes sont ancrées sur des limites de mot et
+# le lookahead signale aussi les occurrences imbriquées (ex. "card" dans
+# "metric-card")
+_MODERN_RE = re.compile(
+    rb'(?=\b(' + b'|'.join(re.escape(cls.encode()) for cls in MODERN_CLASSES) + rb')\b)'
+)
+_OBSOLETE_RE = re.compile(
+    b'|'.join(re.escape(cls.encode()) for cls in BOOTSTRAP_CLASSES)
+)
+
+# Cache des résultats d'analyse, indexé par (mtime, taille) de chaque fichier
+# (état local écrit à côté du répertoire templates, ignoré par git)
+CACHE_FILE = Path(".style_check_cache.json")
+
+def _cache_signature():
+    """Signature des motifs de détection utilisés pour produire le cache"""
+    return [_MODERN_RE.pattern.decode(), _OBSOLETE_RE.pattern.decode()]
+
+def _load_cache():
+    """Charger le cache d'analyse (vide s'il est absent, illisible ou obsolète)"""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Invalider le cache si les motifs de détection ont changé
+    if cache.get('patterns') != _cache_signature():
+        return {}
+    return cache
+
+def _save_cache(section, entries):
+    """Enregistrer une section du cache d'analyse"""
+    cache = _load_cache()
+    cache['patterns'] = _cache_signature()
+    cache[section] = entries
+    try:
+        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except OSError as e:
+        print(f"⚠️ Impossible d'écrire le cache {CACHE_FILE}: {e}")
+
+def _file_key(path):
+    """Clé de validité d'un fichier : date de modification et taille"""
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+@contextmanager
+def _map_file(path):
+    """Projeter un fichier en mémoire en lecture seule (octets, sans décodage)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap refuse les fichiers vides
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
+
+def _scan_one(template_file):
+    """Analyser un template (exécuté en parallèle, sans affichage)"""
+    with _map_file(template_file) as content:
+        modern_present = {m.group(1).decode() for m in _MODERN_RE.finditer(content)}
+        obsolete_present = {m.group(0).decode() for m in _OBSOLETE_RE.finditer(content)}
+        modern = content.find(b'extends "base_modern.html"') != -1
+        old = content.find(b'extends "base.html"') != -1
+    
+    return {
+        'name': template_file.name,
+        'modern': modern,
+        'old': old,
+        'found_classes': [cls for cls in MODERN_CLASSES if cls in modern_present],
+        'obsolete': [cls for cls in BOOTSTRAP_CLASSES if cls in obsolete_present]
+    }
+
 def check_template_consistency():
     """Vérifier la cohérence des templates"""
     templates_dir = Path("templates")
@@ -16,8 +103,8 @@ def check_template_consistency():
     print("🎨 Vérification de la cohérence du styling")
     print("=" * 50)
     
-    # Fichiers à vérifier
-    template_files = list(templates_dir.glob("*.html"))
+    # Fichiers à vérifier (les templates de base sont ignorés)
+    template_files = [f for f in templates_dir.glob("*.html") if not f.name.startswith('base')]
     
     results = {
         'modern_templates': [],
@@ -25,56 +112,59 @@ def check_template_consistency():
         'issues': []
     }
     
+    # Réutiliser les résultats des fichiers inchangés depuis la dernière analyse
+    cached = _load_cache().get('templates', {})
+    keys = {f.name: _file_key(f) for f in template_files}
+    rows_by_name = {}
+    to_scan = []
     for template_file in template_files:
-        if template_file.name.startswith('base'):
-            continue  # Ignorer les templates de base
-            
-        print(f"\n📄 Vérification de {template_file.name}")
-        
-        with open(template_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        entry = cached.get(template_file.name)
+        if entry is not None and entry['key'] == keys[template_file.name]:
+            rows_by_name[template_file.name] = entry['row']
+        else:
+            to_scan.append(template_file)
+    
+    # Analyse parallèle des fichiers modifiés ; l'affichage reste séquentiel et ordonné
+    if to_scan:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for row in executor.map(_scan_one, to_scan):
+                rows_by_name[row['name']] = row
+    rows = [rows_by_name[f.name] for f in template_files]
+    
+    # Les entrées des fichiers supprimés disparaissent du cache
+    _save_cache('templates', {
+        row['name']: {'key': keys[row['name']], 'row': row} for row in rows
+    })
+    
+    for row in rows:
+        name = row['name']
+        print(f"\n📄 Vérification de {name}")
         
         # Vérifier quel template de base est utilisé
-        if 'extends "base_modern.html"' in content:
-            results['modern_templates'].append(template_file.name)
+        if row['modern']:
+            results['modern_templates'].append(name)
             print("  ✅ Utilise base_modern.html")
             
             # Vérifier les classes modernes
-            modern_classes = [
-                'container', 'card', 'btn', 'form-control', 
-                'metric-card', 'chart-container', 'grid'
-            ]
-            
-            found_classes = []
-            for cls in modern_classes:
-                if cls in content:
-                    found_classes.append(cls)
-            
-            if found_classes:
-                print(f"  ✅ Classes modernes trouvées: {', '.join(found_classes)}")
+            if row['found_classes']:
+                print(f"  ✅ Classes modernes trouvées: {', '.join(row['found_classes'])}")
             else:
                 print("  ⚠️ Peu de classes modernes détectées")
                 
-        elif 'extends "base.html"' in content:
-            results['old_templates'].append(template_file.name)
+        elif row['old']:
+            results['old_templates'].append(name)
             print("  ❌ Utilise encore base.html (ancien)")
-            results['issues'].append(f"{template_file.name} utilise l'ancien template")
+            results['issues'].append(f"{name} utilise l'ancien template")
             
         else:
             print("  ⚠️ Template de base non détecté")
-            results['issues'].append(f"{template_file.name} sans template de base clair")
-        
-        # Vérifier les classes Bootstrap obsolètes (exclure les classes de notre design system)
-        bootstrap_classes = ['col-md-', 'col-lg-', 'me-2', 'mb-3', 'form-check', 'd-flex', 'text-muted']
-        obsolete_found = []
-
-        for cls in bootstrap_classes:
-            if cls in content:
-                obsolete_found.append(cls)
+            results['issues'].append(f"{name} sans template de base clair")
         
-        if obsolete_found:
-            print(f"  ⚠️ Classes Bootstrap obsolètes: {', '.join(obsolete_found)}")
-            results['issues'].append(f"{template_file.name} contient des classes Bootstrap obsolètes")
+        # Vérifier les classes Bootstrap obsolètes
+        if row['obsolete']:
+            print(f"  ⚠️ Classes Bootstrap obsolètes: {', '.join(row['obsolete'])}")
+            results['issues'].append(f"{name} contient des classes Bootstrap obsolètes")
     
     # Résumé
     print("\n" + "=" * 50)
@@ -146,24 +236,31 @@ def check_css_consistency():
     
     modern_design_file = css_dir / 'modern-design.css'
     if modern_design_file.exists():
-        with open(modern_design_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         # Variables importantes à vérifier
         important_vars = [
-            '--primary-color',
-            '--bg-card',
-            '--text-primary',
-            '--space-4',
-            '--radius-lg',
-            '--transition-normal'
+            b'--primary-color',
+            b'--bg-card',
+            b'--text-primary',
+            b'--space-4',
+            b'--radius-lg',
+            b'--transition-normal'
         ]
         
-        for var in important_vars:
-            if var in content:
-                print(f"  ✅ {var}")
+        key = _file_key(modern_design_file)
+        names = [var.decode() for var in important_vars]
+        cached = _load_cache().get('css')
+        if cached is not None and cached['key'] == key and cached['names'] == names:
+            vars_present = cached['vars']
+        else:
+            with _map_file(modern_design_file) as content:
+                vars_present = [content.find(var) != -1 for var in important_vars]
+            _save_cache('css', {'key': key, 'names': names, 'vars': vars_present})
+        
+        for var, present in zip(important_vars, vars_present):
+            if present:
+                print(f"  ✅ {var.decode()}")
             else:
-                print(f"  ❌ {var} - MANQUANT")
+                print(f"  ❌ {var.decode()} - MANQUANT")
     
     return True
 
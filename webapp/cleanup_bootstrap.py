@@ -7,8 +7,85 @@ Remplace automatiquement toutes les classes Bootstrap par les classes modernes
 
 import os
 import re
+import io
+import json
+import mmap
+from collections import Counter, deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 
+# RE2 (google-re2) garantit un temps linéaire sur l'alternative de nettoyage ;
+# repli sur le moteur standard s'il n'est pas installé
+try:
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# Attributs class="..." (précédés de <div pour les grilles) : seul leur contenu
+# est réécrit, le reste du document — texte, scripts, <pre> — n'est jamais
+# parcouru par les règles. data-class, :class, ng-class... sont exclus ; RE2
+# n'ayant pas d'assertion arrière, le caractère précédent est capturé puis
+# réinséré. Les templates sont traités en octets (motifs ASCII, aucun
+# décodage UTF-8)
+_DIV_PREFIX = b'<div '
+_CLASS_SPAN_RE = _re.compile(rb'(<div |^|[^\w:-])class="([^"]*)"')
+
+def _trie_pattern(words):
+    """Construire une alternative regex factorisée par préfixes (trie)
+    
+    Chaque octet n'est testé qu'une fois par position, quel que soit le nombre
+    de classes partageant le préfixe (mb-1 … mb-4, form-check-*) ; les
+    continuations plus longues sont essayées en premier, comme une alternative
+    triée par longueur décroissante.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for byte in word:
+            node = node.setdefault(byte, {})
+        node[None] = True  # Fin de mot
+    
+    def build(node):
+        branches = [re.escape(bytes([byte])) + build(child)
+                    for byte, child in sorted((k, v) for k, v in node.items() if k is not None)]
+        if not branches:
+            return b''
+        alternation = b'|'.join(branches)
+        if None in node:
+            return b'(?:%s)?' % alternation
+        return alternation if len(branches) == 1 else b'(?:%s)' % alternation
+    
+    return build(trie)
+
+# Tailles Bootstrap → système moderne (espacement et fractions de colonnes)
+_SPACING_SIZE_MAP = {0: b'0', 1: b'1', 2: b'2', 3: b'3', 4: b'4', 5: b'6'}
+_COL_SIZE_MAP = {6: b'w-1/2', 4: b'w-1/3', 3: b'w-1/4', 8: b'w-2/3'}
+
+# Date de modification des templates déjà traités (état local écrit à côté du
+# répertoire templates, ignoré par git)
+CACHE_FILE = Path(".bootstrap_clean_cache.json")
+
+# Nettoyeur propre à chaque processus de travail (tables regex construites une fois)
+_worker_cleaner = None
+
+def _init_worker(cleaner):
+    """Installer le nettoyeur dans le processus de travail"""
+    global _worker_cleaner
+    _worker_cleaner = cleaner
+
+def _clean_one(file_path):
+    """Nettoyer un template dans un processus de travail
+    
+    Retourne (fichier modifié, sortie console) : l'affichage est fait par le
+    processus principal pour garder l'ordre des fichiers.
+    """
+    output = io.StringIO()
+    with redirect_stdout(output):
+        changed = _worker_cleaner.clean_file(file_path)
+    return changed, output.getvalue()
+
 class BootstrapCleaner:
     """Nettoyeur de classes Bootstrap obsolètes"""
     
@@ -71,115 +148,180 @@ class BootstrapCleaner:
             'align-items-center': 'items-center',
             'flex-wrap': 'flex-wrap',
         }
+        # Même table en octets pour le nettoyage sans décodage
+        self._byte_replacements = {
+            old_class.encode(): new_class.encode()
+            for old_class, new_class in self.class_replacements.items()
+        }
         
-        # Patterns regex pour remplacements complexes
-        self.regex_patterns = [
-            # Remplacer les grilles row/col
-            (r'<div class="row">', '<div class="grid gap-6">'),
-            (r'<div class="row ([^"]*)">', r'<div class="grid gap-6 \1">'),
-            
-            # Remplacer les colonnes avec breakpoints
-            (r'col-(\w+)-(\d+)', self._replace_col_class),
-            
-            # Remplacer les classes d'espacement avec directions
-            (r'\b([mp])([btlrxy]?)-(\d+)\b', self._replace_spacing_class),
-            
-            # Remplacer les classes de largeur Bootstrap
-            (r'\bw-(\d+)\b', r'w-\1'),
-            (r'\bh-(\d+)\b', r'h-\1'),
-        ]
+        # Alternative unique couvrant les remplacements directs, les colonnes et
+        # l'espacement : chaque classe est réécrite au plus une fois, en une
+        # seule passe. Les clés directes passent en premier, factorisées en trie
+        # (form-check-input avant form-check) ; l'espace qui suit une classe
+        # supprimée est capturé pour être retiré avec elle
+        self._combined_re = _re.compile(
+            rb'\b(?P<direct>' + _trie_pattern(self._byte_replacements) + rb')\b(?P<ws>\s*)'
+            rb'|col-(?P<col_bp>\w+)-(?P<col_size>\d+)'
+            rb'|\b(?P<sp_prop>[mp])(?P<sp_dir>[btlrxy]?)-(?P<sp_size>\d+)\b'
+        )
+        self._replacement_counts = Counter()
+        
+        # Sonde réunissant toutes les règles : un fichier sans aucune
+        # correspondance n'est ni lu en entier ni réécrit (moteur standard,
+        # seul à accepter un mmap)
+        self._probe_re = re.compile(
+            b'(?:%s)|<div class="row[ "]' % self._combined_re.pattern
+        )
+    
+    def _sub(self, match):
+        """Remplacer une classe trouvée par l'alternative combinée"""
+        old_class = match.group('direct')
+        if old_class is None:
+            # Colonne ou espacement : règle générique
+            if match.group('col_bp') is not None:
+                new_class = self._replace_col_class(match)
+            else:
+                new_class = self._replace_spacing_class(match)
+            if new_class != match.group(0):
+                self._replacement_counts[match.group(0)] += 1
+            return new_class
+        
+        self._replacement_counts[old_class] += 1
+        new_class = self._byte_replacements[old_class]
+        if not new_class:  # Supprimer la classe et l'espace qui la suit
+            return b''
+        return new_class + match.group('ws')
     
-    def _replace_col_class(self, match):
+    def _transform_classes(self, classes, is_div):
+        """Réécrire le contenu d'un attribut class, classe par classe
+        
+        Les classes connues sont résolues par la table directe ; seules les
+        autres classes contenant un tiret passent par l'alternative combinée
+        (colonnes, espacement, classes préfixées comme lg:mb-4).
+        """
+        tokens = classes.split()
+        out = []
+        for token in tokens:
+            new_class = self._byte_replacements.get(token)
+            if new_class is not None:
+                self._replacement_counts[token] += 1
+            elif b'-' in token:
+                new_class = self._combined_re.sub(self._sub, token)
+            else:
+                new_class = token
+            if new_class:  # Les classes supprimées disparaissent
+                out.append(new_class)
+        
+        # Grille Bootstrap : <div class="row ..."> devient une grille moderne
+        if is_div and tokens and tokens[0] == b'row':
+            self._replacement_counts[b'row'] += 1
+            out[0] = b'grid gap-6'
+        return b' '.join(out)
+    
+    def _sub_class_span(self, match):
+        """Réécrire un attribut class ; un attribut vide est supprimé"""
+        prefix = match.group(1)
+        classes = self._transform_classes(match.group(2), prefix == _DIV_PREFIX)
+        if not classes:
+            return prefix
+        return b'%sclass="%s"' % (prefix, classes)
+    
+    @staticmethod
+    def _replace_col_class(match):
         """Remplacer les classes de colonnes Bootstrap"""
-        breakpoint = match.group(1)
-        size = int(match.group(2))
+        breakpoint = match.group('col_bp')
+        size = int(match.group('col_size'))
         
-        if size == 12:
-            return 'w-full'
-        elif size == 6:
-            return f'{breakpoint}:w-1/2' if breakpoint != 'col' else 'w-1/2'
-        elif size == 4:
-            return f'{breakpoint}:w-1/3' if breakpoint != 'col' else 'w-1/3'
-        elif size == 3:
-            return f'{breakpoint}:w-1/4' if breakpoint != 'col' else 'w-1/4'
-        elif size == 8:
-            return f'{breakpoint}:w-2/3' if breakpoint != 'col' else 'w-2/3'
-        else:
-            return f'{breakpoint}:w-{size}/12' if breakpoint != 'col' else f'w-{size}/12'
+        if size == 12:  # Pleine largeur quel que soit le breakpoint
+            return b'w-full'
+        width = _COL_SIZE_MAP.get(size) or b'w-%d/12' % size
+        return width if breakpoint == b'col' else b'%s:%s' % (breakpoint, width)
     
-    def _replace_spacing_class(self, match):
+    @staticmethod
+    def _replace_spacing_class(match):
         """Remplacer les classes d'espacement Bootstrap"""
-        property_type = match.group(1)  # m ou p
-        direction = match.group(2) if match.group(2) else ''
-        size = int(match.group(3))
+        property_type = match.group('sp_prop')  # m ou p
+        direction = match.group('sp_dir')  # Direction inchangée (t, b, l, r, x, y ou vide)
+        size = int(match.group('sp_size'))
         
         # Convertir la taille Bootstrap vers notre système
-        size_map = {0: '0', 1: '1', 2: '2', 3: '3', 4: '4', 5: '6'}
-        new_size = size_map.get(size, str(size))
-        
-        # Convertir la direction
-        direction_map = {
-            't': 't', 'b': 'b', 'l': 'l', 'r': 'r', 
-            'x': 'x', 'y': 'y', '': ''
-        }
-        new_direction = direction_map.get(direction, direction)
+        new_size = _SPACING_SIZE_MAP.get(size) or b'%d' % size
         
-        return f"{property_type}{new_direction}-{new_size}"
+        return b"%s%s-%s" % (property_type, direction, new_size)
     
     def clean_file(self, file_path):
         """Nettoyer un fichier des classes Bootstrap"""
         print(f"🧹 Nettoyage de {file_path.name}")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if not self._needs_cleaning(file_path):
+            print("  ℹ️ Aucun changement nécessaire")
+            return False
         
+        # Lecture en octets : les motifs sont ASCII, un éventuel BOM ou texte
+        # UTF-8 hors classes est recopié tel quel
+        with open(file_path, 'rb') as f:
+            content = f.read()
         original_content = content
-        changes_made = []
-        
-        # Appliquer les remplacements directs
-        for old_class, new_class in self.class_replacements.items():
-            if old_class in content:
-                if new_class:  # Si la nouvelle classe n'est pas vide
-                    content = content.replace(old_class, new_class)
-                    changes_made.append(f"{old_class} → {new_class}")
-                else:  # Supprimer la classe
-                    content = re.sub(rf'\b{re.escape(old_class)}\b\s*', '', content)
-                    changes_made.append(f"{old_class} → (supprimé)")
+        # Seuls les 5 premiers changements sont affichés : les autres sont
+        # comptés sans être formatés
+        displayed = deque(maxlen=5)
         
-        # Appliquer les patterns regex
-        for pattern, replacement in self.regex_patterns:
-            if callable(replacement):
-                new_content = re.sub(pattern, replacement, content)
-                if new_content != content:
-                    changes_made.append(f"Pattern {pattern} appliqué")
-                    content = new_content
+        # Réécrire les attributs class en une seule passe : remplacements,
+        # grilles, classes vides et espaces multiples
+        self._replacement_counts.clear()
+        content = _CLASS_SPAN_RE.sub(self._sub_class_span, content)
+        change_count = len(self._replacement_counts)
+        for old_class in islice(self._replacement_counts, 5):
+            new_class = self._byte_replacements.get(old_class)
+            if new_class is None:
+                displayed.append(f"{old_class.decode()} → (règle générique)")
             else:
-                matches = re.findall(pattern, content)
-                if matches:
-                    content = re.sub(pattern, replacement, content)
-                    changes_made.append(f"Pattern {pattern} → {replacement}")
-        
-        # Nettoyer les classes vides et espaces multiples
-        content = re.sub(r'class="\s*"', '', content)  # Supprimer class vides
-        content = re.sub(r'class="([^"]*?)\s+([^"]*?)"', r'class="\1 \2"', content)  # Nettoyer espaces
-        content = re.sub(r'\s+', ' ', content)  # Espaces multiples
+                displayed.append(f"{old_class.decode()} → {new_class.decode() or '(supprimé)'}")
         
         # Sauvegarder si des changements ont été faits
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open(file_path, 'wb') as f:
                 f.write(content)
             
-            print(f"  ✅ {len(changes_made)} changements appliqués:")
-            for change in changes_made[:5]:  # Afficher les 5 premiers
+            print(f"  ✅ {change_count} changements appliqués:")
+            for change in displayed:  # Afficher les 5 premiers
                 print(f"    • {change}")
-            if len(changes_made) > 5:
-                print(f"    • ... et {len(changes_made) - 5} autres")
+            if change_count > 5:
+                print(f"    • ... et {change_count - 5} autres")
             
             return True
         else:
             print("  ℹ️ Aucun changement nécessaire")
             return False
     
+    def _needs_cleaning(self, file_path):
+        """Sonder le fichier projeté en mémoire sans le décoder"""
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return self._probe_re.search(content) is not None
+    
+    def _load_cache(self):
+        """Charger les dates de modification des templates déjà traités"""
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Invalider le cache si les règles de nettoyage ont changé
+        if cache.get('rules') != self._probe_re.pattern.decode():
+            return {}
+        return cache.get('files', {})
+    
+    def _save_cache(self, files):
+        """Enregistrer les dates de modification des templates traités"""
+        try:
+            with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'rules': self._probe_re.pattern.decode(), 'files': files}, f)
+        except OSError as e:
+            print(f"⚠️ Impossible d'écrire le cache {CACHE_FILE}: {e}")
+    
     def clean_all_templates(self):
         """Nettoyer tous les templates"""
         templates_dir = Path("templates")
@@ -188,22 +330,49 @@ class BootstrapCleaner:
             print("❌ Répertoire templates non trouvé")
             return False
         
-        template_files = list(templates_dir.glob("*.html"))
+        # Parcours direct du répertoire : les templates de base et les fichiers
+        # déjà nettoyés sont écartés au niveau des entrées, sans objet Path
+        cache = self._load_cache()
+        processed = {}
+        to_clean = []
+        total_count = 0
+        with os.scandir(templates_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith('.html') or name.startswith('.') or not entry.is_file():
+                    continue
+                total_count += 1
+                if name.startswith('base'):
+                    continue  # Ignorer les templates de base
+                
+                # Fichier inchangé depuis le dernier nettoyage : ne pas l'ouvrir
+                mtime = entry.stat().st_mtime_ns
+                if cache.get(name) == mtime:
+                    processed[name] = mtime
+                else:
+                    to_clean.append(Path(entry.path))
         
-        print(f"🧹 Nettoyage de {len(template_files)} fichiers template")
+        print(f"🧹 Nettoyage de {total_count} fichiers template")
         print("=" * 50)
         
         cleaned_count = 0
         
-        for template_file in template_files:
-            if template_file.name.startswith('base'):
-                continue  # Ignorer les templates de base
-            
-            if self.clean_file(template_file):
-                cleaned_count += 1
+        # Chaque template est un travail regex indépendant : un processus par cœur
+        if to_clean:
+            with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                     initializer=_init_worker, initargs=(self,)) as executor:
+                results = executor.map(_clean_one, to_clean, chunksize=4)
+                for template_file, (changed, output) in zip(to_clean, results):
+                    print(output, end='')
+                    if changed:
+                        cleaned_count += 1
+                    processed[template_file.name] = template_file.stat().st_mtime_ns
+        
+        # Les fichiers supprimés disparaissent du cache
+        self._save_cache(processed)
         
         print("\n" + "=" * 50)
-        print(f"📊 Nettoyage terminé: {cleaned_count}/{len(template_files)} fichiers modifiés")
+        print(f"📊 Nettoyage terminé: {cleaned_count}/{total_count} fichiers modifiés")
         
         if cleaned_count > 0:
             print("✅ Classes Bootstrap obsolètes supprimées")
@@ -3,12 +3,101 @@ Gestionnaire de configuration pour TradingAgents Web Interface
 Gère la persistance et la validation des configurations
 """
 
-import json
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Mapping, Tuple
 from datetime import datetime
-import copy
+
+import msgspec
+
+def _dumps(obj: Any) -> bytes:
+    """Sérialiser en JSON UTF-8 indenté (encodeur C de msgspec)"""
+    return msgspec.json.format(msgspec.json.encode(obj), indent=2)
+
+_loads = msgspec.json.decode
+
+# Modèles disponibles par fournisseur (données statiques, en lecture seule)
+_MODELS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "openai": (
+        "gpt-4o-mini",
+        "gpt-4o",
+        "o1-preview",
+        "o1-mini",
+        "gpt-4-turbo",
+        "gpt-3.5-turbo"
+    ),
+    "anthropic": (
+        "claude-3-haiku-20240307",
+        "claude-3-sonnet-20240229",
+        "claude-3-opus-20240229",
+        "claude-3-5-sonnet-20241022"
+    ),
+    "google": (
+        "gemini-1.5-flash",
+        "gemini-1.5-pro",
+        "gemini-2.0-flash"
+    ),
+    "groq": (
+        "llama-3.1-8b-instant",
+        "mixtral-8x7b-32768",
+        "gemma2-9b-it",
+        "llama3-8b-8192",
+        "llama3-70b-8192"
+    )
+})
+
+def _copy_tree(obj):
+    """Copier un arbre JSON (dictionnaires et listes imbriqués)"""
+    if isinstance(obj, dict):
+        return {k: _copy_tree(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_tree(v) for v in obj]
+    return obj
+
+# Listes blanches (recherche en O(1))
+_VALID_ANALYSTS = frozenset(("market", "social", "news", "fundamentals"))
+_VALID_PROVIDERS = frozenset(("openai", "anthropic", "google", "groq"))
+
+# Validateurs par clé : chacun retourne la valeur normalisée, ou None si elle est rejetée
+def _v_enum(allowed):
+    # Seules des chaînes sont hachées : une liste ou un dict est simplement rejeté
+    return lambda v: v if isinstance(v, str) and v in allowed else None
+
+def _v_int_range(lo, hi):
+    return lambda v: v if isinstance(v, int) and lo <= v <= hi else None
+
+def _v_float_range(lo, hi):
+    return lambda v: float(v) if isinstance(v, (int, float)) and lo <= v <= hi else None
+
+def _v_bool(v):
+    return v if isinstance(v, bool) else None
+
+def _v_analysts(v):
+    if isinstance(v, list):
+        return [a for a in v if isinstance(a, str) and a in _VALID_ANALYSTS]
+    if isinstance(v, (set, frozenset)):
+        # Intersection calculée en C ; l'ordre d'un ensemble n'a pas de sens
+        return list(frozenset(v) & _VALID_ANALYSTS)
+    return None
+
+_VALIDATORS = {
+    "llm_provider": _v_enum(_VALID_PROVIDERS),
+    "selected_analysts": _v_analysts,
+    "max_debate_rounds": _v_int_range(1, 5),
+    "max_risk_discuss_rounds": _v_int_range(1, 5),
+    "temperature": _v_float_range(0, 2),
+    "max_tokens": _v_int_range(100, 8000),
+    "timeout": _v_int_range(10, 300),
+    "online_tools": _v_bool,
+    "quick_think_llm": str,
+    "deep_think_llm": str,
+    "backend_url": str,
+    "results_dir": str,
+    "log_level": str,
+    "project_dir": str,
+    "debug": _v_bool,
+}
 
 class ConfigManager:
     """Gestionnaire de configuration pour l'application web TradingAgents"""
@@ -87,8 +176,57 @@ class ConfigManager:
             }
         }
         
+        # Fichiers JSON déjà analysés : chemin -> ((mtime_ns, taille), contenu)
+        self._cache: Dict[str, Any] = {}
+        
+        # Mises à jour différées, écrites en une fois par flush()
+        self._pending_updates: Optional[Dict[str, Any]] = None
+        
+        # Copie de référence des préréglages : le décodage JSON reconstruit l'arbre plus vite que deepcopy
+        self._default_presets_json = msgspec.json.encode(self.default_presets)
+        
         self.initialize_configs()
     
+    def _fast_copy_default(self) -> Dict[str, Any]:
+        """Copier la configuration par défaut (scalaires + une seule liste)"""
+        config = dict(self.default_config)
+        config["selected_analysts"] = list(self.default_config["selected_analysts"])
+        return config
+    
+    def _read_json(self, path: Path) -> Any:
+        """Lire un fichier JSON, en réutilisant le contenu analysé s'il n'a pas changé
+        
+        Retourne une copie : l'appelant peut la modifier sans altérer le cache.
+        """
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(str(path))
+        if cached is not None and cached[0] == key:
+            return _copy_tree(cached[1])
+        
+        with open(path, 'rb') as f:
+            data = _loads(f.read())
+        self._cache[str(path)] = (key, data)
+        return _copy_tree(data)
+    
+    def _atomic_write(self, path: Path, data: bytes, fsync: bool = False):
+        """Écrire un fichier de façon atomique (fichier temporaire puis os.replace)
+        
+        Un lecteur concurrent voit l'ancien ou le nouveau contenu, jamais un
+        fichier tronqué.
+        """
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    
+    def _invalidate(self, path: Path):
+        """Oublier le contenu en cache d'un fichier réécrit"""
+        self._cache.pop(str(path), None)
+    
     def initialize_configs(self):
         """Initialiser les fichiers de configuration s'ils n'existent pas"""
         if not self.default_config_file.exists():
@@ -102,21 +240,23 @@ class ConfigManager:
         if config_file is None:
             config_file = self.user_config_file
         
-        if not config_file.exists():
-            return copy.deepcopy(self.default_config)
-        
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = self._read_json(config_file)
+            
+            # Anciennes sauvegardes : réglages enveloppés avec des métadonnées
+            if "metadata" in config and isinstance(config.get("config"), dict):
+                config = config["config"]
             
             # Fusionner avec la configuration par défaut pour s'assurer que toutes les clés existent
-            merged_config = copy.deepcopy(self.default_config)
+            merged_config = self._fast_copy_default()
             merged_config.update(config)
             
             return merged_config
+        except FileNotFoundError:
+            return self._fast_copy_default()
         except Exception as e:
             print(f"Erreur lors du chargement de la configuration: {e}")
-            return copy.deepcopy(self.default_config)
+            return self._fast_copy_default()
     
     def save_config(self, config: Dict[str, Any], config_file: Optional[Path] = None):
         """Sauvegarder une configuration dans un fichier"""
@@ -127,17 +267,9 @@ class ConfigManager:
             # Valider la configuration avant de la sauvegarder
             validated_config = self.validate_config(config)
             
-            # Ajouter des métadonnées
-            config_with_metadata = {
-                "config": validated_config,
-                "metadata": {
-                    "created_at": datetime.now().isoformat(),
-                    "version": "1.0"
-                }
-            }
-            
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_with_metadata, f, indent=2, ensure_ascii=False)
+            # Réglages écrits à plat : relus directement par load_config
+            self._invalidate(config_file)
+            self._atomic_write(config_file, _dumps(validated_config))
             
             return True
         except Exception as e:
@@ -146,50 +278,33 @@ class ConfigManager:
     
     def validate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Valider et nettoyer une configuration"""
-        validated_config = copy.deepcopy(self.default_config)
+        validated_config = self._fast_copy_default()
         
-        # Valider les types et valeurs
+        # Valider les types et valeurs (une recherche de validateur par clé)
         for key, value in config.items():
-            if key in validated_config:
-                if key == "llm_provider" and value in ["openai", "anthropic", "google", "groq"]:
-                    validated_config[key] = value
-                elif key == "selected_analysts" and isinstance(value, list):
-                    valid_analysts = ["market", "social", "news", "fundamentals"]
-                    validated_config[key] = [a for a in value if a in valid_analysts]
-                elif key in ["max_debate_rounds", "max_risk_discuss_rounds"] and isinstance(value, int) and 1 <= value <= 5:
-                    validated_config[key] = value
-                elif key == "temperature" and isinstance(value, (int, float)) and 0 <= value <= 2:
-                    validated_config[key] = float(value)
-                elif key == "max_tokens" and isinstance(value, int) and 100 <= value <= 8000:
-                    validated_config[key] = value
-                elif key == "timeout" and isinstance(value, int) and 10 <= value <= 300:
-                    validated_config[key] = value
-                elif key == "online_tools" and isinstance(value, bool):
-                    validated_config[key] = value
-                elif key in ["quick_think_llm", "deep_think_llm", "backend_url", "results_dir", "log_level", "project_dir"]:
-                    validated_config[key] = str(value)
-                elif key == "debug" and isinstance(value, bool):
-                    validated_config[key] = value
+            validator = _VALIDATORS.get(key)
+            if validator is not None:
+                validated_value = validator(value)
+                if validated_value is not None:
+                    validated_config[key] = validated_value
         
         return validated_config
     
     def load_presets(self) -> Dict[str, Any]:
         """Charger les préréglages"""
-        if not self.presets_file.exists():
-            return copy.deepcopy(self.default_presets)
-        
         try:
-            with open(self.presets_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read_json(self.presets_file)
+        except FileNotFoundError:
+            return _loads(self._default_presets_json)
         except Exception as e:
             print(f"Erreur lors du chargement des préréglages: {e}")
-            return copy.deepcopy(self.default_presets)
+            return _loads(self._default_presets_json)
     
     def save_presets(self, presets: Dict[str, Any]):
         """Sauvegarder les préréglages"""
         try:
-            with open(self.presets_file, 'w', encoding='utf-8') as f:
-                json.dump(presets, f, indent=2, ensure_ascii=False)
+            self._invalidate(self.presets_file)
+            self._atomic_write(self.presets_file, _dumps(presets))
             return True
         except Exception as e:
             print(f"Erreur lors de la sauvegarde des préréglages: {e}")
@@ -235,8 +350,7 @@ class ConfigManager:
                 "version": "1.0"
             }
             
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            self._atomic_write(export_path, _dumps(export_data))
             
             return True
         except Exception as e:
@@ -251,8 +365,8 @@ class ConfigManager:
             if not import_path.exists():
                 return None
             
-            with open(import_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(import_path, 'rb') as f:
+                data = _loads(f.read())
             
             # Extraire la configuration
             if "tradingagents_config" in data:
@@ -267,45 +381,35 @@ class ConfigManager:
     
     def get_available_models(self, provider: str) -> List[str]:
         """Récupérer la liste des modèles disponibles pour un fournisseur"""
-        models = {
-            "openai": [
-                "gpt-4o-mini",
-                "gpt-4o",
-                "o1-preview",
-                "o1-mini",
-                "gpt-4-turbo",
-                "gpt-3.5-turbo"
-            ],
-            "anthropic": [
-                "claude-3-haiku-20240307",
-                "claude-3-sonnet-20240229",
-                "claude-3-opus-20240229",
-                "claude-3-5-sonnet-20241022"
-            ],
-            "google": [
-                "gemini-1.5-flash",
-                "gemini-1.5-pro",
-                "gemini-2.0-flash"
-            ],
-            "groq": [
-                "llama-3.1-8b-instant",
-                "mixtral-8x7b-32768",
-                "gemma2-9b-it",
-                "llama3-8b-8192",
-                "llama3-70b-8192"
-            ]
-        }
-        
-        return models.get(provider, [])
+        return list(_MODELS.get(provider, ()))
     
     def get_current_config(self) -> Dict[str, Any]:
-        """Récupérer la configuration actuelle"""
-        return self.load_config()
+        """Récupérer la configuration actuelle (mises à jour différées incluses)"""
+        current_config = self.load_config()
+        if self._pending_updates:
+            current_config.update(self._pending_updates)
+        return current_config
     
-    def update_config(self, updates: Dict[str, Any]) -> bool:
-        """Mettre à jour la configuration actuelle"""
+    def update_config(self, updates: Dict[str, Any], defer: bool = False) -> bool:
+        """Mettre à jour la configuration actuelle
+        
+        Avec defer=True, les mises à jour sont accumulées en mémoire et écrites
+        en une seule fois par flush() (ou par le prochain appel non différé).
+        """
+        if self._pending_updates is None:
+            self._pending_updates = {}
+        self._pending_updates.update(updates)
+        if defer:
+            return True
+        return self.flush()
+    
+    def flush(self) -> bool:
+        """Écrire les mises à jour différées"""
+        if not self._pending_updates:
+            return True
         current_config = self.load_config()
-        current_config.update(updates)
+        current_config.update(self._pending_updates)
+        self._pending_updates = None
         return self.save_config(current_config)
     
     def reset_to_default(self) -> bool:
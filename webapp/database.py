@@ -5,12 +5,19 @@ Utilise PostgreSQL via Neon pour stocker les analyses et configurations
 
 import os
 import json
+import time
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Boolean, text
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, Index, func, text
+from sqlalchemy import bindparam, event, insert, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 from sqlalchemy.exc import SQLAlchemyError
 
 # Configuration du logging
@@ -19,21 +26,38 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Absence d'entrée dans le cache de lecture (None est une valeur valide)
+_MISS = object()
+
 class AnalysisResult(Base):
     """Modèle pour stocker les résultats d'analyses"""
     __tablename__ = 'analysis_results'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(255), unique=True, nullable=False, index=True)
-    ticker = Column(String(20), nullable=False, index=True)
+    ticker = Column(String(20), nullable=False)
     trade_date = Column(String(20), nullable=False)
     decision = Column(String(50))
-    final_state = Column(JSON)
-    config = Column(JSON)
+    final_state = Column(JSONB)
+    config = Column(JSONB)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     status = Column(String(20), default='pending')  # pending, running, completed, error
     error_message = Column(Text)
+    
+    # Index (ticker, created_at DESC) : filtre et tri des listes par ticker
+    # servis par un parcours d'index. Index partiel sur les analyses en cours
+    # (peu de lignes parmi un statut à faible cardinalité). Index GIN (jsonb_path_ops) : filtres de
+    # containment @> sur le JSON indexés
+    __table_args__ = (
+        Index('ix_ar_ticker_created_desc', 'ticker', text('created_at DESC')),
+        Index('ix_ar_status_active', 'status',
+              postgresql_where=text("status IN ('pending', 'running')")),
+        Index('ix_ar_final_state_gin', 'final_state',
+              postgresql_using='gin', postgresql_ops={'final_state': 'jsonb_path_ops'}),
+        Index('ix_ar_config_gin', 'config',
+              postgresql_using='gin', postgresql_ops={'config': 'jsonb_path_ops'}),
+    )
 
 class Configuration(Base):
     """Modèle pour stocker les configurations"""
@@ -42,7 +66,7 @@ class Configuration(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
-    config_data = Column(JSON, nullable=False)
+    config_data = Column(JSONB, nullable=False)
     is_default = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -58,41 +82,257 @@ class UserSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     last_activity = Column(DateTime, default=datetime.utcnow)
 
+# Requêtes fréquentes construites une seule fois : texte SQL identique d'un
+# appel à l'autre (cache de compilation SQLAlchemy, plans côté serveur)
+_SELECT_ANALYSIS_BY_SID = select(
+    AnalysisResult.session_id,
+    AnalysisResult.ticker,
+    AnalysisResult.trade_date,
+    AnalysisResult.decision,
+    AnalysisResult.final_state,
+    AnalysisResult.config,
+    AnalysisResult.status,
+    AnalysisResult.error_message,
+    AnalysisResult.created_at,
+    AnalysisResult.updated_at
+).where(AnalysisResult.session_id == bindparam('sid'))
+_UPDATE_ANALYSIS_BY_SID = (
+    update(AnalysisResult)
+    .where(AnalysisResult.session_id == bindparam('sid'))
+    .returning(AnalysisResult.session_id)
+    .execution_options(synchronize_session=False)
+)
+_SELECT_CONFIGURATION_BY_NAME = select(
+    Configuration.name,
+    Configuration.description,
+    Configuration.config_data,
+    Configuration.is_default,
+    Configuration.created_at
+).where(Configuration.name == bindparam('name')).limit(1)
+_SELECT_CONFIGURATIONS = select(
+    Configuration.name,
+    Configuration.description,
+    Configuration.is_default,
+    Configuration.created_at
+).order_by(Configuration.created_at.desc())
+
 class DatabaseManager:
     """Gestionnaire de base de données pour TradingAgents"""
     
-    def __init__(self, database_url: Optional[str] = None):
+    # Durée de vie (secondes) des configurations et statistiques mises en cache
+    CONFIG_CACHE_TTL = 300
+    STATS_CACHE_TTL = 30
+    
+    def __init__(self, database_url: Optional[str] = None, testing: bool = False):
         self.database_url = database_url or os.getenv('DATABASE_URL')
         if not self.database_url:
             raise ValueError("DATABASE_URL non définie")
         
+        # pool_pre_ping : Neon ferme les connexions inactives, elles sont
+        # vérifiées avant réutilisation. En test, aucune connexion n'est gardée
+        if testing:
+            engine_options = {'poolclass': NullPool}
+        else:
+            engine_options = {
+                'pool_size': 10,
+                'max_overflow': 20,
+                'pool_timeout': 30,
+                'pool_pre_ping': True,
+                'pool_recycle': 300,
+            }
+        
+        # psycopg2 : insertions multiples regroupées en VALUES (...), (...)
+        if make_url(self.database_url).get_driver_name() == 'psycopg2':
+            engine_options.update(
+                executemany_mode='values_plus_batch',
+                insertmanyvalues_page_size=1000,
+                executemany_batch_page_size=500,
+            )
+        
         # Créer le moteur de base de données
         self.engine = create_engine(
             self.database_url,
-            pool_pre_ping=True,
-            pool_recycle=300,
-            echo=False  # Mettre à True pour voir les requêtes SQL
+            query_cache_size=1200,
+            echo=False,  # Mettre à True pour voir les requêtes SQL
+            **engine_options
         )
         
+        # Délais PostgreSQL par connexion : une requête non bornée ou une
+        # transaction oubliée ne peut pas immobiliser une connexion du pool
+        self.statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+        self.idle_in_transaction_timeout_ms = int(os.getenv('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', '10000'))
+        if self.engine.dialect.name == 'postgresql':
+            event.listen(self.engine, 'connect', self._set_session_timeouts)
+        
+        # Cache de lecture en mémoire : clé → (expiration, valeur)
+        self._read_cache: Dict[str, Any] = {}
+        self._read_cache_lock = threading.Lock()
+        
         # Créer la session factory
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         
-        # Créer les tables
-        self.create_tables()
+        # Créer les tables et mettre le schéma à niveau (RUN_DB_MIGRATIONS=0 pour
+        # les workers de production dont le schéma est déjà en place)
+        if os.getenv('RUN_DB_MIGRATIONS', '1') != '0':
+            self.create_tables()
+    
+    def _set_session_timeouts(self, dbapi_connection, connection_record):
+        """Appliquer statement_timeout et idle_in_transaction_session_timeout
+        à chaque nouvelle connexion (0 désactive le délai)"""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(
+                f"SET statement_timeout = {self.statement_timeout_ms}; "
+                f"SET idle_in_transaction_session_timeout = {self.idle_in_transaction_timeout_ms}"
+            )
+        finally:
+            cursor.close()
+        # Valider : un rollback ultérieur annulerait les SET
+        dbapi_connection.commit()
     
     def create_tables(self):
         """Créer toutes les tables dans la base de données"""
         try:
             Base.metadata.create_all(bind=self.engine)
+            self._migrate_json_columns()
+            self._migrate_indexes()
+            self._set_json_compression()
             logger.info("✅ Tables de base de données créées avec succès")
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la création des tables: {e}")
             raise
     
+    def _migrate_json_columns(self):
+        """Convertir en JSONB les colonnes créées en JSON texte
+        
+        JSONB est stocké sous forme binaire (pas de réanalyse à chaque lecture)
+        et indexable en GIN pour les filtres @>.
+        """
+        with self.engine.begin() as conn:
+            # La réécriture d'une grande table dépasse le délai des requêtes web
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            for table, column in (('analysis_results', 'final_state'),
+                                  ('analysis_results', 'config'),
+                                  ('configurations', 'config_data')):
+                data_type = conn.execute(text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = :table AND column_name = :column"
+                ), {'table': table, 'column': column}).scalar()
+                if data_type == 'json':
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"
+                    ))
+                    logger.info(f"✅ Colonne {table}.{column} convertie en JSONB")
+    
+    def _migrate_indexes(self):
+        """Mettre à niveau les index des tables existantes
+        
+        create_all ne touche pas aux tables déjà créées : les index sont
+        construits CONCURRENTLY (sans verrouiller les écritures), ce qui
+        impose une connexion hors transaction.
+        """
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            # Hors transaction, SET LOCAL est sans effet : le délai est levé pour
+            # la session puis rétabli avant le retour de la connexion au pool
+            conn.execute(text("SET statement_timeout = 0"))
+            try:
+                self._create_indexes_concurrently(conn)
+            finally:
+                conn.execute(text(f"SET statement_timeout = {self.statement_timeout_ms}"))
+    
+    def _create_indexes_concurrently(self, conn):
+        """Créer les index manquants et supprimer ceux devenus redondants"""
+        # Un CREATE INDEX CONCURRENTLY interrompu laisse un index INVALID que
+        # IF NOT EXISTS ignorerait à chaque démarrage : le supprimer pour le reconstruire
+        invalid_indexes = conn.execute(text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = 'analysis_results'::regclass AND NOT i.indisvalid "
+            "AND c.relname IN ('ix_ar_ticker_created_desc', 'ix_ar_final_state_gin', "
+            "'ix_ar_config_gin', 'ix_ar_status_active')"
+        )).scalars().all()
+        for index_name in invalid_indexes:
+            logger.warning(f"⚠️ Index {index_name} invalide, reconstruction")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        
+        conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ar_ticker_created_desc "
+            "ON analysis_results (ticker, created_at DESC)"
+        ))
+        for column in ('final_state', 'config'):
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ar_{column}_gin "
+                f"ON analysis_results USING gin ({column} jsonb_path_ops)"
+            ))
+        conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ar_status_active "
+            "ON analysis_results (status) WHERE status IN ('pending', 'running')"
+        ))
+        # Remplacé par le préfixe de ix_ar_ticker_created_desc
+        conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_analysis_results_ticker"))
+    
+    def _set_json_compression(self):
+        """Compresser les colonnes JSONB volumineuses en LZ4 (PostgreSQL 14+)
+        
+        La décompression LZ4 est nettement plus rapide que pglz à la lecture
+        des traces final_state. Sans effet si les colonnes sont déjà en LZ4 ;
+        seules les nouvelles valeurs TOAST sont compressées avec la nouvelle méthode.
+        """
+        try:
+            with self.engine.begin() as conn:
+                if conn.dialect.server_version_info < (14,):
+                    return
+                # ALTER TABLE prend un verrou ACCESS EXCLUSIVE : ne l'exécuter que
+                # pour les colonnes pas encore en LZ4 ('l' dans pg_attribute)
+                columns = conn.execute(text(
+                    "SELECT attname FROM pg_attribute "
+                    "WHERE attrelid = 'analysis_results'::regclass "
+                    "AND attname IN ('final_state', 'config') AND attcompression <> 'l'"
+                )).scalars().all()
+                for column in columns:
+                    conn.execute(text(
+                        f"ALTER TABLE analysis_results ALTER COLUMN {column} SET COMPRESSION lz4"
+                    ))
+        except SQLAlchemyError as e:
+            # Serveur compilé sans LZ4 : la compression pglz par défaut reste active
+            logger.warning(f"⚠️ Compression LZ4 indisponible: {e}")
+    
     def get_session(self) -> Session:
         """Obtenir une session de base de données"""
         return self.SessionLocal()
     
+    @contextmanager
+    def read_session(self):
+        """Obtenir une session en lecture seule
+        
+        La transaction est déclarée READ ONLY et toujours annulée à la sortie :
+        aucune écriture possible, aucun COMMIT inutile sur les chemins de lecture.
+        """
+        session = self.SessionLocal()
+        try:
+            session.connection(execution_options={'postgresql_readonly': True})
+            yield session
+        finally:
+            session.rollback()
+            session.close()
+    
+    def _cache_get(self, key: str) -> Any:
+        """Lire une entrée du cache de lecture ; _MISS si absente ou expirée"""
+        entry = self._read_cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return _MISS
+        return entry[1]
+    
+    def _cache_put(self, key: str, value: Any, ttl: float):
+        """Mémoriser une entrée du cache de lecture"""
+        with self._read_cache_lock:
+            self._read_cache[key] = (time.monotonic() + ttl, value)
+    
+    def _cache_invalidate(self, prefix: str):
+        """Supprimer les entrées du cache dont la clé commence par prefix"""
+        with self._read_cache_lock:
+            for key in [key for key in self._read_cache if key.startswith(prefix)]:
+                del self._read_cache[key]
+    
     def test_connection(self) -> bool:
         """Tester la connexion à la base de données"""
         try:
@@ -105,45 +345,86 @@ class DatabaseManager:
             logger.error(f"❌ Erreur de connexion à la base de données: {e}")
             return False
     
+    def _insert_rows(self, stmt, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insérer plusieurs lignes en un seul aller-retour (INSERT ... RETURNING id)"""
+        with self.get_session() as session:
+            ids = session.execute(stmt.values(rows)).scalars().all()
+            session.commit()
+            return ids
+    
     # Méthodes pour les résultats d'analyses
     def save_analysis_result(self, session_id: str, ticker: str, trade_date: str, 
                            config: Dict[str, Any], status: str = 'pending') -> bool:
         """Sauvegarder un résultat d'analyse"""
+        ids = self._save_analysis_rows([{
+            'session_id': session_id,
+            'ticker': ticker,
+            'trade_date': trade_date,
+            'config': config,
+            'status': status
+        }])
+        if ids is None:
+            return False
+        if not ids:
+            logger.warning(f"⚠️ Analyse déjà existante: {session_id}")
+            return False
+        logger.info(f"✅ Analyse sauvegardée: {session_id}")
+        return True
+    
+    def save_analysis_results_bulk(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Sauvegarder plusieurs résultats d'analyses en une seule requête
+        
+        Chaque ligne contient session_id, ticker, trade_date, config et
+        éventuellement status ; les session_id déjà présents sont ignorés.
+        Retourne les identifiants des analyses insérées.
+        """
+        ids = self._save_analysis_rows([{
+            'session_id': row['session_id'],
+            'ticker': row['ticker'],
+            'trade_date': row['trade_date'],
+            'config': row.get('config'),
+            'status': row.get('status', 'pending')
+        } for row in rows])
+        if ids is None:
+            return []
+        logger.info(f"✅ {len(ids)}/{len(rows)} analyses sauvegardées")
+        return ids
+    
+    def _save_analysis_rows(self, rows: List[Dict[str, Any]]) -> Optional[List[int]]:
+        """Insérer des analyses ; None en cas d'erreur"""
+        if not rows:
+            return []
         try:
-            with self.get_session() as session:
-                analysis = AnalysisResult(
-                    session_id=session_id,
-                    ticker=ticker,
-                    trade_date=trade_date,
-                    config=config,
-                    status=status
-                )
-                session.add(analysis)
-                session.commit()
-                logger.info(f"✅ Analyse sauvegardée: {session_id}")
-                return True
+            stmt = (pg_insert(AnalysisResult)
+                    .on_conflict_do_nothing(index_elements=['session_id'])
+                    .returning(AnalysisResult.id))
+            ids = self._insert_rows(stmt, rows)
+            self._cache_invalidate('stats')
+            return ids
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la sauvegarde: {e}")
-            return False
+            return None
     
     def update_analysis_result(self, session_id: str, decision: Optional[str] = None,
                              final_state: Optional[Dict] = None, status: Optional[str] = None,
                              error_message: Optional[str] = None) -> bool:
         """Mettre à jour un résultat d'analyse"""
+        # Seuls les champs fournis sont modifiés, en une seule requête UPDATE
+        values = {key: value for key, value in (
+            ('decision', decision),
+            ('final_state', final_state),
+            ('status', status),
+            ('error_message', error_message),
+        ) if value is not None}
+        values['updated_at'] = datetime.utcnow()
+        
         try:
             with self.get_session() as session:
-                analysis = session.query(AnalysisResult).filter_by(session_id=session_id).first()
-                if analysis:
-                    if decision is not None:
-                        analysis.decision = decision
-                    if final_state is not None:
-                        analysis.final_state = final_state
-                    if status is not None:
-                        analysis.status = status
-                    if error_message is not None:
-                        analysis.error_message = error_message
-                    analysis.updated_at = datetime.utcnow()
-                    session.commit()
+                result = session.execute(_UPDATE_ANALYSIS_BY_SID.values(**values), {'sid': session_id})
+                found = result.first() is not None
+                session.commit()
+                self._cache_invalidate('stats')
+                if found:
                     logger.info(f"✅ Analyse mise à jour: {session_id}")
                     return True
                 else:
@@ -154,45 +435,47 @@ class DatabaseManager:
             return False
     
     def get_analysis_result(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Récupérer un résultat d'analyse"""
+        """Récupérer un résultat d'analyse
+        
+        Lignes Core (sans instanciation ORM) ; created_at et updated_at restent
+        des datetime, sérialisés en ISO 8601 par l'encodeur JSON de la vue.
+        """
         try:
-            with self.get_session() as session:
-                analysis = session.query(AnalysisResult).filter_by(session_id=session_id).first()
-                if analysis:
-                    return {
-                        'session_id': analysis.session_id,
-                        'ticker': analysis.ticker,
-                        'trade_date': analysis.trade_date,
-                        'decision': analysis.decision,
-                        'final_state': analysis.final_state,
-                        'config': analysis.config,
-                        'status': analysis.status,
-                        'error_message': analysis.error_message,
-                        'created_at': analysis.created_at.isoformat() if analysis.created_at else None,
-                        'updated_at': analysis.updated_at.isoformat() if analysis.updated_at else None
-                    }
-                return None
+            with self.read_session() as session:
+                row = session.execute(_SELECT_ANALYSIS_BY_SID, {'sid': session_id}).mappings().first()
+                return dict(row) if row else None
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la récupération: {e}")
             return None
     
-    def list_analysis_results(self, limit: int = 100, ticker: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Lister les résultats d'analyses"""
+    def list_analysis_results(self, limit: int = 100, ticker: Optional[str] = None,
+                              config_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Lister les résultats d'analyses
+        
+        Comme get_analysis_result, created_at reste un datetime.
+        config_filter restreint aux analyses dont la configuration contient ces
+        paires clé/valeur (ex. {'llm_provider': 'openai'}) : containment @>
+        servi par l'index GIN ix_ar_config_gin.
+        """
         try:
-            with self.get_session() as session:
-                query = session.query(AnalysisResult)
-                if ticker:
-                    query = query.filter_by(ticker=ticker)
-                analyses = query.order_by(AnalysisResult.created_at.desc()).limit(limit).all()
-                
-                return [{
-                    'session_id': analysis.session_id,
-                    'ticker': analysis.ticker,
-                    'trade_date': analysis.trade_date,
-                    'decision': analysis.decision,
-                    'status': analysis.status,
-                    'created_at': analysis.created_at.isoformat() if analysis.created_at else None
-                } for analysis in analyses]
+            # Colonnes scalaires uniquement : les blobs JSON config/final_state
+            # ne sont ni transférés ni désérialisés
+            stmt = select(
+                AnalysisResult.session_id,
+                AnalysisResult.ticker,
+                AnalysisResult.trade_date,
+                AnalysisResult.decision,
+                AnalysisResult.status,
+                AnalysisResult.created_at
+            )
+            if ticker:
+                stmt = stmt.where(AnalysisResult.ticker == ticker)
+            if config_filter:
+                stmt = stmt.where(AnalysisResult.config.contains(config_filter))
+            stmt = stmt.order_by(AnalysisResult.created_at.desc()).limit(limit)
+            
+            with self.read_session() as session:
+                return [dict(row) for row in session.execute(stmt).mappings()]
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la liste: {e}")
             return []
@@ -201,78 +484,111 @@ class DatabaseManager:
     def save_configuration(self, name: str, config_data: Dict[str, Any], 
                           description: str = "", is_default: bool = False) -> bool:
         """Sauvegarder une configuration"""
+        ids = self._save_configuration_rows([{
+            'name': name,
+            'description': description,
+            'config_data': config_data,
+            'is_default': is_default
+        }])
+        if not ids:
+            return False
+        logger.info(f"✅ Configuration sauvegardée: {name}")
+        return True
+    
+    def save_configurations_bulk(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Sauvegarder plusieurs configurations en une seule requête
+        
+        Chaque ligne contient name, config_data et éventuellement description
+        et is_default. Retourne les identifiants des configurations insérées.
+        """
+        ids = self._save_configuration_rows([{
+            'name': row['name'],
+            'description': row.get('description', ""),
+            'config_data': row['config_data'],
+            'is_default': row.get('is_default', False)
+        } for row in rows])
+        if ids is None:
+            return []
+        logger.info(f"✅ {len(ids)} configurations sauvegardées")
+        return ids
+    
+    def _save_configuration_rows(self, rows: List[Dict[str, Any]]) -> Optional[List[int]]:
+        """Insérer des configurations ; None en cas d'erreur"""
+        if not rows:
+            return []
         try:
-            with self.get_session() as session:
-                config = Configuration(
-                    name=name,
-                    description=description,
-                    config_data=config_data,
-                    is_default=is_default
-                )
-                session.add(config)
-                session.commit()
-                logger.info(f"✅ Configuration sauvegardée: {name}")
-                return True
+            stmt = insert(Configuration).returning(Configuration.id)
+            ids = self._insert_rows(stmt, rows)
+            self._cache_invalidate('cfg:')
+            return ids
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la sauvegarde de configuration: {e}")
-            return False
+            return None
     
     def get_configuration(self, name: str) -> Optional[Dict[str, Any]]:
         """Récupérer une configuration"""
+        cache_key = f'cfg:{name}'
+        cached = self._cache_get(cache_key)
+        if cached is not _MISS:
+            return dict(cached) if cached is not None else None
+        
         try:
-            with self.get_session() as session:
-                config = session.query(Configuration).filter_by(name=name).first()
-                if config:
-                    return {
-                        'name': config.name,
-                        'description': config.description,
-                        'config_data': config.config_data,
-                        'is_default': config.is_default,
-                        'created_at': config.created_at.isoformat() if config.created_at else None
-                    }
-                return None
+            with self.read_session() as session:
+                row = session.execute(_SELECT_CONFIGURATION_BY_NAME, {'name': name}).mappings().first()
+                result = None
+                if row:
+                    result = dict(row)
+                    result['created_at'] = row['created_at'].isoformat() if row['created_at'] else None
+                self._cache_put(cache_key, result, self.CONFIG_CACHE_TTL)
+                return dict(result) if result is not None else None
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la récupération de configuration: {e}")
             return None
     
     def list_configurations(self) -> List[Dict[str, Any]]:
         """Lister toutes les configurations"""
+        cached = self._cache_get('cfg:list')
+        if cached is not _MISS:
+            return [dict(config) for config in cached]
+        
         try:
-            with self.get_session() as session:
-                configs = session.query(Configuration).order_by(Configuration.created_at.desc()).all()
-                return [{
-                    'name': config.name,
-                    'description': config.description,
-                    'is_default': config.is_default,
-                    'created_at': config.created_at.isoformat() if config.created_at else None
-                } for config in configs]
+            with self.read_session() as session:
+                result = [{
+                    **row,
+                    'created_at': row['created_at'].isoformat() if row['created_at'] else None
+                } for row in session.execute(_SELECT_CONFIGURATIONS).mappings()]
+                self._cache_put('cfg:list', result, self.CONFIG_CACHE_TTL)
+                return [dict(config) for config in result]
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors de la liste des configurations: {e}")
             return []
     
     # Méthodes pour les statistiques
     def get_analysis_stats(self) -> Dict[str, Any]:
-        """Obtenir les statistiques des analyses"""
+        """Obtenir les statistiques des analyses
+        
+        Mises en cache STATS_CACHE_TTL secondes (le tableau de bord les
+        redemande à chaque affichage) ; invalidées à chaque écriture d'analyse.
+        """
+        cached = self._cache_get('stats')
+        if cached is not _MISS:
+            return {**cached, 'decisions': dict(cached['decisions'])}
+        
         try:
-            with self.get_session() as session:
-                total = session.query(AnalysisResult).count()
-                completed = session.query(AnalysisResult).filter_by(status='completed').count()
-                pending = session.query(AnalysisResult).filter_by(status='pending').count()
-                running = session.query(AnalysisResult).filter_by(status='running').count()
-                errors = session.query(AnalysisResult).filter_by(status='error').count()
+            with self.read_session() as session:
+                # Tous les comptes en un seul parcours de la table (FILTER)
+                total, completed, pending, running, errors, buy_count, sell_count, hold_count = session.query(
+                    func.count(),
+                    func.count().filter(AnalysisResult.status == 'completed'),
+                    func.count().filter(AnalysisResult.status == 'pending'),
+                    func.count().filter(AnalysisResult.status == 'running'),
+                    func.count().filter(AnalysisResult.status == 'error'),
+                    func.count().filter(AnalysisResult.decision.ilike('%buy%')),
+                    func.count().filter(AnalysisResult.decision.ilike('%sell%')),
+                    func.count().filter(AnalysisResult.decision.ilike('%hold%'))
+                ).select_from(AnalysisResult).one()
                 
-                # Statistiques par décision
-                buy_count = session.query(AnalysisResult).filter(
-                    AnalysisResult.decision.ilike('%buy%')
-                ).count()
-                sell_count = session.query(AnalysisResult).filter(
-                    AnalysisResult.decision.ilike('%sell%')
-                ).count()
-                hold_count = session.query(AnalysisResult).filter(
-                    AnalysisResult.decision.ilike('%hold%')
-                ).count()
-                
-                return {
+                stats = {
                     'total_analyses': total,
                     'completed': completed,
                     'pending': pending,
@@ -285,24 +601,35 @@ class DatabaseManager:
                         'hold': hold_count
                     }
                 }
+                self._cache_put('stats', stats, self.STATS_CACHE_TTL)
+                return {**stats, 'decisions': dict(stats['decisions'])}
         except SQLAlchemyError as e:
             logger.error(f"❌ Erreur lors du calcul des statistiques: {e}")
             return {}
 
 # Instance globale du gestionnaire de base de données
 db_manager = None
+_db_manager_lock = threading.Lock()
 
 def get_db_manager() -> DatabaseManager:
-    """Obtenir l'instance du gestionnaire de base de données"""
+    """Obtenir l'instance du gestionnaire de base de données
+    
+    Double vérification sous verrou : deux requêtes concurrentes ne créent
+    jamais deux moteurs (ni deux create_all).
+    """
     global db_manager
     if db_manager is None:
-        db_manager = DatabaseManager()
+        with _db_manager_lock:
+            if db_manager is None:
+                db_manager = DatabaseManager()
     return db_manager
 
 def init_database():
     """Initialiser la base de données"""
     try:
         db = get_db_manager()
+        # test_connection ouvre une première connexion qui reste dans le pool :
+        # la première requête ne paie pas l'établissement de la connexion
         if db.test_connection():
             logger.info("🗄️ Base de données Neon PostgreSQL initialisée avec succès")
             return True
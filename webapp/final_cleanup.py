@@ -7,8 +7,110 @@ Supprime les dernières classes Bootstrap obsolètes détectées
 
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# RE2 (google-re2) : balayage en temps linéaire s'il est installé
+try:
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# Classes spécifiques à nettoyer
+FINAL_REPLACEMENTS = {
+    'mb-3': 'mb-4',
+    'card-header': 'card-header',  # Garder mais s'assurer qu'elle est dans le bon contexte
+}
+
+# Classes supprimées (me-2 restantes dans les headers et icônes)
+FINAL_REMOVALS = frozenset({'me-2'})
+
+# Patterns structurels pour card-header : les h4/h5 d'un card-header
+# deviennent des h3. Une seule alternative, chaque groupe nommé désigne sa règle
+_CARD_HEADER_RE = _re.compile(
+    r'(?P<header_open><div class="card-header">\s*<h[45][^>]*>)'
+    r'|(?P<header_close></h[45]>\s*</div>)'
+)
+
+# Attributs class="..." : les règles de classes ne s'appliquent qu'à leur
+# contenu, le reste du document (texte, <pre>, scripts, blocs Jinja) est
+# laissé intact. data-class, :class, ng-class... sont exclus ; RE2 n'ayant
+# pas d'assertion arrière, le caractère précédent est capturé puis réinséré
+_CLASS_ATTR_RE = _re.compile(r'(^|[^\w:-])class="([^"]*)"')
+
+# Sous-chaînes sans lesquelles aucun pattern card-header ne peut
+# correspondre : test `in` (memmem en C) avant de lancer le moteur regex
+_TRIGGERS = ('<div class="card-header">', '</h4>', '</h5>')
+
+# Ordre d'application historique des patterns card-header (rapport des changements)
+_PATTERN_ORDER = ('header_open', 'header_close', 'me2')
+
+def _cleanup_content(content):
+    """Appliquer les patterns card-header et les règles de classes
+    
+    Retourne (nouveau contenu, liste des changements).
+    """
+    fired = set()
+    
+    def header(match):
+        if match.group('header_open') is not None:
+            fired.add('header_open')
+            return '<div class="card-header">\n                <h3>'
+        fired.add('header_close')
+        return '</h3>\n            </div>'
+    
+    def classes(match):
+        prefix = match.group(1)
+        new_classes = []
+        rule_fired = False
+        for cls in match.group(2).split():
+            if cls in FINAL_REMOVALS:
+                fired.add('me2')
+                rule_fired = True
+                continue
+            new_cls = FINAL_REPLACEMENTS.get(cls, cls)
+            if new_cls != cls:
+                fired.add(cls)
+                rule_fired = True
+            new_classes.append(new_cls)
+        # Supprimer les attributs class vides, réduire les espaces multiples
+        attr = 'class="%s"' % ' '.join(new_classes) if new_classes else ''
+        if not rule_fired and attr != match.group(0)[len(prefix):]:
+            fired.add('class_attr')
+        return prefix + attr
+    
+    if any(trigger in content for trigger in _TRIGGERS):
+        content = _CARD_HEADER_RE.sub(header, content)
+    if 'class="' in content:
+        content = _CLASS_ATTR_RE.sub(classes, content)
+    
+    changes = [f"{old} → {new}" for old, new in FINAL_REPLACEMENTS.items() if old in fired]
+    changes.extend("Pattern card-header nettoyé" for name in _PATTERN_ORDER if name in fired)
+    if 'class_attr' in fired:
+        changes.append("Attributs class normalisés")
+    
+    return content, changes
+
+def _clean_one_file(template_file):
+    """Nettoyer un template (exécuté dans un processus de travail)
+    
+    Retourne (fichier, changements, fichier modifié) : l'affichage est fait
+    par le processus principal pour garder l'ordre des fichiers.
+    """
+    with open(template_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    original_content = content
+    content, changes = _cleanup_content(content)
+    
+    # Sauvegarder si changements
+    if content == original_content:
+        return template_file, changes, False
+    
+    with open(template_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return template_file, changes, True
+
 def final_cleanup():
     """Nettoyage final des classes Bootstrap restantes"""
     print("🧹 NETTOYAGE FINAL DES CLASSES BOOTSTRAP")
@@ -19,66 +121,23 @@ def final_cleanup():
         print("❌ Répertoire templates non trouvé")
         return False
     
-    # Classes spécifiques à nettoyer
-    final_replacements = {
-        'mb-3': 'mb-4',
-        'card-header': 'card-header',  # Garder mais s'assurer qu'elle est dans le bon contexte
-    }
-    
-    # Patterns spéciaux pour card-header
-    card_header_patterns = [
-        # Remplacer les h4/h5 dans card-header par h3
-        (r'<div class="card-header">\s*<h([45])[^>]*>', r'<div class="card-header">\n                <h3'),
-        (r'</h[45]>\s*</div>', r'</h3>\n            </div>'),
-        
-        # Nettoyer les classes me-2 restantes dans les headers
-        (r'<i class="([^"]*)\s+me-2([^"]*)">', r'<i class="\1\2">'),
-        (r'me-2\s*', ''),
-    ]
-    
     template_files = [f for f in templates_dir.glob("*.html") if not f.name.startswith('base')]
     
     cleaned_files = 0
     
-    for template_file in template_files:
-        print(f"\n🔍 Vérification de {template_file.name}")
-        
-        with open(template_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        changes = []
-        
-        # Remplacements simples
-        for old, new in final_replacements.items():
-            if old in content and old != new:
-                content = content.replace(old, new)
-                changes.append(f"{old} → {new}")
-        
-        # Patterns spéciaux
-        for pattern, replacement in card_header_patterns:
-            new_content = re.sub(pattern, replacement, content)
-            if new_content != content:
-                changes.append(f"Pattern card-header nettoyé")
-                content = new_content
-        
-        # Nettoyer les espaces multiples et classes vides
-        content = re.sub(r'\s+', ' ', content)
-        content = re.sub(r'class="\s*"', '', content)
-        content = re.sub(r'class="([^"]*?)\s+([^"]*?)"', r'class="\1 \2"', content)
-        
-        # Sauvegarder si changements
-        if content != original_content:
-            with open(template_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+    # Chaque template est un travail regex indépendant : un processus par cœur
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for template_file, changes, changed in executor.map(_clean_one_file, template_files, chunksize=4):
+            print(f"\n🔍 Vérification de {template_file.name}")
             
-            print(f"  ✅ {len(changes)} changements appliqués")
-            for change in changes:
-                print(f"    • {change}")
-            
-            cleaned_files += 1
-        else:
-            print("  ✅ Déjà propre")
+            if changed:
+                print(f"  ✅ {len(changes)} changements appliqués")
+                for change in changes:
+                    print(f"    • {change}")
+                
+                cleaned_files += 1
+            else:
+                print("  ✅ Déjà propre")
     
     print(f"\n📊 Nettoyage final terminé: {cleaned_files} fichiers modifiés")
     return True
@@ -7,9 +7,37 @@ Migre automatiquement les templates vers le design system moderne
 
 import os
 import re
+import io
+import mmap
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 import shutil
 
+# Migrateur propre à chaque processus de travail
+_worker_migrator = None
+
+def _init_worker(migrator):
+    """Installer le migrateur dans le processus de travail"""
+    global _worker_migrator
+    _worker_migrator = migrator
+
+def _migrate_one(template_path):
+    """Migrer un template dans un processus de travail
+    
+    Retourne (migration réussie, sortie console) : l'affichage est fait par le
+    processus principal pour garder l'ordre des fichiers.
+    """
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            success = _worker_migrator.migrate_template(template_path)
+        except Exception as e:
+            print(f"  ❌ Erreur: {e}")
+            success = False
+    return success, output.getvalue()
+
 class TemplateMigrator:
     """Migrateur de templates vers le design moderne"""
     
@@ -55,7 +83,16 @@ class TemplateMigrator:
             'container-fluid': 'container',
         }
         
-        self.class_patterns = [
+        # Alternative unique couvrant tous les remplacements simples : le contenu
+        # est parcouru une seule fois. Les clés les plus longues passent en
+        # premier : form-check-input et form-check-label suivent leurs propres
+        # règles au lieu d'être réécrits en checkbox-card-input / -label
+        self._simple_pattern = re.compile('|'.join(
+            re.escape(old) for old in sorted(self.replacements, key=len, reverse=True)
+        ))
+        
+        # Patterns compilés une seule fois (les callbacks empêchent le cache de re.sub)
+        self.class_patterns = [(re.compile(pattern), replacement) for pattern, replacement in [
             # Remplacer les grilles Bootstrap
             (r'<div class="row">', '<div class="grid gap-6">'),
             (r'<div class="col-(\w+)-(\d+)">', self._replace_col_class),
@@ -73,7 +110,7 @@ class TemplateMigrator:
             (r'\bd-flex\b', 'flex'),
             (r'\bd-none\b', 'hidden'),
             (r'\bd-block\b', 'block'),
-        ]
+        ]]
     
     def _replace_col_class(self, match):
         """Remplacer les classes de colonnes Bootstrap"""
@@ -111,30 +148,36 @@ class TemplateMigrator:
         """Migrer un template vers le design moderne"""
         print(f"🔄 Migration de {template_path.name}")
         
-        # Lire le contenu
-        with open(template_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Lire le contenu (projection en mémoire, sans tampon intermédiaire)
+        with open(template_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                content = ''
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    content = mm[:].decode('utf-8')
+        original_content = content
         
-        # Sauvegarder l'original
-        backup_path = template_path.with_suffix('.html.backup')
-        shutil.copy2(template_path, backup_path)
-        print(f"  💾 Sauvegarde créée: {backup_path.name}")
+        # Appliquer les remplacements simples en une seule passe
+        replaced = set()
         
-        # Appliquer les remplacements simples
+        def replace_simple(match):
+            old = match.group(0)
+            replaced.add(old)
+            return self.replacements[old]
+        
+        content = self._simple_pattern.sub(replace_simple, content)
         for old, new in self.replacements.items():
-            if old in content:
-                content = content.replace(old, new)
+            if old in replaced:
                 print(f"  ✅ Remplacé: {old} → {new}")
         
         # Appliquer les remplacements par regex
         for pattern, replacement in self.class_patterns:
             if callable(replacement):
-                content = re.sub(pattern, replacement, content)
+                content = pattern.sub(replacement, content)
             else:
-                matches = re.findall(pattern, content)
-                if matches:
-                    content = re.sub(pattern, replacement, content)
-                    print(f"  ✅ Pattern remplacé: {pattern}")
+                if pattern.search(content):
+                    content = pattern.sub(replacement, content)
+                    print(f"  ✅ Pattern remplacé: {pattern.pattern}")
         
         # Ajouter les styles spécifiques si nécessaire
         if not '{% block extra_head %}' in content and 'extends "base_modern.html"' in content:
@@ -163,9 +206,22 @@ class TemplateMigrator:
                 content = content[:content_start] + new_content + content[content_end:]
                 print("  ✅ Container ajouté")
         
-        # Écrire le nouveau contenu
-        with open(template_path, 'w', encoding='utf-8') as f:
+        # Template déjà migré : ni sauvegarde ni réécriture
+        if content == original_content:
+            print("  ℹ️ Aucun changement nécessaire")
+            return True
+        
+        # Sauvegarder l'original
+        backup_path = template_path.with_suffix('.html.backup')
+        shutil.copy2(template_path, backup_path)
+        print(f"  💾 Sauvegarde créée: {backup_path.name}")
+        
+        # Écrire le nouveau contenu de façon atomique (fichier temporaire + os.replace)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=template_path.parent,
+                                         suffix='.tmp', delete=False) as f:
             f.write(content)
+        shutil.copymode(template_path, f.name)  # Le fichier temporaire est créé en 0600
+        os.replace(f.name, template_path)
         
         print(f"  ✅ Migration terminée")
         return True
@@ -205,14 +261,14 @@ class TemplateMigrator:
             print("❌ Migration annulée")
             return False
         
-        # Migrer chaque template
+        # Migrer chaque template (travaux indépendants : un processus par cœur)
         success_count = 0
-        for template in templates_to_migrate:
-            try:
-                if self.migrate_template(template):
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=_init_worker, initargs=(self,)) as executor:
+            for success, output in executor.map(_migrate_one, templates_to_migrate, chunksize=4):
+                print(output, end='')
+                if success:
                     success_count += 1
-            except Exception as e:
-                print(f"  ❌ Erreur: {e}")
         
         print(f"\n📊 Migration terminée: {success_count}/{len(templates_to_migrate)} réussies")
         
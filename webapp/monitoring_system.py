@@ -5,21 +5,50 @@ Monitoring des positions, alertes et ajustements automatiques
 
 import os
 import json
+import random
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Mapping, Optional, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
+from types import MappingProxyType
+import itertools
 import threading
 import time
+from collections import deque
+from concurrent.futures import Future, wait
+from itertools import islice
 import websocket
-import requests
+import msgspec
+import numpy as np
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prix de référence des données simulées (lecture seule)
+_BASE_PRICES: Mapping[str, float] = MappingProxyType({
+    "SPY": 450.0,
+    "QQQ": 380.0,
+    "AAPL": 175.0,
+    "MSFT": 340.0,
+    "TSLA": 250.0,
+    "NVDA": 500.0,
+    "GOOGL": 140.0,
+    "AMZN": 150.0
+})
+
+# Générateur aléatoire propre à chaque thread (worker, flux, requêtes Flask)
+_thread_local = threading.local()
+
+def _rng() -> random.Random:
+    """Générateur aléatoire du thread courant"""
+    rng = getattr(_thread_local, 'rng', None)
+    if rng is None:
+        rng = _thread_local.rng = random.Random()
+    return rng
+
 class AlertLevel(Enum):
     """Niveaux d'alerte"""
     INFO = "info"
@@ -34,7 +63,7 @@ class MonitoringStatus(Enum):
     PAUSED = "paused"
     ERROR = "error"
 
-@dataclass
+@dataclass(slots=True)
 class Alert:
     """Alerte de surveillance"""
     id: str
@@ -50,7 +79,7 @@ class Alert:
         if self.timestamp is None:
             self.timestamp = datetime.now()
 
-@dataclass
+@dataclass(slots=True)
 class MarketData:
     """Données de marché en temps réel"""
     symbol: str
@@ -64,7 +93,7 @@ class MarketData:
     high_24h: Optional[float] = None
     low_24h: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class PositionMonitor:
     """Surveillance d'une position"""
     symbol: str
@@ -81,9 +110,115 @@ class PositionMonitor:
         if self.last_update is None:
             self.last_update = datetime.now()
 
+class _StreamTrade(msgspec.Struct):
+    """Transaction du flux WebSocket Finnhub"""
+    s: str
+    p: float
+    t: int
+    v: float = 0.0
+
+class _StreamMessage(msgspec.Struct):
+    """Trame du flux WebSocket Finnhub (trade, ping...)"""
+    type: str
+    data: List[_StreamTrade] = []
+
+# Décodeurs C : réponses /quote et trames du flux, sans passer par le module json
+_decode_quote = msgspec.json.decode
+_stream_decoder = msgspec.json.Decoder(_StreamMessage)
+
+class PositionTable:
+    """Positions surveillées stockées en colonnes NumPy (une ligne par symbole)
+    
+    Les calculs de P&L et les contrôles de seuils s'appliquent à toutes les
+    lignes en une opération vectorisée ; les stops absents valent 0.
+    """
+    
+    # cycle_price : prix au dernier cycle, référence des mouvements significatifs
+    # (current_price suit aussi les transactions du flux entre deux cycles)
+    _COLUMNS = ('entry_price', 'current_price', 'cycle_price', 'quantity', 'unrealized_pnl',
+                'unrealized_pnl_percent', 'stop_loss', 'take_profit')
+    
+    def __init__(self, capacity: int = 16):
+        self.symbol_idx: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.last_update: List[datetime] = []
+        for column in self._COLUMNS:
+            setattr(self, column, np.zeros(capacity))
+    
+    def __len__(self) -> int:
+        return len(self.symbols)
+    
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbol_idx
+    
+    def __iter__(self):
+        return iter(self.symbols)
+    
+    def add(self, monitor: PositionMonitor):
+        """Ajouter ou remplacer la ligne d'une position"""
+        row = self.symbol_idx.get(monitor.symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row == len(self.entry_price):
+                for column in self._COLUMNS:
+                    setattr(self, column, np.resize(getattr(self, column), 2 * row))
+            self.symbol_idx[monitor.symbol] = row
+            self.symbols.append(monitor.symbol)
+            self.last_update.append(monitor.last_update)
+        else:
+            self.last_update[row] = monitor.last_update
+        
+        self.entry_price[row] = monitor.entry_price
+        self.current_price[row] = monitor.current_price
+        self.cycle_price[row] = monitor.current_price
+        self.quantity[row] = monitor.quantity
+        self.unrealized_pnl[row] = monitor.unrealized_pnl
+        self.unrealized_pnl_percent[row] = monitor.unrealized_pnl_percent
+        self.stop_loss[row] = monitor.stop_loss or 0.0
+        self.take_profit[row] = monitor.take_profit or 0.0
+    
+    def remove(self, symbol: str):
+        """Supprimer une ligne en la remplaçant par la dernière"""
+        row = self.symbol_idx.pop(symbol)
+        last = len(self.symbols) - 1
+        if row != last:
+            moved = self.symbols[last]
+            self.symbols[row] = moved
+            self.last_update[row] = self.last_update[last]
+            self.symbol_idx[moved] = row
+            for column in self._COLUMNS:
+                values = getattr(self, column)
+                values[row] = values[last]
+        self.symbols.pop()
+        self.last_update.pop()
+    
+    def get(self, symbol: str) -> Optional[PositionMonitor]:
+        """Instantané PositionMonitor d'une position"""
+        row = self.symbol_idx.get(symbol)
+        return None if row is None else self.monitor(row)
+    
+    def monitor(self, row: int) -> PositionMonitor:
+        """Instantané PositionMonitor d'une ligne"""
+        return PositionMonitor(
+            symbol=self.symbols[row],
+            entry_price=float(self.entry_price[row]),
+            current_price=float(self.current_price[row]),
+            quantity=float(self.quantity[row]),
+            unrealized_pnl=float(self.unrealized_pnl[row]),
+            unrealized_pnl_percent=float(self.unrealized_pnl_percent[row]),
+            stop_loss=float(self.stop_loss[row]) or None,
+            take_profit=float(self.take_profit[row]) or None,
+            last_update=self.last_update[row]
+        )
+
 class MarketDataProvider:
     """Fournisseur de données de marché"""
     
+    # Cache des derniers prix REST : regroupe les demandes rapprochées d'un même
+    # symbole (ajouts de positions en rafale, cycle qui suit immédiatement)
+    PRICE_CACHE_TTL = 1.0
+    PRICE_CACHE_SIZE = 1024
+    
     def __init__(self, provider_type: str = "finnhub"):
         self.provider_type = provider_type
         self.api_key = os.getenv('FINNHUB_API_KEY')
@@ -91,18 +226,197 @@ class MarketDataProvider:
         self.websocket_url = "wss://ws.finnhub.io"
         self.ws = None
         self.subscribed_symbols = set()
+        self._ws_thread: Optional[threading.Thread] = None
+        # Appelé pour chaque transaction du flux : (symbole, prix, volume, horodatage ms)
+        self.on_tick: Optional[Callable] = None
+        # (fournisseur, symbole) → (prix, instant monotone de la récupération)
+        self._price_cache: Dict[tuple, tuple] = {}
+        self._price_cache_lock = threading.Lock()
+        # Client partagé par les appels REST synchrones (connexions TCP/TLS réutilisées)
+        self._session = self._create_session()
+        # Client asynchrone des cotations groupées : créé au premier cycle et
+        # utilisé uniquement dans la boucle de surveillance (connexion HTTP/2 conservée)
+        self._async_client: Any = None
+    
+    def _create_session(self) -> Any:
+        """Créer le client HTTP des appels synchrones
+        
+        httpx en HTTP/2 : les cotations demandées en même temps par plusieurs
+        threads sont multiplexées sur une seule connexion.
+        """
+        try:
+            import httpx
+        except ImportError:  # httpx absent: session requests avec pool de connexions
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=32,
+                max_retries=Retry(total=2, backoff_factor=0.2)
+            ))
+            return session
+        
+        try:
+            transport = httpx.HTTPTransport(http2=True, retries=2,
+                                            limits=httpx.Limits(max_connections=1))
+        except ImportError:  # paquet h2 absent: HTTP/1.1 avec connexions persistantes
+            transport = httpx.HTTPTransport(retries=2, limits=httpx.Limits(max_connections=32))
+        return httpx.Client(transport=transport, timeout=5.0)
+    
+    def _get_async_client(self) -> Any:
+        """Client httpx asynchrone partagé par tous les cycles
+        
+        Les requêtes /quote d'un lot sont multiplexées sur une seule connexion
+        HTTP/2, négociée une fois puis réutilisée d'un cycle à l'autre.
+        """
+        if self._async_client is None:
+            import httpx
+            
+            try:
+                self._async_client = httpx.AsyncClient(base_url=self.base_url, timeout=5, http2=True,
+                                                       limits=httpx.Limits(max_connections=1))
+            except ImportError:  # paquet h2 absent: HTTP/1.1 avec pool de connexions
+                self._async_client = httpx.AsyncClient(base_url=self.base_url, timeout=5,
+                                                       limits=httpx.Limits(max_connections=50))
+        return self._async_client
+    
+    def close(self):
+        """Fermer le flux WebSocket et libérer les connexions HTTP"""
+        self.stop_stream()
+        self._session.close()
+        
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(client.aclose(), _get_event_loop()).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"⚠️ Fermeture du client HTTP asynchrone: {e}")
+    
+    def start_stream(self, on_tick: Callable) -> bool:
+        """Ouvrir le flux WebSocket des transactions Finnhub
         
+        Les prix sont poussés à chaque transaction au lieu d'être interrogés
+        à chaque cycle ; retourne False si le flux est indisponible (REST seul).
+        """
+        if self.provider_type != "finnhub" or not self.api_key:
+            return False
+        if self.ws is not None:
+            return True
+        
+        try:
+            ws = websocket.create_connection(f"{self.websocket_url}?token={self.api_key}", timeout=10)
+            ws.settimeout(None)
+        except Exception as e:
+            logger.warning(f"⚠️ Flux WebSocket Finnhub indisponible, repli REST: {e}")
+            return False
+        
+        self.on_tick = on_tick
+        self.ws = ws
+        for symbol in list(self.subscribed_symbols):
+            self._send_subscription("subscribe", symbol)
+        
+        self._ws_thread = threading.Thread(target=self._stream_loop, daemon=True)
+        self._ws_thread.start()
+        logger.info("✅ Flux WebSocket Finnhub connecté")
+        return True
+    
+    def stop_stream(self):
+        """Fermer le flux WebSocket"""
+        ws, self.ws = self.ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur à la fermeture du flux WebSocket: {e}")
+    
+    def subscribe(self, symbol: str):
+        """S'abonner aux transactions d'un symbole"""
+        if symbol in self.subscribed_symbols:
+            return
+        self.subscribed_symbols.add(symbol)
+        self._send_subscription("subscribe", symbol)
+    
+    def unsubscribe(self, symbol: str):
+        """Se désabonner des transactions d'un symbole"""
+        if symbol not in self.subscribed_symbols:
+            return
+        self.subscribed_symbols.discard(symbol)
+        self._send_subscription("unsubscribe", symbol)
+    
+    def _send_subscription(self, action: str, symbol: str):
+        """Envoyer un message d'abonnement si le flux est ouvert"""
+        ws = self.ws
+        if ws is None:
+            return
+        try:
+            ws.send(json.dumps({"type": action, "symbol": symbol}))
+        except Exception as e:
+            logger.warning(f"⚠️ Abonnement {symbol} impossible: {e}")
+    
+    def _stream_loop(self):
+        """Consommer les transactions du flux et les transmettre à on_tick"""
+        ws = self.ws
+        while ws is not None and ws is self.ws:
+            try:
+                message = ws.recv()
+            except Exception as e:
+                if ws is self.ws:  # fermeture volontaire par stop_stream sinon
+                    logger.warning(f"⚠️ Flux WebSocket Finnhub interrompu, repli REST: {e}")
+                    self.ws = None
+                return
+            
+            try:
+                payload = _stream_decoder.decode(message)
+                if payload.type != "trade":
+                    continue  # ping, confirmations d'abonnement
+                for trade in payload.data:
+                    self.on_tick(trade.s, trade.p, trade.v, trade.t)
+            except Exception as e:
+                logger.error(f"❌ Transaction Finnhub invalide: {e}")
+    
+    def is_streaming(self) -> bool:
+        """Le flux WebSocket est-il ouvert"""
+        return self.ws is not None
+    
+    def _cached_price(self, symbol: str) -> Optional[float]:
+        """Prix récupéré il y a moins de PRICE_CACHE_TTL secondes, sinon None"""
+        with self._price_cache_lock:
+            entry = self._price_cache.get((self.provider_type, symbol))
+        if entry is not None and time.monotonic() - entry[1] < self.PRICE_CACHE_TTL:
+            return entry[0]
+        return None
+    
+    def _store_price(self, symbol: str, price: Optional[float]) -> Optional[float]:
+        """Mémoriser un prix obtenu du fournisseur (les prix simulés ne le sont pas)"""
+        if price is None:
+            return None
+        key = (self.provider_type, symbol)
+        with self._price_cache_lock:
+            # Réinsertion : l'ordre du dict suit l'ancienneté des entrées
+            self._price_cache.pop(key, None)
+            if len(self._price_cache) >= self.PRICE_CACHE_SIZE:
+                del self._price_cache[next(iter(self._price_cache))]
+            self._price_cache[key] = (price, time.monotonic())
+        return price
+    
     def get_real_time_price(self, symbol: str) -> Optional[float]:
         """Obtenir le prix en temps réel d'un symbole"""
+        cached = self._cached_price(symbol)
+        if cached is not None:
+            return cached
+        
         try:
             if self.provider_type == "finnhub":
                 url = f"{self.base_url}/quote"
                 params = {"symbol": symbol, "token": self.api_key}
                 
-                response = requests.get(url, params=params, timeout=5)
+                response = self._session.get(url, params=params, timeout=5)
                 if response.status_code == 200:
-                    data = response.json()
-                    return data.get('c')  # Current price
+                    data = _decode_quote(response.content)
+                    return self._store_price(symbol, data.get('c'))  # Current price
             
             # Fallback: prix simulé
             return self._get_simulated_price(symbol)
@@ -111,6 +425,68 @@ class MarketDataProvider:
             logger.error(f"❌ Erreur récupération prix {symbol}: {e}")
             return self._get_simulated_price(symbol)
     
+    def _parse_quote_price(self, symbol: str, response: Any) -> Optional[float]:
+        """Extraire le prix courant d'une réponse /quote (prix simulé en cas d'échec)"""
+        if isinstance(response, Exception):
+            logger.error(f"❌ Erreur récupération prix {symbol}: {response}")
+            return self._get_simulated_price(symbol)
+        if response.status_code == 200:
+            return self._store_price(symbol, _decode_quote(response.content).get('c'))  # Current price
+        return self._get_simulated_price(symbol)
+    
+    async def _fetch_prices_async(self, symbols: List[str]) -> List[Optional[float]]:
+        """Interroger les cotations de plusieurs symboles en parallèle
+        
+        Finnhub n'expose pas de cotation multi-symboles : les requêtes /quote
+        du lot sont multiplexées sur une seule connexion HTTP/2 (une seule
+        négociation TLS, en-têtes compressés par HPACK).
+        """
+        client = self._get_async_client()
+        responses = await asyncio.gather(
+            *(client.get("/quote", params={"symbol": symbol, "token": self.api_key})
+              for symbol in symbols),
+            return_exceptions=True
+        )
+        return [self._parse_quote_price(symbol, response)
+                for symbol, response in zip(symbols, responses)]
+    
+    async def get_prices_bulk_async(self, symbols: List[str]) -> Dict[str, float]:
+        """Obtenir les prix de plusieurs symboles en un seul aller-retour
+        
+        Les requêtes partent simultanément : la durée d'un cycle est celle de
+        la cotation la plus lente et non la somme des cotations. Les symboles
+        sans prix sont absents du résultat.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if self.provider_type != "finnhub":
+            return {symbol: self._get_simulated_price(symbol) for symbol in symbols}
+        
+        # Seuls les symboles absents du cache partent sur le réseau
+        prices: Dict[str, float] = {}
+        missing = []
+        for symbol in symbols:
+            cached = self._cached_price(symbol)
+            if cached is not None:
+                prices[symbol] = cached
+            else:
+                missing.append(symbol)
+        if not missing:
+            return prices
+        
+        try:
+            import httpx  # noqa: F401
+        except ImportError:  # httpx absent: interrogations séquentielles hors de la boucle
+            fetched = await asyncio.to_thread(lambda: [self.get_real_time_price(symbol) for symbol in missing])
+        else:
+            try:
+                fetched = await self._fetch_prices_async(missing)
+            except Exception as e:
+                logger.error(f"❌ Erreur récupération des prix: {e}")
+                fetched = [self._get_simulated_price(symbol) for symbol in missing]
+        
+        prices.update((symbol, price) for symbol, price in zip(missing, fetched) if price is not None)
+        return prices
+    
     def get_market_data(self, symbol: str) -> Optional[MarketData]:
         """Obtenir les données de marché complètes"""
         try:
@@ -118,9 +494,9 @@ class MarketDataProvider:
                 url = f"{self.base_url}/quote"
                 params = {"symbol": symbol, "token": self.api_key}
                 
-                response = requests.get(url, params=params, timeout=5)
+                response = self._session.get(url, params=params, timeout=5)
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _decode_quote(response.content)
                     
                     return MarketData(
                         symbol=symbol,
@@ -142,29 +518,16 @@ class MarketDataProvider:
     
     def _get_simulated_price(self, symbol: str) -> float:
         """Prix simulé pour les tests"""
-        import random
-        base_prices = {
-            "SPY": 450.0,
-            "QQQ": 380.0,
-            "AAPL": 175.0,
-            "MSFT": 340.0,
-            "TSLA": 250.0,
-            "NVDA": 500.0,
-            "GOOGL": 140.0,
-            "AMZN": 150.0
-        }
-        
-        base_price = base_prices.get(symbol, 100.0)
+        base_price = _BASE_PRICES.get(symbol, 100.0)
         # Ajouter une variation aléatoire de ±2%
-        variation = random.uniform(-0.02, 0.02)
+        variation = _rng().uniform(-0.02, 0.02)
         return base_price * (1 + variation)
     
     def _get_simulated_market_data(self, symbol: str) -> MarketData:
         """Données de marché simulées"""
-        import random
-        
+        rng = _rng()
         current_price = self._get_simulated_price(symbol)
-        change = random.uniform(-5.0, 5.0)
+        change = rng.uniform(-5.0, 5.0)
         change_percent = (change / current_price) * 100
         
         return MarketData(
@@ -172,12 +535,32 @@ class MarketDataProvider:
             price=current_price,
             change=change,
             change_percent=change_percent,
-            volume=random.randint(1000000, 10000000),
+            volume=rng.randint(1000000, 10000000),
             timestamp=datetime.now(),
             high_24h=current_price * 1.02,
             low_24h=current_price * 0.98
         )
 
+# Boucle asyncio partagée par toutes les instances de surveillance : chaque
+# worker est une coroutine et non un thread dédié
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_loop_lock = threading.Lock()
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Boucle de surveillance, démarrée au premier appel dans un thread daemon"""
+    global _event_loop
+    if _event_loop is None:
+        with _event_loop_lock:
+            if _event_loop is None:
+                try:
+                    import uvloop  # boucle libuv, plus rapide sous Linux
+                    loop = uvloop.new_event_loop()
+                except ImportError:
+                    loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="monitoring-loop", daemon=True).start()
+                _event_loop = loop
+    return _event_loop
+
 class MonitoringSystem:
     """Système principal de surveillance"""
     
@@ -186,12 +569,26 @@ class MonitoringSystem:
         self.market_data_provider = MarketDataProvider()
         
         # Surveillance
-        self.monitored_positions: Dict[str, PositionMonitor] = {}
-        self.alerts: List[Alert] = []
+        self.monitored_positions = PositionTable()
+        # Protège la table contre les modifications concurrentes (requêtes web,
+        # callbacks) pendant les passages vectorisés de la boucle de surveillance
+        self._positions_lock = threading.RLock()
+        # Les 100 dernières alertes, dans l'ordre de création
+        self.alerts: deque = deque(maxlen=100)
+        # Alertes relevées pendant un cycle, créées en bloc à la fin du cycle
+        self._pending_alerts: List[tuple] = []
+        self._alerts_by_id: Dict[str, Alert] = {}
+        # Index de l'historique par niveau et par symbole (mêmes alertes, même ordre)
+        self._alerts_by_level: Dict[AlertLevel, deque] = {
+            level: deque(maxlen=self.alerts.maxlen) for level in AlertLevel
+        }
+        self._alerts_by_symbol: Dict[str, deque] = {}
+        self._alert_seq = itertools.count(1)
         self.market_data_cache: Dict[str, MarketData] = {}
         
-        # Threads de surveillance
-        self.monitor_thread: Optional[threading.Thread] = None
+        # Worker de surveillance (coroutine sur la boucle partagée)
+        self._worker_future: Optional[Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
         self.stop_event = threading.Event()
         
         # Callbacks
@@ -224,26 +621,35 @@ class MonitoringSystem:
             take_profit=take_profit
         )
         
-        self.monitored_positions[symbol] = monitor
+        with self._positions_lock:
+            self.monitored_positions.add(monitor)
+        self.market_data_provider.subscribe(symbol)
         logger.info(f"📈 Position ajoutée à la surveillance: {symbol}")
     
     def remove_position_monitor(self, symbol: str):
         """Retirer une position de la surveillance"""
-        if symbol in self.monitored_positions:
-            del self.monitored_positions[symbol]
-            logger.info(f"📉 Position retirée de la surveillance: {symbol}")
+        with self._positions_lock:
+            if symbol not in self.monitored_positions:
+                return
+            self.monitored_positions.remove(symbol)
+        self.market_data_provider.unsubscribe(symbol)
+        self.market_data_cache.pop(symbol, None)
+        logger.info(f"📉 Position retirée de la surveillance: {symbol}")
     
     def update_position_stops(self, symbol: str, stop_loss: Optional[float] = None, 
                             take_profit: Optional[float] = None):
         """Mettre à jour les stops d'une position"""
-        if symbol in self.monitored_positions:
-            monitor = self.monitored_positions[symbol]
+        with self._positions_lock:
+            table = self.monitored_positions
+            row = table.symbol_idx.get(symbol)
+            if row is None:
+                return
             if stop_loss is not None:
-                monitor.stop_loss = stop_loss
+                table.stop_loss[row] = stop_loss
             if take_profit is not None:
-                monitor.take_profit = take_profit
-            
-            logger.info(f"🎯 Stops mis à jour pour {symbol}")
+                table.take_profit[row] = take_profit
+        
+        logger.info(f"🎯 Stops mis à jour pour {symbol}")
     
     def start_monitoring(self):
         """Démarrer la surveillance"""
@@ -254,8 +660,11 @@ class MonitoringSystem:
         self.status = MonitoringStatus.RUNNING
         self.stop_event.clear()
         
-        self.monitor_thread = threading.Thread(target=self._monitoring_worker, daemon=True)
-        self.monitor_thread.start()
+        self.market_data_provider.start_stream(self._on_tick)
+        
+        self._worker_future = asyncio.run_coroutine_threadsafe(
+            self._monitoring_worker(), _get_event_loop()
+        )
         
         logger.info("🔍 Surveillance démarrée")
     
@@ -267,8 +676,14 @@ class MonitoringSystem:
         self.status = MonitoringStatus.STOPPED
         self.stop_event.set()
         
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        self.market_data_provider.stop_stream()
+        
+        # Interrompre l'attente en cours sans patienter jusqu'au prochain cycle
+        wakeup = self._wakeup
+        if wakeup is not None:
+            _get_event_loop().call_soon_threadsafe(wakeup.set)
+        if self._worker_future:
+            wait([self._worker_future], timeout=5)
         
         logger.info("🛑 Surveillance arrêtée")
     
@@ -284,19 +699,23 @@ class MonitoringSystem:
             self.status = MonitoringStatus.RUNNING
             logger.info("▶️ Surveillance reprise")
     
-    def _monitoring_worker(self):
+    async def _monitoring_worker(self):
         """Worker principal de surveillance"""
         logger.info("🔄 Worker de surveillance démarré")
+        self._wakeup = asyncio.Event()
         
         while not self.stop_event.is_set():
             try:
                 if self.status == MonitoringStatus.RUNNING:
-                    self._update_all_positions()
-                    self._check_alerts()
-                    self._check_stop_triggers()
+                    # Une seule lecture de l'horloge par cycle, partagée par
+                    # les positions mises à jour et les alertes
+                    await self._update_all_positions(datetime.now())
                 
                 # Attendre avant la prochaine mise à jour
-                self.stop_event.wait(self.update_interval)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.update_interval)
+                except asyncio.TimeoutError:
+                    pass
                 
             except Exception as e:
                 logger.error(f"❌ Erreur dans le worker de surveillance: {e}")
@@ -305,146 +724,296 @@ class MonitoringSystem:
         
         logger.info("🔄 Worker de surveillance arrêté")
     
-    def _update_all_positions(self):
-        """Mettre à jour toutes les positions surveillées"""
-        for symbol, monitor in self.monitored_positions.items():
-            try:
-                # Obtenir le prix actuel
-                current_price = self.market_data_provider.get_real_time_price(symbol)
-                if current_price is None:
-                    continue
-                
-                # Mettre à jour les données
-                old_price = monitor.current_price
-                monitor.current_price = current_price
-                monitor.unrealized_pnl = (current_price - monitor.entry_price) * monitor.quantity
-                monitor.unrealized_pnl_percent = ((current_price - monitor.entry_price) / monitor.entry_price) * 100
-                monitor.last_update = datetime.now()
-                
-                # Vérifier les changements significatifs
-                if old_price > 0:
-                    price_change_percent = abs((current_price - old_price) / old_price)
-                    if price_change_percent >= self.price_change_threshold:
-                        self._create_alert(
-                            AlertLevel.INFO,
-                            f"Mouvement de prix significatif: {symbol}",
-                            f"{symbol}: {old_price:.2f} → {current_price:.2f} ({price_change_percent:.1%})",
-                            symbol
-                        )
-                
-                # Callback pour mise à jour de position
-                if self.on_position_update:
-                    self.on_position_update(symbol, monitor)
-                
-            except Exception as e:
-                logger.error(f"❌ Erreur mise à jour position {symbol}: {e}")
+    def _on_tick(self, symbol: str, price: float, volume: float, timestamp_ms: int):
+        """Enregistrer une transaction reçue du flux WebSocket"""
+        previous = self.market_data_cache.get(symbol)
+        # Variation mesurée depuis le premier prix reçu pour le symbole
+        reference = previous.price - previous.change if previous else price
+        change = price - reference
+        self.market_data_cache[symbol] = MarketData(
+            symbol=symbol,
+            price=price,
+            change=change,
+            change_percent=(change / reference) * 100 if reference else 0.0,
+            volume=int(volume),
+            timestamp=datetime.fromtimestamp(timestamp_ms / 1000)
+        )
+        
+        # Stops vérifiés dès la transaction, sans attendre le prochain cycle
+        if self.status == MonitoringStatus.RUNNING and symbol in self.monitored_positions:
+            asyncio.run_coroutine_threadsafe(self._check_tick(symbol, price), _get_event_loop())
     
-    def _check_alerts(self):
-        """Vérifier les conditions d'alerte"""
-        for symbol, monitor in self.monitored_positions.items():
-            try:
-                # Alerte de perte importante
-                if monitor.unrealized_pnl_percent <= -10:
-                    self._create_alert(
-                        AlertLevel.WARNING,
-                        f"Perte importante: {symbol}",
-                        f"{symbol}: Perte de {monitor.unrealized_pnl_percent:.1f}% (${monitor.unrealized_pnl:.2f})",
-                        symbol
-                    )
-                
-                # Alerte de gain important
-                elif monitor.unrealized_pnl_percent >= 20:
-                    self._create_alert(
-                        AlertLevel.INFO,
-                        f"Gain important: {symbol}",
-                        f"{symbol}: Gain de {monitor.unrealized_pnl_percent:.1f}% (${monitor.unrealized_pnl:.2f})",
-                        symbol
-                    )
-                
-            except Exception as e:
-                logger.error(f"❌ Erreur vérification alertes {symbol}: {e}")
+    async def _check_tick(self, symbol: str, price: float):
+        """Appliquer une transaction à sa position et vérifier ses stops
+        
+        Exécuté sur la boucle de surveillance (comme les cycles) : O(1) par
+        transaction. Seul le franchissement d'un stop déclenche ; les seuils
+        de P&L et les mouvements restent évalués au rythme des cycles.
+        """
+        now = datetime.now()
+        with self._positions_lock:
+            table = self.monitored_positions
+            row = table.symbol_idx.get(symbol)
+            if row is None:
+                return
+            
+            previous = table.current_price[row]
+            entry = table.entry_price[row]
+            table.current_price[row] = price
+            table.unrealized_pnl[row] = (price - entry) * table.quantity[row]
+            if entry:
+                table.unrealized_pnl_percent[row] = (price - entry) / entry * 100
+            table.last_update[row] = now
+            
+            triggers = self._find_stop_triggers(slice(row, row + 1), np.array([price]),
+                                                previous=np.array([previous]))
+        await self._emit(triggers, (), now)
     
-    def _check_stop_triggers(self):
-        """Vérifier les déclenchements de stops"""
-        for symbol, monitor in self.monitored_positions.items():
+    @staticmethod
+    async def _run_callback(callback: Callable, *args):
+        """Appeler un callback, en l'attendant s'il s'agit d'une coroutine
+        
+        Un callback synchrone (appels bloquants au courtier, notifications)
+        s'exécute dans un thread pour ne pas bloquer la boucle partagée.
+        """
+        if asyncio.iscoroutinefunction(callback):
+            await callback(*args)
+        else:
+            await asyncio.to_thread(callback, *args)
+    
+    async def _current_prices(self, symbols: tuple) -> Dict[str, float]:
+        """Prix courants : derniers prix du flux, REST pour les symboles sans transaction"""
+        prices: Dict[str, float] = {}
+        missing = []
+        streaming = self.market_data_provider.is_streaming()
+        for symbol in symbols:
+            market_data = self.market_data_cache.get(symbol) if streaming else None
+            if market_data is not None:
+                prices[symbol] = market_data.price
+            else:
+                missing.append(symbol)
+        
+        # Démarrage à froid ou flux coupé : un seul lot de requêtes concurrentes
+        if missing:
+            prices.update(await self.market_data_provider.get_prices_bulk_async(missing))
+        return prices
+    
+    async def _update_all_positions(self, now: Optional[datetime] = None):
+        """Mettre à jour toutes les positions surveillées
+        
+        Un seul passage vectorisé sur les colonnes : P&L, mouvements de prix,
+        seuils de perte/gain et stops ; alertes et callbacks sont émis ensuite.
+        """
+        # Copie des symboles sous verrou : les ajouts et retraits des requêtes
+        # web pendant l'aller-retour réseau n'affectent pas ce cycle
+        with self._positions_lock:
+            symbols = tuple(self.monitored_positions.symbols)
+        if not symbols:
+            return
+        prices = await self._current_prices(symbols)
+        if now is None:
+            now = datetime.now()
+        
+        with self._positions_lock:
+            triggers, updates = self._scan_positions(prices, now)
+        await self._emit(triggers, updates, now)
+    
+    def _scan_positions(self, prices: Dict[str, float], now: datetime):
+        """Passage vectorisé d'un cycle ; retourne (déclenchements, instantanés)"""
+        table = self.monitored_positions
+        n = len(table)
+        symbols = table.symbols
+        # Prix absents (None) → NaN : ces lignes gardent leur prix précédent
+        new_prices = np.array([prices.get(symbol) for symbol in symbols], dtype=float)
+        updated = ~np.isnan(new_prices)
+        old = table.cycle_price[:n].copy()
+        current = np.where(updated, new_prices, table.current_price[:n])
+        entry = table.entry_price[:n]
+        
+        table.current_price[:n] = current
+        table.cycle_price[:n] = current
+        pnl = table.unrealized_pnl[:n]
+        pnl_percent = table.unrealized_pnl_percent[:n]
+        pnl[:] = (current - entry) * table.quantity[:n]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_percent[:] = (current - entry) / entry * 100
+            moves = np.abs((current - old) / old)
+        
+        updated_rows = np.flatnonzero(updated)
+        for row in updated_rows:
+            table.last_update[row] = now
+        
+        # Seules les lignes signalées repassent en Python
+        pending = self._pending_alerts
+        for row in np.flatnonzero(updated & (old > 0) & (moves >= self.price_change_threshold)):
+            symbol = symbols[row]
+            pending.append((
+                AlertLevel.INFO,
+                f"Mouvement de prix significatif: {symbol}",
+                f"{symbol}: {old[row]:.2f} → {current[row]:.2f} ({moves[row]:.1%})",
+                symbol
+            ))
+        for row in np.flatnonzero(pnl_percent <= -10):
+            symbol = symbols[row]
+            pending.append((
+                AlertLevel.WARNING,
+                f"Perte importante: {symbol}",
+                f"{symbol}: Perte de {pnl_percent[row]:.1f}% (${pnl[row]:.2f})",
+                symbol
+            ))
+        for row in np.flatnonzero(pnl_percent >= 20):
+            symbol = symbols[row]
+            pending.append((
+                AlertLevel.INFO,
+                f"Gain important: {symbol}",
+                f"{symbol}: Gain de {pnl_percent[row]:.1f}% (${pnl[row]:.2f})",
+                symbol
+            ))
+        triggers = self._find_stop_triggers(slice(0, n), current)
+        
+        # Instantanés pris avant les callbacks, qui peuvent retirer des positions
+        updates = [table.monitor(row) for row in updated_rows] if self.on_position_update else ()
+        return triggers, updates
+    
+    def _find_stop_triggers(self, rows: slice, current: np.ndarray,
+                            previous: Optional[np.ndarray] = None) -> List[tuple]:
+        """Relever les stops atteints sur les lignes rows et mettre leurs alertes en attente
+        
+        Avec previous, seuls les stops franchis depuis ce prix sont retenus.
+        """
+        table = self.monitored_positions
+        stop_loss = table.stop_loss[rows]
+        take_profit = table.take_profit[rows]
+        
+        stop_hits = (stop_loss != 0) & (current <= stop_loss)
+        take_profit_hits = ~stop_hits & (take_profit != 0) & (current >= take_profit)
+        if previous is not None:
+            stop_hits &= previous > stop_loss
+            take_profit_hits &= previous < take_profit
+        
+        symbols = table.symbols[rows]
+        pending = self._pending_alerts
+        triggers = []
+        for i in np.flatnonzero(stop_hits):
+            symbol = symbols[i]
+            pending.append((
+                AlertLevel.CRITICAL,
+                f"Stop-loss déclenché: {symbol}",
+                f"{symbol}: Prix {current[i]:.2f} ≤ Stop-loss {stop_loss[i]:.2f}",
+                symbol
+            ))
+            triggers.append((symbol, 'stop_loss', float(current[i]), float(stop_loss[i])))
+        for i in np.flatnonzero(take_profit_hits):
+            symbol = symbols[i]
+            pending.append((
+                AlertLevel.INFO,
+                f"Take-profit déclenché: {symbol}",
+                f"{symbol}: Prix {current[i]:.2f} ≥ Take-profit {take_profit[i]:.2f}",
+                symbol
+            ))
+            triggers.append((symbol, 'take_profit', float(current[i]), float(take_profit[i])))
+        return triggers
+    
+    async def _emit(self, triggers: List[tuple], updates, now: datetime):
+        """Créer les alertes en attente puis appeler les callbacks"""
+        await self._flush_alerts(now)
+        
+        for monitor in updates:
             try:
-                current_price = monitor.current_price
-                
-                # Vérifier stop-loss
-                if monitor.stop_loss and current_price <= monitor.stop_loss:
-                    self._create_alert(
-                        AlertLevel.CRITICAL,
-                        f"Stop-loss déclenché: {symbol}",
-                        f"{symbol}: Prix {current_price:.2f} ≤ Stop-loss {monitor.stop_loss:.2f}",
-                        symbol
-                    )
-                    
-                    if self.on_stop_trigger:
-                        self.on_stop_trigger(symbol, 'stop_loss', current_price, monitor.stop_loss)
-                
-                # Vérifier take-profit
-                elif monitor.take_profit and current_price >= monitor.take_profit:
-                    self._create_alert(
-                        AlertLevel.INFO,
-                        f"Take-profit déclenché: {symbol}",
-                        f"{symbol}: Prix {current_price:.2f} ≥ Take-profit {monitor.take_profit:.2f}",
-                        symbol
-                    )
-                    
-                    if self.on_stop_trigger:
-                        self.on_stop_trigger(symbol, 'take_profit', current_price, monitor.take_profit)
-                
+                await self._run_callback(self.on_position_update, monitor.symbol, monitor)
             except Exception as e:
-                logger.error(f"❌ Erreur vérification stops {symbol}: {e}")
+                logger.error(f"❌ Erreur mise à jour position {monitor.symbol}: {e}")
+        
+        if self.on_stop_trigger:
+            for symbol, stop_type, current_price, trigger_price in triggers:
+                try:
+                    await self._run_callback(self.on_stop_trigger, symbol, stop_type,
+                                             current_price, trigger_price)
+                except Exception as e:
+                    logger.error(f"❌ Erreur vérification stops {symbol}: {e}")
     
-    def _create_alert(self, level: AlertLevel, title: str, message: str, symbol: Optional[str] = None):
+    async def _flush_alerts(self, now: Optional[datetime] = None):
+        """Créer les alertes relevées pendant le cycle, horodatées à now"""
+        pending, self._pending_alerts = self._pending_alerts, []
+        for level, title, message, symbol in pending:
+            alert = self._create_alert(level, title, message, symbol, timestamp=now)
+            
+            # Callback pour alerte
+            if self.on_alert:
+                await self._run_callback(self.on_alert, alert)
+    
+    def _create_alert(self, level: AlertLevel, title: str, message: str,
+                      symbol: Optional[str] = None, timestamp: Optional[datetime] = None) -> Alert:
         """Créer une nouvelle alerte"""
-        alert_id = f"alert_{int(datetime.now().timestamp())}"
+        # Identifiant unique même pour plusieurs alertes dans la même seconde
+        alert_id = f"alert_{next(self._alert_seq)}"
         
         alert = Alert(
             id=alert_id,
             level=level,
             title=title,
             message=message,
-            symbol=symbol
+            symbol=symbol,
+            timestamp=timestamp
         )
         
+        if len(self.alerts) == self.alerts.maxlen:
+            # La plus ancienne alerte sort de l'historique, donc aussi en tête
+            # de ses index de niveau et de symbole
+            oldest = self.alerts[0]
+            self._alerts_by_id.pop(oldest.id, None)
+            self._alerts_by_level[oldest.level].popleft()
+            if oldest.symbol:
+                by_symbol = self._alerts_by_symbol[oldest.symbol]
+                by_symbol.popleft()
+                if not by_symbol:
+                    del self._alerts_by_symbol[oldest.symbol]
         self.alerts.append(alert)
-        
-        # Garder seulement les 100 dernières alertes
-        if len(self.alerts) > 100:
-            self.alerts = self.alerts[-100:]
+        self._alerts_by_id[alert_id] = alert
+        self._alerts_by_level[level].append(alert)
+        if symbol:
+            by_symbol = self._alerts_by_symbol.get(symbol)
+            if by_symbol is None:
+                by_symbol = self._alerts_by_symbol[symbol] = deque(maxlen=self.alerts.maxlen)
+            by_symbol.append(alert)
         
         logger.info(f"🚨 {level.value.upper()}: {title}")
-        
-        # Callback pour alerte
-        if self.on_alert:
-            self.on_alert(alert)
+        return alert
     
     def get_alerts(self, level: Optional[AlertLevel] = None, symbol: Optional[str] = None, 
                   limit: int = 50) -> List[Alert]:
         """Obtenir les alertes"""
-        alerts = self.alerts
+        # Index le plus étroit ; l'autre critère éventuel reste un filtre
+        if level and symbol:
+            by_level = self._alerts_by_level[level]
+            by_symbol = self._alerts_by_symbol.get(symbol, ())
+            if len(by_level) <= len(by_symbol):
+                index, level = by_level, None
+            else:
+                index, symbol = by_symbol, None
+        elif level:
+            index, level = self._alerts_by_level[level], None
+        elif symbol:
+            index, symbol = self._alerts_by_symbol.get(symbol, ()), None
+        else:
+            index = self.alerts
         
-        # Filtrer par niveau
+        # Copie atomique (le worker peut ajouter une alerte pendant la lecture),
+        # parcourue de la plus récente à la plus ancienne : aucun tri nécessaire
+        alerts = reversed(tuple(index))
         if level:
-            alerts = [a for a in alerts if a.level == level]
-        
-        # Filtrer par symbole
+            alerts = (a for a in alerts if a.level == level)
         if symbol:
-            alerts = [a for a in alerts if a.symbol == symbol]
+            alerts = (a for a in alerts if a.symbol == symbol)
         
-        # Trier par timestamp décroissant et limiter
-        alerts = sorted(alerts, key=lambda a: a.timestamp, reverse=True)
-        return alerts[:limit]
+        return list(islice(alerts, limit))
     
     def acknowledge_alert(self, alert_id: str):
         """Acquitter une alerte"""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                alert.acknowledged = True
-                logger.info(f"✅ Alerte acquittée: {alert_id}")
-                break
+        alert = self._alerts_by_id.get(alert_id)
+        if alert is not None:
+            alert.acknowledged = True
+            logger.info(f"✅ Alerte acquittée: {alert_id}")
     
     def get_monitoring_status(self) -> Dict[str, Any]:
         """Obtenir le statut de surveillance"""
@@ -452,22 +1021,24 @@ class MonitoringSystem:
             'status': self.status.value,
             'monitored_positions': len(self.monitored_positions),
             'total_alerts': len(self.alerts),
-            'unacknowledged_alerts': len([a for a in self.alerts if not a.acknowledged]),
+            'unacknowledged_alerts': sum(1 for a in tuple(self.alerts) if not a.acknowledged),
             'update_interval': self.update_interval,
             'last_update': datetime.now().isoformat()
         }
     
     def get_position_summary(self) -> Dict[str, Any]:
         """Obtenir un résumé des positions surveillées"""
-        if not self.monitored_positions:
-            return {'total_positions': 0, 'total_pnl': 0, 'positions': []}
-        
-        total_pnl = sum(monitor.unrealized_pnl for monitor in self.monitored_positions.values())
+        with self._positions_lock:
+            table = self.monitored_positions
+            if not table:
+                return {'total_positions': 0, 'total_pnl': 0, 'positions': []}
+            total_pnl = float(table.unrealized_pnl[:len(table)].sum())
+            monitors = [table.monitor(row) for row in range(len(table))]
         
         positions = []
-        for symbol, monitor in self.monitored_positions.items():
+        for monitor in monitors:
             positions.append({
-                'symbol': symbol,
+                'symbol': monitor.symbol,
                 'current_price': monitor.current_price,
                 'entry_price': monitor.entry_price,
                 'quantity': monitor.quantity,
@@ -477,7 +1048,7 @@ class MonitoringSystem:
             })
         
         return {
-            'total_positions': len(self.monitored_positions),
+            'total_positions': len(monitors),
             'total_pnl': total_pnl,
             'positions': positions
         }
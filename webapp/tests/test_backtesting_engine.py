@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de backtesting
+Comparaison différentielle des noyaux vectorisés (prix alignés, masques de
+signaux, simulation jour par jour) avec une implémentation Python naïve ;
+passage des matrices par mémoire partagée
+"""
+
+import sys
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+import backtesting_engine
+from backtesting_engine import (
+    DataProvider, DEFAULT_CACHE_DIR, backtest_engine, _release_shared, _run_backtest_pure,
+    _run_backtest_shared, _to_shared
+)
+
+QUANTITY = 100  # Quantité fixe de la simulation
+
+
+def make_market(seed, n_symbols=4, n_days=120):
+    """Cotations aléatoires (marche aléatoire), chaque symbole avec des jours manquants"""
+    rng = np.random.default_rng(seed)
+    calendar = pd.bdate_range("2023-01-02", periods=n_days)
+    data = {}
+    for j in range(n_symbols):
+        # Première cotation décalée et trous aléatoires dans l'historique
+        start = int(rng.integers(0, n_days // 4))
+        keep = rng.random(n_days - start) > 0.15
+        index = calendar[start:][keep]
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.03, len(index))))
+        data[f"S{j}"] = pd.DataFrame({"Close": close}, index=index)
+    symbols = list(data)
+    trading_dates = data[symbols[0]].index
+    for symbol in symbols[1:]:
+        trading_dates = trading_dates.union(data[symbol].index)
+    return data, symbols, trading_dates.sort_values()
+
+
+def reference_prices(data, symbols, trading_dates):
+    """Dernier cours connu à chaque date, 0 avant la première cotation"""
+    prices = np.zeros((len(trading_dates), len(symbols)))
+    for i, date in enumerate(trading_dates):
+        for j, symbol in enumerate(symbols):
+            known = data[symbol]["Close"][data[symbol].index <= date]
+            if len(known):
+                prices[i, j] = known.iloc[-1]
+    return prices
+
+
+def reference_masks(data, symbols, trading_dates):
+    """Signaux momentum jour par jour : cours / moyenne des 20 dernières cotations"""
+    buy = np.zeros((len(trading_dates), len(symbols)), dtype=bool)
+    sell = np.zeros_like(buy)
+    for i, date in enumerate(trading_dates):
+        if i < 20:
+            continue
+        for j, symbol in enumerate(symbols):
+            close = data[symbol]["Close"]
+            if date not in close.index:
+                continue
+            pos = close.index.get_loc(date)
+            if pos < 20:
+                continue
+            ratio = close.iloc[pos] / close.iloc[pos - 19:pos + 1].mean()
+            buy[i, j] = ratio > 1.02
+            sell[i, j] = ratio < 0.98
+    return buy, sell
+
+
+def reference_simulation(prices, buy, sell, initial_capital, commission, slippage):
+    """Simulation naïve : tous les jours, tous les symboles, arithmétique Python"""
+    cash = initial_capital
+    positions = [0] * prices.shape[1]
+    trades = []
+    equity = []
+    for i in range(len(prices)):
+        # Valorisation au début de la journée, avant les trades (comme à l'origine)
+        positions_value = sum(q * float(p) for q, p in zip(positions, prices[i]))
+        total_value = cash + positions_value
+        for j in range(prices.shape[1]):
+            price = float(prices[i, j])
+            if buy[i, j]:
+                execution_price = price * (1 + slippage)
+                value = QUANTITY * execution_price
+                cost = value * commission
+                if cash >= value + cost:
+                    cash -= value + cost
+                    positions[j] += QUANTITY
+                    trades.append((j, i, 1, execution_price, cost))
+            elif sell[i, j]:
+                execution_price = price * (1 - slippage)
+                value = QUANTITY * execution_price
+                cost = value * commission
+                if positions[j] >= QUANTITY:
+                    cash += value - cost
+                    positions[j] -= QUANTITY
+                    trades.append((j, i, -1, execution_price, cost))
+        equity.append((total_value, cash, positions_value))
+    return trades, equity
+
+
+@pytest.mark.parametrize("seed", range(6))
+class TestDifferential:
+    """Comparaison avec l'implémentation naïve"""
+
+    def test_aligned_prices(self, seed):
+        """Matrice des prix alignés identique à la recherche naïve"""
+        data, symbols, trading_dates = make_market(seed)
+        prices = backtest_engine._align_close_prices(data, symbols, trading_dates)
+        np.testing.assert_array_equal(prices, reference_prices(data, symbols, trading_dates))
+
+    def test_signal_masks(self, seed):
+        """Masques d'achat/vente identiques au calcul jour par jour"""
+        data, symbols, trading_dates = make_market(seed)
+        buy, sell = backtest_engine._compute_signal_masks(data, symbols, trading_dates)
+        ref_buy, ref_sell = reference_masks(data, symbols, trading_dates)
+        np.testing.assert_array_equal(buy, ref_buy)
+        np.testing.assert_array_equal(sell, ref_sell)
+        assert buy.any() and sell.any()
+
+    def test_simulation(self, seed):
+        """Trades et courbe d'équité identiques à la simulation naïve"""
+        data, symbols, trading_dates = make_market(seed)
+        prices = backtest_engine._align_close_prices(data, symbols, trading_dates)
+        buy, sell = backtest_engine._compute_signal_masks(data, symbols, trading_dates)
+        initial_capital = random.Random(seed).choice([12_000.0, 30_000.0, 100_000.0])
+        dates = trading_dates.to_numpy(dtype="datetime64[ns]")
+
+        simulation = _run_backtest_pure(symbols, dates, prices, buy, sell,
+                                        initial_capital, 0.001, 0.0005)
+        ref_trades, ref_equity = reference_simulation(prices, buy, sell,
+                                                      initial_capital, 0.001, 0.0005)
+
+        trades = simulation["trades"]
+        assert len(trades) == len(ref_trades) > 0
+        np.testing.assert_array_equal(trades["sym_idx"], [t[0] for t in ref_trades])
+        np.testing.assert_array_equal(trades["entry_date"], dates[[t[1] for t in ref_trades]])
+        np.testing.assert_array_equal(trades["side"], [t[2] for t in ref_trades])
+        np.testing.assert_array_equal(trades["entry_px"], np.float32([t[3] for t in ref_trades]))
+        np.testing.assert_array_equal(trades["commission"], np.float32([t[4] for t in ref_trades]))
+        assert (trades["qty"] == QUANTITY).all()
+
+        is_sell = trades["side"] < 0
+        np.testing.assert_array_equal(trades["exit_date"][is_sell], trades["entry_date"][is_sell])
+        assert np.isnat(trades["exit_date"][~is_sell]).all()
+
+        equity = simulation["equity"]
+        np.testing.assert_array_equal(equity["date"], dates)
+        for field, column in (("equity", 0), ("cash", 1), ("positions_value", 2)):
+            np.testing.assert_allclose(equity[field], [e[column] for e in ref_equity], rtol=1e-6)
+
+
+class TestSharedMemory:
+    """Tests du passage des matrices par mémoire partagée"""
+
+    def test_shared_run_matches_direct_run(self):
+        """La simulation sur segments partagés égale la simulation directe"""
+        data, symbols, trading_dates = make_market(0)
+        prices = backtest_engine._align_close_prices(data, symbols, trading_dates)
+        buy, sell = backtest_engine._compute_signal_masks(data, symbols, trading_dates)
+        dates = trading_dates.to_numpy(dtype="datetime64[ns]")
+
+        blocks, shared = [], {}
+        try:
+            for key, array in (("prices", prices), ("buy_mask", buy), ("sell_mask", sell)):
+                shm, shared[key] = _to_shared(array)
+                blocks.append(shm)
+            simulation = _run_backtest_shared(symbols, dates, shared, 100_000.0, 0.001, 0.0005)
+        finally:
+            _release_shared(blocks)
+
+        direct = _run_backtest_pure(symbols, dates, prices, buy, sell, 100_000.0, 0.001, 0.0005)
+        for key in ("trades", "equity"):
+            assert simulation[key].tobytes() == direct[key].tobytes()
+
+    def test_failed_copy_unlinks_segment(self, monkeypatch):
+        """Un échec de copie libère le segment créé au lieu de le laisser dans /dev/shm"""
+        real_shared_memory = backtesting_engine.shared_memory.SharedMemory
+        created = []
+
+        def tracking_shared_memory(*args, **kwargs):
+            shm = real_shared_memory(*args, **kwargs)
+            created.append(shm.name)
+            return shm
+        monkeypatch.setattr(backtesting_engine.shared_memory, "SharedMemory", tracking_shared_memory)
+
+        class FailingArray:
+            """Tableau dont la copie échoue comme un /dev/shm plein"""
+            shape = (4,)
+            dtype = np.dtype(np.float64)
+            nbytes = 32
+
+            def __array__(self, *args, **kwargs):
+                raise OSError(28, "No space left on device")
+
+        with pytest.raises(OSError):
+            _to_shared(FailingArray())
+
+        assert len(created) == 1
+        with pytest.raises(FileNotFoundError):
+            real_shared_memory(name=created[0])
+
+
+class TestDiskCache:
+    """Tests de l'emplacement du cache disque Parquet"""
+
+    def test_default_dir_next_to_module(self, tmp_path, monkeypatch):
+        """Le répertoire par défaut ne dépend pas du répertoire courant"""
+        monkeypatch.chdir(tmp_path)
+        provider = DataProvider()
+        assert provider.cache_dir == Path(backtesting_engine.__file__).resolve().parent / "backtest_cache"
+        assert provider.cache_dir == DEFAULT_CACHE_DIR
+        assert list(tmp_path.iterdir()) == []
+
+    def test_dir_created_on_first_write(self, tmp_path):
+        """Le répertoire n'est créé qu'à la première écriture"""
+        cache_dir = tmp_path / "cache"
+        provider = DataProvider(cache_dir=str(cache_dir))
+        assert not cache_dir.exists()
+        assert provider._load_from_disk("AAPL", "2024-01-01", "2024-02-01") is None
+        provider.clear_cache()
+        assert not cache_dir.exists()
+
+        frame = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.bdate_range("2024-01-02", periods=2))
+        provider._save_to_disk("AAPL", "2024-01-01", "2024-02-01", frame)
+        assert cache_dir.is_dir()
+
+    def test_round_trip(self, tmp_path):
+        """Un symbole écrit est relu depuis le cache disque"""
+        pytest.importorskip("pyarrow")
+        provider = DataProvider(cache_dir=str(tmp_path / "cache"))
+        frame = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.bdate_range("2024-01-02", periods=2))
+        provider._save_to_disk("AAPL", "2024-01-01", "2024-02-01", frame)
+        pd.testing.assert_frame_equal(provider._load_from_disk("AAPL", "2024-01-01", "2024-02-01"), frame,
+                                      check_freq=False)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Tests du gestionnaire de courtage
+Courtier simulé : positions en colonnes NumPy comparées à la tenue de
+positions d'origine (dictionnaire de Position) ; suivi des ordres Alpaca sur
+le canal WebSocket
+"""
+
+import sys
+import json
+import random
+import threading
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+from brokerage_manager import (
+    AlpacaBroker, Order, OrderSide, OrderStatus, OrderType, PaperTradingBroker, Position
+)
+
+
+class ReferenceBroker:
+    """Référence : tenue de positions d'origine, un objet Position par symbole"""
+
+    def __init__(self, initial_cash):
+        self.cash = initial_cash
+        self.positions = {}
+
+    def execute(self, symbol, quantity, side, price):
+        """Exécuter un ordre comme l'implémentation d'origine"""
+        total_cost = quantity * price
+        if side == OrderSide.BUY:
+            if self.cash < total_cost:
+                raise Exception("Fonds insuffisants")
+            self.cash -= total_cost
+            if symbol in self.positions:
+                pos = self.positions[symbol]
+                new_quantity = pos.quantity + quantity
+                pos.avg_price = ((pos.quantity * pos.avg_price) + total_cost) / new_quantity
+                pos.quantity = new_quantity
+                pos.market_value = new_quantity * price
+            else:
+                self.positions[symbol] = Position(symbol, quantity, price, total_cost, 0.0, "long")
+        else:
+            if symbol not in self.positions:
+                raise Exception("Aucune position à vendre")
+            pos = self.positions[symbol]
+            if pos.quantity < quantity:
+                raise Exception("Position insuffisante")
+            self.cash += total_cost
+            pos.quantity -= quantity
+            if pos.quantity == 0:
+                del self.positions[symbol]
+            else:
+                pos.market_value = pos.quantity * price
+
+    def portfolio_value(self):
+        """Cash plus valeur de marché des positions"""
+        return self.cash + sum(pos.market_value for pos in self.positions.values())
+
+
+@pytest.fixture
+def broker():
+    """Courtier simulé connecté"""
+    paper = PaperTradingBroker(initial_cash=10_000.0)
+    paper.connect()
+    return paper
+
+
+def positions_by_symbol(broker):
+    """Positions du courtier indexées par symbole"""
+    return {pos.symbol: pos for pos in broker.get_positions()}
+
+
+class TestPaperPositions:
+    """Tests de la tenue des positions du courtier simulé"""
+
+    def test_open_add_close_reopen(self, broker):
+        """Ouverture, renforcement, clôture puis réouverture d'une position"""
+        broker.place_order("AAPL", 10, OrderSide.BUY, price=100.0)
+        broker.place_order("AAPL", 10, OrderSide.BUY, price=120.0)
+        position = positions_by_symbol(broker)["AAPL"]
+        assert position.quantity == 20
+        assert position.avg_price == pytest.approx(110.0)
+        assert position.market_value == pytest.approx(2400.0)
+        assert broker.cash == pytest.approx(7800.0)
+
+        broker.place_order("AAPL", 20, OrderSide.SELL, price=130.0)
+        assert broker.get_positions() == []
+        assert broker.cash == pytest.approx(10_400.0)
+        assert broker.get_account_info()["portfolio_value"] == pytest.approx(10_400.0)
+
+        broker.place_order("AAPL", 5, OrderSide.BUY, price=90.0)
+        position = positions_by_symbol(broker)["AAPL"]
+        assert position.quantity == 5
+        assert position.avg_price == pytest.approx(90.0)
+        assert broker.get_account_info()["portfolio_value"] == pytest.approx(10_400.0)
+
+    def test_zero_quantity_buy_on_new_symbol(self, broker):
+        """Un achat de quantité nulle sur un symbole inconnu ne corrompt pas l'état"""
+        broker.place_order("MSFT", 0, OrderSide.BUY, price=50.0)
+        account = broker.get_account_info()
+        assert isinstance(account["portfolio_value"], float)
+        assert account["portfolio_value"] == pytest.approx(10_000.0)
+
+        broker.place_order("MSFT", 3, OrderSide.BUY, price=50.0)
+        broker.place_order("MSFT", 3, OrderSide.SELL, price=50.0)
+        assert "MSFT" not in positions_by_symbol(broker)
+        assert broker.get_account_info()["portfolio_value"] == pytest.approx(10_000.0)
+
+    def test_rejected_orders_leave_state_unchanged(self, broker):
+        """Fonds ou position insuffisants : exception et état inchangé"""
+        broker.place_order("SPY", 2, OrderSide.BUY, price=100.0)
+        with pytest.raises(Exception, match="Fonds insuffisants"):
+            broker.place_order("SPY", 1000, OrderSide.BUY, price=100.0)
+        with pytest.raises(Exception, match="Position insuffisante"):
+            broker.place_order("SPY", 3, OrderSide.SELL, price=100.0)
+        with pytest.raises(Exception, match="Aucune position à vendre"):
+            broker.place_order("QQQ", 1, OrderSide.SELL, price=100.0)
+        assert broker.cash == pytest.approx(9800.0)
+        assert positions_by_symbol(broker)["SPY"].quantity == 2
+
+    def test_random_orders_match_reference(self, monkeypatch):
+        """Ordres aléatoires : même cash, mêmes positions et même valeur que la référence"""
+        # Capacité réduite pour exercer l'agrandissement des colonnes
+        monkeypatch.setattr(PaperTradingBroker, "POSITIONS_CAPACITY", 2)
+        rng = random.Random(3)
+        broker = PaperTradingBroker(initial_cash=50_000.0)
+        reference = ReferenceBroker(50_000.0)
+        for _ in range(3000):
+            symbol = f"S{rng.randrange(12)}"
+            side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+            quantity = rng.choice([1, 2, 5, 10, 25])
+            held = reference.positions.get(symbol)
+            if side == OrderSide.SELL and held is not None and rng.random() < 0.5:
+                quantity = held.quantity  # clôture complète
+            price = float(rng.randint(10, 400))
+
+            try:
+                reference.execute(symbol, quantity, side, price)
+            except Exception as e:
+                with pytest.raises(Exception, match=str(e)):
+                    broker.place_order(symbol, quantity, side, price=price)
+                continue
+            broker.place_order(symbol, quantity, side, price=price)
+
+            assert broker.cash == pytest.approx(reference.cash)
+            assert broker.get_account_info()["portfolio_value"] == pytest.approx(
+                reference.portfolio_value())
+        positions = positions_by_symbol(broker)
+        assert sorted(positions) == sorted(reference.positions)
+        for symbol, expected in reference.positions.items():
+            assert positions[symbol].quantity == expected.quantity
+            assert positions[symbol].avg_price == pytest.approx(expected.avg_price)
+            assert positions[symbol].market_value == pytest.approx(expected.market_value)
+
+
+class ClosedSocket:
+    """Canal WebSocket dont la lecture échoue (connexion perdue)"""
+
+    def recv(self):
+        raise ConnectionError("connexion perdue")
+
+    def close(self):
+        pass
+
+
+def make_order(order_id):
+    """Construire un ordre Alpaca envoyé"""
+    return Order(id=order_id, symbol="SPY", quantity=1, side=OrderSide.BUY,
+                 order_type=OrderType.MARKET)
+
+
+def trade_update(order_id, event, **order_fields):
+    """Message trade_updates pour un ordre"""
+    return {"stream": "trade_updates",
+            "data": {"event": event, "order": {"client_order_id": order_id, **order_fields}}}
+
+
+@pytest.fixture
+def alpaca():
+    """Courtier Alpaca sans connexion réseau"""
+    return AlpacaBroker("key", "secret")
+
+
+class TestOrderChannel:
+    """Tests des attentes d'acquittement sur le canal WebSocket"""
+
+    def test_lost_channel_wakes_waiters(self, alpaca):
+        """Une connexion perdue réveille les attentes, qui basculent sur REST"""
+        alpaca._track_order(make_order("o1"))
+        alpaca._ws = ClosedSocket()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(alpaca.wait_for_order("o1", timeout=10)))
+        waiter.start()
+
+        alpaca._ack_loop()
+        waiter.join(timeout=5)
+
+        assert not waiter.is_alive()
+        assert results == [alpaca.get_order_status("o1")]
+        assert alpaca._ws is None
+        assert alpaca._pending_by_id == {}
+
+    def test_disconnect_wakes_waiters(self, alpaca):
+        """disconnect() réveille les attentes en cours"""
+        tracked = alpaca._track_order(make_order("o1"))
+        alpaca._ws = ClosedSocket()
+        alpaca.disconnect()
+        assert tracked.done.is_set()
+        assert alpaca.wait_for_order("o1", timeout=0) == alpaca.get_order_status("o1")
+
+    def test_evicted_order_is_released(self, alpaca, monkeypatch):
+        """Un ordre sorti du suivi n'est plus attendu sur le canal"""
+        monkeypatch.setattr(AlpacaBroker, "PENDING_CAPACITY", 2)
+        first = alpaca._track_order(make_order("o1"))
+        alpaca._track_order(make_order("o2"))
+        alpaca._track_order(make_order("o3"))
+        assert first.done.is_set()
+        assert list(alpaca._pending_by_id) == ["o2", "o3"]
+
+    def test_terminal_orders_free_capacity(self, alpaca, monkeypatch):
+        """Les ordres terminés libèrent leur place : les ordres actifs ne sont pas évincés"""
+        monkeypatch.setattr(AlpacaBroker, "PENDING_CAPACITY", 2)
+        for i in range(10):
+            alpaca._track_order(make_order(f"done{i}"))
+            alpaca._dispatch_ack(trade_update(f"done{i}", "fill", filled_avg_price="10.5"))
+        live = [alpaca._track_order(make_order(f"live{i}")) for i in range(2)]
+        assert not any(tracked.done.is_set() for tracked in live)
+        assert list(alpaca._pending_by_id) == ["live0", "live1"]
+
+    def test_invalid_fill_fields_still_complete(self, alpaca):
+        """Un champ d'exécution invalide n'empêche pas la fin de l'attente"""
+        tracked = alpaca._track_order(make_order("o1"))
+        with pytest.raises(ValueError):
+            alpaca._dispatch_ack(trade_update("o1", "fill", filled_avg_price="n/a"))
+        assert tracked.done.is_set()
+        assert alpaca.wait_for_order("o1", timeout=0) == OrderStatus.FILLED
+
+    def test_fill_acknowledged_through_loop(self, alpaca):
+        """Un acquittement reçu par la boucle termine l'attente avec le prix exécuté"""
+        tracked = alpaca._track_order(make_order("o1"))
+        messages = iter([json.dumps(trade_update("o1", "new")),
+                         json.dumps(trade_update("o1", "fill", filled_avg_price="451.25",
+                                                 filled_at="2024-01-02T15:30:00Z"))])
+
+        class Socket(ClosedSocket):
+            def recv(self):
+                return next(messages)  # StopIteration ensuite : fin du canal
+        alpaca._ws = Socket()
+        alpaca._ack_loop()
+
+        assert tracked.done.is_set()
+        assert tracked.order.status == OrderStatus.FILLED
+        assert tracked.order.filled_price == 451.25
+
+    def test_default_wait_is_bounded(self, alpaca, monkeypatch):
+        """Sans timeout explicite, l'attente est bornée par ORDER_WAIT_TIMEOUT"""
+        monkeypatch.setattr(AlpacaBroker, "ORDER_WAIT_TIMEOUT", 0.05)
+        alpaca._track_order(make_order("o1"))
+        assert alpaca.wait_for_order("o1") is None
+
+
+class TestLazyImports:
+    """Tests des imports différés du module"""
+
+    def test_numpy_imported_with_paper_broker(self):
+        """NumPy n'est chargé qu'à la création du courtier simulé"""
+        script = (
+            "import sys, brokerage_manager\n"
+            "print('numpy' in sys.modules)\n"
+            "brokerage_manager.PaperTradingBroker()\n"
+            "print('numpy' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], cwd=webapp_dir,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.split() == ["False", "True"]
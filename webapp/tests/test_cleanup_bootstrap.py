@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Tests du nettoyeur de classes Bootstrap
+Comparaison différentielle de l'alternative unique (trie, colonnes,
+espacement) avec un balayage de référence
+"""
+
+import re
+import sys
+import random
+import shutil
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+from cleanup_bootstrap import BootstrapCleaner, _CLASS_SPAN_RE, _trie_pattern
+
+
+class ReferenceCleaner:
+    """Référence : balayage caractère par caractère, sans trie ni alternative
+    unique. À chaque position, la plus longue classe directe est essayée, puis
+    la règle des colonnes, puis celle de l'espacement ; chaque classe est donc
+    réécrite au plus une fois"""
+
+    def __init__(self, replacements):
+        self.replacements = replacements
+        self.direct_res = [(re.compile(r'\b%s\b' % re.escape(key)), key)
+                           for key in sorted(replacements, key=len, reverse=True)]
+        self.col_re = re.compile(r'col-(\w+)-(\d+)')
+        self.spacing_re = re.compile(r'\b([mp])([btlrxy]?)-(\d+)\b')
+
+    def _rewrite(self, token):
+        """Réécrire une classe inconnue de la table directe"""
+        out = []
+        i = 0
+        while i < len(token):
+            for pattern, key in self.direct_res:
+                if pattern.match(token, i):
+                    out.append(self.replacements[key])
+                    i += len(key)
+                    break
+            else:
+                match = self.col_re.match(token, i)
+                if match:
+                    out.append(self._col(match))
+                else:
+                    match = self.spacing_re.match(token, i)
+                    if match:
+                        out.append(self._spacing(match))
+                if match:
+                    i = match.end()
+                else:
+                    out.append(token[i])
+                    i += 1
+        return ''.join(out)
+
+    @staticmethod
+    def _col(match):
+        breakpoint, size = match.group(1), int(match.group(2))
+        if size == 12:
+            return 'w-full'
+        width = {6: 'w-1/2', 4: 'w-1/3', 3: 'w-1/4', 8: 'w-2/3'}.get(size, f'w-{size}/12')
+        return width if breakpoint == 'col' else f'{breakpoint}:{width}'
+
+    @staticmethod
+    def _spacing(match):
+        size = int(match.group(3))
+        new_size = {0: '0', 1: '1', 2: '2', 3: '3', 4: '4', 5: '6'}.get(size, str(size))
+        return f'{match.group(1)}{match.group(2)}-{new_size}'
+
+    def transform(self, classes, is_div):
+        """Réécrire le contenu d'un attribut class"""
+        tokens = classes.split()
+        out = []
+        for token in tokens:
+            if token in self.replacements:
+                new = self.replacements[token]
+            else:
+                new = self._rewrite(token)
+            if new:
+                out.append(new)
+        if is_div and tokens and tokens[0] == 'row':
+            out[0] = 'grid gap-6'
+        return ' '.join(out)
+
+    def clean(self, content):
+        """Nettoyer un document (octets)"""
+        def span(match):
+            prefix = match.group(1)
+            classes = self.transform(match.group(2).decode(), prefix == b'<div ')
+            if not classes:
+                return prefix
+            return prefix + b'class="%s"' % classes.encode()
+        return _CLASS_SPAN_RE.sub(span, content)
+
+
+@pytest.fixture(scope="module")
+def cleaner():
+    """Nettoyeur partagé (tables regex construites une fois)"""
+    return BootstrapCleaner()
+
+
+@pytest.fixture(scope="module")
+def reference(cleaner):
+    """Nettoyeur de référence sur la même table de remplacements"""
+    return ReferenceCleaner(cleaner.class_replacements)
+
+
+def clean_content(cleaner, content):
+    """Réécrire les attributs class d'un contenu comme clean_file"""
+    return _CLASS_SPAN_RE.sub(cleaner._sub_class_span, content)
+
+
+def random_token(rng, keys):
+    """Classe aléatoire : clé connue, colonne, espacement, préfixée ou bruit"""
+    kind = rng.randrange(6)
+    if kind == 0:
+        token = rng.choice(keys)
+    elif kind == 1:
+        token = f"col-{rng.choice(['md', 'lg', 'sm', 'col', 'x1'])}-{rng.randint(0, 13)}"
+    elif kind == 2:
+        token = f"{rng.choice('mp')}{rng.choice(['', 't', 'b', 'l', 'r', 'x', 'y', 'e', 's'])}-{rng.randint(0, 7)}"
+    elif kind == 3:
+        token = rng.choice(['row', 'card', 'btn', 'w-25', 'h-50', 'text-xs', 'grid', 'flex'])
+    elif kind == 4:
+        token = rng.choice(keys) + rng.choice(['x', '-x', '-', '2', ':'])
+    else:
+        token = '-'.join(rng.choice(keys + ['col', 'md', 'mb', '3', 'x']) for _ in range(rng.randint(2, 3)))
+    if rng.random() < 0.2:
+        token = rng.choice(['lg:', 'md:', 'hover:', 'x-']) + token
+    return token
+
+
+class TestTriePattern:
+    """Tests de l'alternative factorisée par préfixes"""
+
+    def test_matches_longest_first_alternation(self):
+        """Même correspondances qu'une alternative triée par longueur décroissante"""
+        rng = random.Random(11)
+        for _ in range(300):
+            words = {''.join(rng.choice('ab-') for _ in range(rng.randint(1, 5))).encode()
+                     for _ in range(rng.randint(1, 8))}
+            trie_re = re.compile(b'(?:%s)' % _trie_pattern(words))
+            flat_re = re.compile(b'|'.join(map(re.escape, sorted(words, key=len, reverse=True))))
+            for _ in range(20):
+                haystack = ''.join(rng.choice('ab-c ') for _ in range(rng.randint(0, 20))).encode()
+                assert trie_re.findall(haystack) == flat_re.findall(haystack), (words, haystack)
+
+
+class TestClassAttributeScope:
+    """Tests de la portée des règles de classes"""
+
+    @pytest.mark.parametrize("content", [
+        '<input data-class="form-check-input">',
+        '<div :class="{\'d-none\': x}">',
+        '<p ng-class="text-muted">',
+        '<p v-bind:class="mb-3">',
+        '<div x-class="">',
+    ])
+    def test_prefixed_attributes_untouched(self, cleaner, content):
+        """data-class, :class, ng-class... ne sont ni réécrits ni supprimés"""
+        assert clean_content(cleaner, content.encode()) == content.encode()
+
+    def test_prefixed_and_plain_attribute(self, cleaner):
+        """Seul l'attribut class ordinaire d'une balise est réécrit"""
+        content = b'<input data-class="form-check-input" class="mb-3">'
+        assert clean_content(cleaner, content) == b'<input data-class="form-check-input" class="mb-4">'
+
+    def test_row_grid_only_on_div(self, cleaner):
+        """La grille n'est appliquée qu'à class="row" d'un <div"""
+        assert clean_content(cleaner, b'<div class="row mb-3">') == b'<div class="grid gap-6 mb-4">'
+        assert clean_content(cleaner, b'<div data-x="1" class="row">') == b'<div data-x="1" class="row">'
+        assert clean_content(cleaner, b'<div data-class="row">') == b'<div data-class="row">'
+
+    def test_attribute_at_start_of_content(self, cleaner):
+        """Un attribut en tout début de contenu est aussi traité"""
+        assert clean_content(cleaner, b'class="d-none"') == b'class="hidden"'
+
+
+class TestDifferential:
+    """Comparaison avec le balayage de référence"""
+
+    def test_random_class_lists(self, cleaner, reference):
+        """Listes de classes aléatoires : même réécriture que la référence"""
+        rng = random.Random(2024)
+        keys = list(cleaner.class_replacements)
+        for _ in range(20000):
+            tokens = [random_token(rng, keys) for _ in range(rng.randint(0, 6))]
+            classes = rng.choice([' ', '  ', '\t', '\n ']).join(tokens)
+            is_div = rng.random() < 0.5
+            expected = reference.transform(classes, is_div)
+            assert cleaner._transform_classes(classes.encode(), is_div).decode() == expected, classes
+
+    def test_changed_attribute_is_counted(self, cleaner):
+        """Toute réécriture d'une classe est comptée dans le rapport"""
+        rng = random.Random(7)
+        keys = list(cleaner.class_replacements)
+        for _ in range(5000):
+            classes = ' '.join(random_token(rng, keys) for _ in range(rng.randint(1, 4)))
+            cleaner._replacement_counts.clear()
+            result = cleaner._transform_classes(classes.encode(), True)
+            if result.split() != classes.encode().split():
+                assert cleaner._replacement_counts, classes
+
+    @pytest.mark.parametrize("template", sorted((webapp_dir / "templates").glob("*.html")),
+                             ids=lambda path: path.name)
+    def test_templates_match_reference(self, cleaner, reference, template, tmp_path):
+        """Templates du dépôt : clean_file (sonde mmap comprise) égale la référence"""
+        copy = tmp_path / template.name
+        shutil.copyfile(template, copy)
+        original = copy.read_bytes()
+
+        changed = cleaner.clean_file(copy)
+
+        expected = reference.clean(original)
+        assert copy.read_bytes() == expected
+        assert changed == (expected != original)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests du gestionnaire de configuration
+Validation des clés et robustesse face aux valeurs mal typées
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+from config_manager import ConfigManager, _VALIDATORS
+
+# Valeurs non hachables ou de mauvais type envoyées à chaque validateur
+BAD_VALUES = [
+    ["x"],
+    [["market"]],
+    {"a": 1},
+    [{"a": 1}],
+    None,
+]
+
+
+class TestValidateConfig:
+    """Tests de validate_config / save_config"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        """Gestionnaire isolé dans un répertoire temporaire"""
+        return ConfigManager(config_dir=str(tmp_path / "configs"))
+
+    @pytest.mark.parametrize("key", sorted(_VALIDATORS))
+    @pytest.mark.parametrize("value", BAD_VALUES, ids=repr)
+    def test_validator_never_raises(self, key, value):
+        """Aucun validateur ne lève d'exception sur une liste ou un dict"""
+        _VALIDATORS[key](value)
+
+    @pytest.mark.parametrize("key", sorted(_VALIDATORS))
+    @pytest.mark.parametrize("value", BAD_VALUES, ids=repr)
+    def test_bad_key_ignored_rest_saved(self, manager, key, value):
+        """Une clé invalide est ignorée, le reste de la configuration est sauvegardé"""
+        assert manager.save_config({key: value, "max_debate_rounds": 4}) is True
+        saved = manager.load_config()
+        assert saved["max_debate_rounds"] == 4
+
+    def test_unhashable_provider_keeps_default(self, manager):
+        """Un fournisseur non hachable conserve la valeur par défaut"""
+        validated = manager.validate_config({"llm_provider": ["x"], "temperature": 1.5})
+        assert validated["llm_provider"] == manager.default_config["llm_provider"]
+        assert validated["temperature"] == 1.5
+
+    def test_analysts_filter_unhashable_entries(self, manager):
+        """Les entrées non hachables de selected_analysts sont écartées"""
+        validated = manager.validate_config(
+            {"selected_analysts": ["market", ["news"], {"a": 1}, "news", "unknown"]}
+        )
+        assert validated["selected_analysts"] == ["market", "news"]
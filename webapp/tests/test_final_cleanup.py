@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests du nettoyage final des classes Bootstrap
+Portée des règles (attributs class uniquement), rapport des changements et
+comparaison différentielle avec une implémentation de référence séquentielle
+"""
+
+import re
+import sys
+import random
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+from final_cleanup import FINAL_REMOVALS, FINAL_REPLACEMENTS, _cleanup_content
+
+
+def reference_cleanup(content):
+    """Référence : passes séquentielles de l'implémentation d'origine, sans
+    alternative unique ni pré-tests, limitées aux attributs class"""
+    fired = set()
+    
+    # Patterns card-header, un re.sub par pattern comme à l'origine
+    new_content = re.sub(r'<div class="card-header">\s*<h[45][^>]*>',
+                         '<div class="card-header">\n                <h3>', content)
+    if new_content != content:
+        fired.add('header_open')
+    content = new_content
+    new_content = re.sub(r'</h[45]>\s*</div>', '</h3>\n            </div>', content)
+    if new_content != content:
+        fired.add('header_close')
+    content = new_content
+    
+    def classes(match):
+        prefix, value = match.group(1), match.group(2)
+        tokens = value.split()
+        kept = []
+        for cls in tokens:
+            if cls in FINAL_REMOVALS:
+                fired.add('me2')
+            elif FINAL_REPLACEMENTS.get(cls, cls) != cls:
+                fired.add(cls)
+                kept.append(FINAL_REPLACEMENTS[cls])
+            else:
+                kept.append(cls)
+        attr = 'class="%s"' % ' '.join(kept) if kept else ''
+        if kept == tokens and attr != match.group(0)[len(prefix):]:
+            fired.add('class_attr')
+        return prefix + attr
+    
+    content = re.sub(r'(^|[^\w:-])class="([^"]*)"', classes, content)
+    
+    changes = [f"{old} → {new}" for old, new in FINAL_REPLACEMENTS.items() if old in fired]
+    changes.extend("Pattern card-header nettoyé"
+                   for name in ('header_open', 'header_close', 'me2') if name in fired)
+    if 'class_attr' in fired:
+        changes.append("Attributs class normalisés")
+    return content, changes
+
+
+# Fragments combinés aléatoirement par le fuzz
+FRAGMENTS = [
+    '<div class="card-header">', '<div class="card-header"> ', '<h4>', '<h5 class="x">', '<h4 id="t">',
+    '</h4>', '</h5>', '</div>', ' ', '\n', '  ', 'class="', '"', 'data-', ':', 'ng-', '-',
+    'mb-3', 'me-2', 'mb-4', 'card-header', 'card', 'x', '<i ', '>', '<div ', '<p ',
+    'class="mb-3 me-2"', 'class=""', 'class="  me-2  "', 'class="card-header"',
+    'data-class="mb-3"', ':class="me-2"', 'é', '{{ x }}',
+]
+
+
+class TestClassAttributeScope:
+    """Tests de la portée des règles de classes"""
+
+    @pytest.mark.parametrize("attribute", [
+        'data-class="mb-3  me-2"',
+        ':class="{ \'mb-3\': open, me-2: true }"',
+        'ng-class="mb-3"',
+        'v-bind:class="mb-3"',
+        'x-class=""',
+    ])
+    def test_prefixed_attributes_untouched(self, attribute):
+        """data-class, :class, ng-class... ne sont ni réécrits ni reformatés"""
+        content = f'<div {attribute}>texte</div>'
+        assert _cleanup_content(content) == (content, [])
+
+    def test_plain_attribute_rewritten(self):
+        """Un attribut class ordinaire suit les règles de remplacement"""
+        content = '<div class="mb-3 card" data-class="mb-3"><i class="fa me-2"></i></div>'
+        new_content, changes = _cleanup_content(content)
+        assert new_content == '<div class="mb-4 card" data-class="mb-3"><i class="fa"></i></div>'
+        assert "mb-3 → mb-4" in changes
+
+    def test_attribute_at_start_of_content(self):
+        """Un attribut en tout début de contenu est aussi traité"""
+        assert _cleanup_content('class="mb-3"')[0] == 'class="mb-4"'
+
+    def test_text_outside_attributes_untouched(self):
+        """Le texte, les scripts et les styles hors attributs class restent intacts"""
+        content = '<p>mb-3   me-2</p>\n<script>el.className = "mb-3";</script>'
+        assert _cleanup_content(content) == (content, [])
+
+
+class TestChangeReport:
+    """Tests du rapport des changements"""
+
+    @pytest.mark.parametrize("content, expected", [
+        ('<p class="a   b">', '<p class="a b">'),
+        ('<p class=" a">', '<p class="a">'),
+        ('<p class="">', '<p >'),
+        ('<p class="  ">', '<p >'),
+    ])
+    def test_normalization_is_reported(self, content, expected):
+        """Un attribut reformaté (espaces, attribut vide) figure dans le rapport"""
+        new_content, changes = _cleanup_content(content)
+        assert new_content == expected
+        assert changes
+
+    def test_clean_content_reports_nothing(self):
+        """Un contenu déjà propre n'est pas modifié et ne signale aucun changement"""
+        content = '<div class="card mb-4">\n  <span class="badge">x</span>\n</div>'
+        assert _cleanup_content(content) == (content, [])
+
+    def test_any_rewrite_has_changes(self):
+        """Tout contenu modifié est accompagné d'au moins un changement"""
+        samples = [
+            '<i class="me-2">', '<p class="a\tb">', '<div class="card-header"><h5>T</h5></div>',
+            '<div class="mb-3">', '<p class="">', '<p class="x  me-2  y">',
+        ]
+        for content in samples:
+            new_content, changes = _cleanup_content(content)
+            assert new_content != content
+            assert changes, content
+
+
+class TestDifferential:
+    """Comparaison avec l'implémentation de référence séquentielle"""
+
+    def test_random_fuzz(self):
+        """Contenus aléatoires : même résultat et même rapport que la référence"""
+        rng = random.Random(2024)
+        for _ in range(20000):
+            content = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 14)))
+            assert _cleanup_content(content) == reference_cleanup(content), repr(content)
+
+    @pytest.mark.parametrize("template", sorted((webapp_dir / "templates").glob("*.html")),
+                             ids=lambda path: path.name)
+    def test_templates_match_reference(self, template):
+        """Templates du dépôt : même résultat que la référence"""
+        content = template.read_text(encoding='utf-8')
+        assert _cleanup_content(content) == reference_cleanup(content)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests du migrateur de templates vers le design moderne
+Migration d'un template d'exemple (avant/après) et comparaison de la passe
+unique des remplacements simples avec les str.replace séquentiels d'origine
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+from migrate_to_modern import TemplateMigrator
+
+SAMPLE_BEFORE = '''{% extends "base.html" %}
+{% block content %}
+<div class="row">
+    <div class="col-md-6">
+        <div class="card mb-4">
+            <div class="card-header"><h5 class="mb-0">Titre</h5></div>
+            <div class="card-body">
+                <div class="form-check">
+                    <input class="form-check-input" type="checkbox" id="c">
+                    <label class="form-check-label text-muted" for="c">Option</label>
+                </div>
+                <select class="form-select mt-3"></select>
+                <a class="btn btn-outline-primary me-2 d-flex">Go</a>
+            </div>
+        </div>
+    </div>
+</div>
+{% endblock %}
+'''
+
+SAMPLE_AFTER = '''{% extends "base_modern.html" %}
+
+{% block extra_head %}{% endblock %}
+
+{% block content %}
+<div class="grid gap-6">
+    <div class="md:w-1/2">
+        <div class="card mb-6">
+            <div class="card-header"><h5 class="mb-0">Titre</h5></div>
+            <div class="card-body">
+                <div class="checkbox-card">
+                    <input class="" type="checkbox" id="c">
+                    <label class="checkbox-label text-secondary" for="c">Option</label>
+                </div>
+                <select class="form-control form-select mt-4"></select>
+                <a class="btn btn btn-secondary mr-2 flex">Go</a>
+            </div>
+        </div>
+    </div>
+</div>
+{% endblock %}
+'''
+
+
+@pytest.fixture(scope="module")
+def migrator():
+    """Migrateur partagé (patterns compilés une fois)"""
+    return TemplateMigrator()
+
+
+def sequential_replacements(replacements, content):
+    """Référence : str.replace successifs dans l'ordre de la table, les clés
+    form-check-input et form-check-label passant avant form-check"""
+    first = ['form-check-input', 'form-check-label']
+    for old in first + [key for key in replacements if key not in first]:
+        content = content.replace(old, replacements[old])
+    return content
+
+
+class TestMigrateTemplate:
+    """Tests de la migration d'un template"""
+
+    def test_sample_template_before_after(self, migrator, tmp_path):
+        """Template d'exemple : contenu migré attendu et sauvegarde de l'original"""
+        template = tmp_path / "page.html"
+        template.write_text(SAMPLE_BEFORE, encoding='utf-8')
+
+        assert migrator.migrate_template(template) is True
+
+        assert template.read_text(encoding='utf-8') == SAMPLE_AFTER
+        assert (tmp_path / "page.html.backup").read_text(encoding='utf-8') == SAMPLE_BEFORE
+
+    def test_form_check_subclasses_use_own_rules(self, migrator, tmp_path):
+        """form-check-input et form-check-label suivent leurs propres règles
+        (changement voulu : auparavant form-check réécrivait leur préfixe en
+        checkbox-card-input / checkbox-card-label)"""
+        template = tmp_path / "form.html"
+        template.write_text('<input class="form-check-input">\n'
+                            '<label class="form-check-label">\n'
+                            '<div class="form-check">\n', encoding='utf-8')
+
+        migrator.migrate_template(template)
+
+        content = template.read_text(encoding='utf-8')
+        assert content == ('<input class="">\n'
+                           '<label class="checkbox-label">\n'
+                           '<div class="checkbox-card">\n')
+        assert 'checkbox-card-' not in content
+
+    def test_unchanged_template_not_rewritten(self, migrator, tmp_path):
+        """Un template sans classe à migrer n'est ni réécrit ni sauvegardé"""
+        template = tmp_path / "page.html"
+        content = '{% extends "base_modern.html" %}\n<div class="grid gap-6">x</div>\n'
+        template.write_text(content, encoding='utf-8')
+
+        assert migrator.migrate_template(template) is True
+
+        assert template.read_text(encoding='utf-8') == content
+        assert not (tmp_path / "page.html.backup").exists()
+
+
+class TestSimplePattern:
+    """Tests de l'alternative unique des remplacements simples"""
+
+    @pytest.mark.parametrize("template", sorted((webapp_dir / "templates").glob("*.html")),
+                             ids=lambda path: path.name)
+    def test_templates_match_sequential_replacements(self, migrator, template):
+        """Templates du dépôt : même résultat que les str.replace successifs"""
+        content = template.read_text(encoding='utf-8')
+        single_pass = migrator._simple_pattern.sub(
+            lambda match: migrator.replacements[match.group(0)], content)
+        assert single_pass == sequential_replacements(migrator.replacements, content)
+
+    def test_sample_matches_sequential_replacements(self, migrator):
+        """Template d'exemple : même résultat que les str.replace successifs"""
+        single_pass = migrator._simple_pattern.sub(
+            lambda match: migrator.replacements[match.group(0)], SAMPLE_BEFORE)
+        assert single_pass == sequential_replacements(migrator.replacements, SAMPLE_BEFORE)
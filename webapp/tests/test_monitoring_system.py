@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Tests du système de surveillance
+Table de positions NumPy, passage vectorisé, stops du flux et index d'alertes
+"""
+
+import sys
+import random
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Ajouter le répertoire parent au path
+current_dir = Path(__file__).parent
+webapp_dir = current_dir.parent
+sys.path.insert(0, str(webapp_dir))
+
+from monitoring_system import (
+    AlertLevel, MonitoringSystem, PositionMonitor, PositionTable
+)
+
+
+def make_monitor(symbol, entry_price, current_price=None, quantity=10.0,
+                 stop_loss=None, take_profit=None):
+    """Construire un PositionMonitor de test"""
+    if current_price is None:
+        current_price = entry_price
+    return PositionMonitor(
+        symbol=symbol,
+        entry_price=entry_price,
+        current_price=current_price,
+        quantity=quantity,
+        unrealized_pnl=(current_price - entry_price) * quantity,
+        unrealized_pnl_percent=(current_price - entry_price) / entry_price * 100,
+        stop_loss=stop_loss,
+        take_profit=take_profit
+    )
+
+
+def assert_table_matches(table, expected):
+    """Vérifier la table contre un dictionnaire de référence symbole → PositionMonitor"""
+    assert len(table) == len(expected)
+    assert sorted(table) == sorted(expected)
+    assert len(table.last_update) == len(table.symbols)
+    for symbol, row in table.symbol_idx.items():
+        assert table.symbols[row] == symbol
+    for symbol, monitor in expected.items():
+        assert table.get(symbol) == monitor
+
+
+@pytest.fixture
+def system():
+    """Système de surveillance sans accès réseau (prix d'ajout = prix d'entrée)"""
+    monitoring = MonitoringSystem()
+    monitoring.market_data_provider.get_real_time_price = lambda symbol: None
+    return monitoring
+
+
+def run_cycle(system, prices, now=None):
+    """Exécuter un cycle de surveillance avec des prix imposés"""
+    async def current_prices(symbols):
+        return {symbol: prices[symbol] for symbol in symbols if symbol in prices}
+    system._current_prices = current_prices
+    asyncio.run(system._update_all_positions(now))
+
+
+class TestPositionTable:
+    """Tests de la table de positions en colonnes"""
+
+    def test_remove_moves_last_row(self):
+        """Le retrait remplace la ligne par la dernière et met l'index à jour"""
+        table = PositionTable()
+        monitors = {s: make_monitor(s, p) for s, p in (("A", 10.0), ("B", 20.0), ("C", 30.0))}
+        for monitor in monitors.values():
+            table.add(monitor)
+
+        table.remove("A")
+        del monitors["A"]
+        assert table.symbol_idx["C"] == 0
+        assert_table_matches(table, monitors)
+
+    def test_readd_after_remove(self):
+        """Une position retirée puis rajoutée reprend ses nouvelles valeurs"""
+        table = PositionTable()
+        table.add(make_monitor("A", 10.0, stop_loss=9.0))
+        table.add(make_monitor("B", 20.0))
+        table.remove("A")
+
+        readded = make_monitor("A", 12.0, take_profit=15.0)
+        table.add(readded)
+        assert table.symbol_idx == {"B": 0, "A": 1}
+        assert table.get("A") == readded
+        assert table.get("A").stop_loss is None
+
+    def test_replace_existing_row(self):
+        """Rajouter un symbole présent remplace sa ligne sans en créer une autre"""
+        table = PositionTable()
+        table.add(make_monitor("A", 10.0))
+        replacement = make_monitor("A", 11.0, quantity=3.0)
+        table.add(replacement)
+        assert len(table) == 1
+        assert table.get("A") == replacement
+
+    def test_growth_past_capacity(self):
+        """Les colonnes doublent de taille sans perdre les lignes existantes"""
+        table = PositionTable(capacity=2)
+        monitors = {}
+        for i in range(9):
+            monitor = make_monitor(f"S{i}", 10.0 + i, stop_loss=5.0 + i)
+            monitors[monitor.symbol] = monitor
+            table.add(monitor)
+        assert len(table.entry_price) >= 9
+        assert_table_matches(table, monitors)
+
+    def test_random_operations_match_dict(self):
+        """Ajouts, remplacements et retraits aléatoires : même contenu qu'un dictionnaire"""
+        rng = random.Random(42)
+        table = PositionTable(capacity=1)
+        expected = {}
+        for _ in range(2000):
+            symbol = f"S{rng.randrange(40)}"
+            if rng.random() < 0.4 and symbol in expected:
+                table.remove(symbol)
+                del expected[symbol]
+            else:
+                monitor = make_monitor(
+                    symbol, rng.uniform(1, 500), quantity=rng.uniform(1, 100),
+                    stop_loss=rng.choice([None, rng.uniform(1, 100)]),
+                    take_profit=rng.choice([None, rng.uniform(500, 900)])
+                )
+                table.add(monitor)
+                expected[symbol] = monitor
+        assert_table_matches(table, expected)
+
+
+class TestPositionScan:
+    """Tests du passage vectorisé d'un cycle"""
+
+    def test_missing_price_keeps_previous_value(self, system):
+        """Un symbole sans prix garde son prix, son P&L et son horodatage"""
+        system.add_position_monitor("A", 100.0, 10)
+        system.add_position_monitor("B", 50.0, 4)
+        before = system.monitored_positions.get("B")
+
+        now = datetime.now() + timedelta(seconds=1)
+        run_cycle(system, {"A": 110.0}, now)
+
+        a = system.monitored_positions.get("A")
+        assert a.current_price == 110.0
+        assert a.unrealized_pnl == pytest.approx(100.0)
+        assert a.unrealized_pnl_percent == pytest.approx(10.0)
+        assert a.last_update == now
+        assert system.monitored_positions.get("B") == before
+
+    def test_stops_and_movement_alerts(self, system):
+        """Stops atteints et mouvements significatifs relevés dans le cycle"""
+        triggered = []
+        system.on_stop_trigger = lambda *args: triggered.append(args)
+        system.add_position_monitor("A", 100.0, 1, stop_loss=95.0)
+        system.add_position_monitor("B", 100.0, 1, take_profit=104.0)
+        system.add_position_monitor("C", 100.0, 1)
+
+        run_cycle(system, {"A": 94.0, "B": 104.0, "C": 100.5})
+
+        assert triggered == [("A", "stop_loss", 94.0, 95.0), ("B", "take_profit", 104.0, 104.0)]
+        titles = [alert.title for alert in system.alerts]
+        assert "Mouvement de prix significatif: A" in titles
+        assert not any(title.endswith(": C") for title in titles)
+
+    def test_removed_during_fetch(self, system):
+        """Une position retirée pendant la récupération des prix est ignorée"""
+        system.add_position_monitor("A", 100.0, 1, stop_loss=95.0)
+        system.add_position_monitor("B", 100.0, 1)
+
+        async def current_prices(symbols):
+            system.remove_position_monitor("A")
+            return {"A": 90.0, "B": 101.0}
+        system._current_prices = current_prices
+        asyncio.run(system._update_all_positions())
+
+        assert "A" not in system.monitored_positions
+        assert system.monitored_positions.get("B").current_price == 101.0
+        assert not any(alert.symbol == "A" for alert in system.alerts)
+
+
+class TestTickStops:
+    """Tests des stops vérifiés à chaque transaction du flux"""
+
+    def test_stop_fires_only_on_crossing(self, system):
+        """Seul le franchissement déclenche : une transaction restée sous le stop non"""
+        triggered = []
+        system.on_stop_trigger = lambda *args: triggered.append(args)
+        system.add_position_monitor("A", 100.0, 1, stop_loss=95.0, take_profit=110.0)
+
+        asyncio.run(system._check_tick("A", 96.0))
+        asyncio.run(system._check_tick("A", 94.5))
+        asyncio.run(system._check_tick("A", 94.0))
+        asyncio.run(system._check_tick("A", 111.0))
+        asyncio.run(system._check_tick("A", 112.0))
+
+        assert triggered == [("A", "stop_loss", 94.5, 95.0), ("A", "take_profit", 111.0, 110.0)]
+        monitor = system.monitored_positions.get("A")
+        assert monitor.current_price == 112.0
+        assert monitor.unrealized_pnl == pytest.approx(12.0)
+
+    def test_sync_callback_does_not_block_loop(self, system):
+        """Un callback synchrone bloquant laisse la boucle traiter d'autres tâches"""
+        released = threading.Event()
+        results = []
+        system.on_stop_trigger = lambda *args: results.append(released.wait(timeout=2))
+        system.add_position_monitor("A", 100.0, 1, stop_loss=95.0)
+
+        async def release():
+            released.set()
+
+        async def scenario():
+            await asyncio.gather(system._check_tick("A", 94.0), release())
+        asyncio.run(scenario())
+
+        assert results == [True]
+
+    def test_tick_for_removed_symbol_is_ignored(self, system):
+        """Une transaction reçue après le retrait de la position est ignorée"""
+        system.add_position_monitor("A", 100.0, 1, stop_loss=95.0)
+        system.remove_position_monitor("A")
+        asyncio.run(system._check_tick("A", 90.0))
+        assert len(system.alerts) == 0
+
+
+class TestAlertIndexes:
+    """Tests des index d'alertes par identifiant, niveau et symbole"""
+
+    def test_indexes_match_brute_force_after_eviction(self, system):
+        """Au-delà de 100 alertes, les index suivent l'historique tronqué"""
+        rng = random.Random(7)
+        symbols = ["AAPL", "MSFT", "TSLA", None]
+        created = [
+            system._create_alert(rng.choice(list(AlertLevel)), "t", "m", rng.choice(symbols))
+            for _ in range(357)
+        ]
+
+        history = list(system.alerts)
+        assert history == created[-100:]
+        assert set(system._alerts_by_id) == {alert.id for alert in history}
+
+        newest_first = history[::-1]
+        for level in [None, *AlertLevel]:
+            for symbol in symbols:
+                expected = [
+                    alert for alert in newest_first
+                    if (level is None or alert.level == level)
+                    and (symbol is None or alert.symbol == symbol)
+                ]
+                assert system.get_alerts(level=level, symbol=symbol, limit=1000) == expected
+                assert system.get_alerts(level=level, symbol=symbol, limit=5) == expected[:5]
+
+    def test_acknowledge_evicted_alert_is_noop(self, system):
+        """Une alerte sortie de l'historique n'est plus acquittable"""
+        first = system._create_alert(AlertLevel.INFO, "t", "m", "AAPL")
+        for _ in range(100):
+            system._create_alert(AlertLevel.WARNING, "t", "m", "MSFT")
+        system.acknowledge_alert(first.id)
+        assert not first.acknowledged
+        assert "AAPL" not in system._alerts_by_symbol